@@ -0,0 +1,307 @@
+"""Single-file, memory-mapped bundle of precomputed pronunciation clips.
+
+Layout:
+
+    header   32 bytes: magic, version, index CRC32, index offset, index length
+    blobs    packed MP3 clips, back to back
+    index    JSON list of [text, language_code, speed, offset, length, crc32, mime]
+
+The index sits after the blobs and the header points at it, so `append` only
+ever writes past the end of the file: new clips, then a new index, then the
+header last. A reader that already parsed the old index keeps seeing valid
+data, and a crash before the header write leaves the previous bundle intact.
+`build` rewrites the whole file into a temporary path and renames it over the
+old one, which also drops the dead indexes left behind by appends.
+
+Readers open the bundle with `mmap`, so every worker process shares one copy
+of the clips through the page cache and `get` returns a zero-copy memoryview.
+
+    python audio_bundle.py build [--output audio.bundle] [--languages French German]
+    python audio_bundle.py append audio.bundle --languages Korean
+    python audio_bundle.py verify audio.bundle
+    python audio_bundle.py list audio.bundle
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+MAGIC = b'LLAUDIO1'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIQQ')  # magic, version, reserved, index crc32, index offset, index length
+DEFAULT_BUNDLE_PATH = os.getenv('AUDIO_BUNDLE_PATH', 'audio.bundle')
+
+
+class BundleKey(NamedTuple):
+    text: str
+    language_code: str
+    speed: str = 'normal'
+
+
+class BundleEntry(NamedTuple):
+    offset: int
+    length: int
+    crc32: int
+    mime: str
+
+
+class BundleError(Exception):
+    """The file is not a readable audio bundle"""
+
+
+def _read_index(raw, header: bytes) -> Dict[BundleKey, BundleEntry]:
+    magic, version, _, index_crc, index_offset, index_length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise BundleError('not an audio bundle')
+    if version != VERSION:
+        raise BundleError(f'unsupported bundle version {version}')
+    index_bytes = raw[index_offset:index_offset + index_length]
+    if len(index_bytes) != index_length or zlib.crc32(index_bytes) != index_crc:
+        raise BundleError('bundle index is truncated or corrupt')
+    return {BundleKey(text, code, speed): BundleEntry(offset, length, crc, mime)
+            for text, code, speed, offset, length, crc, mime in json.loads(bytes(index_bytes))}
+
+
+def _encode_index(entries: Dict[BundleKey, BundleEntry]) -> bytes:
+    rows = [[key.text, key.language_code, key.speed, *entry] for key, entry in entries.items()]
+    return json.dumps(rows, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _write_clips(f, entries: Dict[BundleKey, BundleEntry],
+                 clips: Iterable[Tuple[BundleKey, bytes, str]]) -> Tuple[int, int, int]:
+    """Write clips then the index at the current position; returns the header fields for the index"""
+    position = f.tell()
+    for key, data, mime in clips:
+        f.write(data)
+        entries[key] = BundleEntry(position, len(data), zlib.crc32(data), mime)
+        position += len(data)
+    index = _encode_index(entries)
+    f.write(index)
+    return zlib.crc32(index), position, len(index)
+
+
+def write_bundle(path: str, clips: Iterable[Tuple[BundleKey, bytes, str]]) -> int:
+    """Write a new bundle atomically; returns the number of clips"""
+    tmp_path = f'{path}.tmp'
+    entries: Dict[BundleKey, BundleEntry] = {}
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(bytes(HEADER.size))
+            index_crc, index_offset, index_length = _write_clips(f, entries, clips)
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, index_crc, index_offset, index_length))
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+def append_to_bundle(path: str, clips: Iterable[Tuple[BundleKey, bytes, str]]) -> int:
+    """Add (or replace) clips in place; returns the number of clips written"""
+    with open(path, 'r+b') as f:
+        header = f.read(HEADER.size)
+        entries = _read_index(_FileSlicer(f), header)
+        before = dict(entries)
+        f.seek(0, os.SEEK_END)
+        index_crc, index_offset, index_length = _write_clips(f, entries, clips)
+        # Everything the new header points at must be on disk before the header is
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, index_crc, index_offset, index_length))
+        f.flush()
+        os.fsync(f.fileno())
+    return sum(1 for key, entry in entries.items() if before.get(key) != entry)
+
+
+class _FileSlicer:
+    """Lets `_read_index` slice an open file like a buffer"""
+
+    def __init__(self, f):
+        self._f = f
+
+    def __getitem__(self, item: slice) -> bytes:
+        self._f.seek(item.start)
+        return self._f.read(item.stop - item.start)
+
+
+class AudioBundle:
+    """Read-only, memory-mapped view of a bundle file"""
+
+    def __init__(self, path: str = DEFAULT_BUNDLE_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < HEADER.size:
+                raise BundleError('not an audio bundle')
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._view = memoryview(self._mmap)
+        try:
+            self._entries = _read_index(self._view, self._view[:HEADER.size])
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: BundleKey) -> bool:
+        return key in self._entries
+
+    def keys(self) -> Iterator[BundleKey]:
+        return iter(self._entries)
+
+    def entry(self, text: str, language_code: str, speed: str = 'normal') -> Optional[BundleEntry]:
+        return self._entries.get(BundleKey(text, language_code, speed))
+
+    def get(self, text: str, language_code: str, speed: str = 'normal') -> Optional[memoryview]:
+        """Zero-copy view of a clip, or None if the bundle does not have it"""
+        entry = self._entries.get(BundleKey(text, language_code, speed))
+        if entry is None:
+            return None
+        return self._view[entry.offset:entry.offset + entry.length]
+
+    def verify(self) -> List[BundleKey]:
+        """Keys whose clip is out of range or fails its checksum"""
+        bad = []
+        size = len(self._view)
+        for key, entry in self._entries.items():
+            end = entry.offset + entry.length
+            if entry.offset < HEADER.size or end > size or zlib.crc32(self._view[entry.offset:end]) != entry.crc32:
+                bad.append(key)
+        return bad
+
+    def is_stale(self) -> bool:
+        """True once the file on disk was rebuilt or appended to since it was opened"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self._identity
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # Clips handed out are still referenced: the mapping goes away with them
+            pass
+
+
+def open_bundle(path: str = DEFAULT_BUNDLE_PATH) -> Optional[AudioBundle]:
+    """The bundle at `path`, or None if there is no usable bundle there"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return AudioBundle(path)
+    except (OSError, BundleError) as e:
+        print(f"audio bundle: ignoring {path}: {e}")
+        return None
+
+
+def curriculum_clips(languages: Optional[List[str]] = None, lessons: Optional[List[str]] = None,
+                     skip=frozenset(), slow: bool = False) -> Iterator[Tuple[BundleKey, bytes, str]]:
+    """Translate every lesson phrase into each language and synthesize it.
+
+    Translations go through the shared cache, so the bundle is keyed on the
+    same translation text the app will later ask to speak.
+    """
+    from language_teacher import CURRICULUM, LANGUAGES, GeminiLanguageTeacher
+    from model_scheduler import ModelScheduler, Priority
+    from shared_cache import SharedCache, backend_from_env
+    from speech import TTS_MIME_TYPE, speed_label, synthesize_speech
+
+    languages = languages or list(LANGUAGES)
+    lessons = lessons or list(CURRICULUM)
+    unknown = [name for name in languages if name not in LANGUAGES] + [key for key in lessons if key not in CURRICULUM]
+    if unknown:
+        raise SystemExit(f"unknown languages / lessons: {', '.join(unknown)}")
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        raise SystemExit('GEMINI_API_KEY is required to translate the curriculum')
+    errors: List[str] = []
+    # A build runs in its own process with its own scheduler: give it its share of the quota
+    # through MODEL_RPM / MODEL_QUOTA_PER_DAY (and lower the app's accordingly) when both run at once
+    teacher = GeminiLanguageTeacher(api_key, cache=SharedCache(backend_from_env()),
+                                    error_reporter=errors.append,
+                                    scheduler=ModelScheduler.from_env(interactive_daily_reserve=0),
+                                    priority=Priority.BUILD)
+    speed = speed_label(slow)
+    for language in languages:
+        code = LANGUAGES[language]
+        for lesson_key in lessons:
+            for phrase in CURRICULUM[lesson_key]['phrases']:
+                failures = len(errors)
+                translation = teacher.get_translation(phrase, language)['translation']
+                if len(errors) > failures:
+                    # Fallback text: never bake it into the bundle
+                    print(f"skip {language} / {phrase}: {errors[-1]}")
+                    continue
+                key = BundleKey(translation, code, speed)
+                if key in skip:
+                    continue
+                try:
+                    data = synthesize_speech(translation, code, slow=slow)
+                except Exception as e:
+                    print(f"skip {language} / {phrase}: text-to-speech error: {e}")
+                    continue
+                print(f"{language} / {phrase}: {len(data)} bytes")
+                yield key, data, TTS_MIME_TYPE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('build', 'append'):
+        command = commands.add_parser(name, help=f'{name} curriculum pronunciations')
+        if name == 'build':
+            command.add_argument('--output', default=DEFAULT_BUNDLE_PATH)
+        else:
+            command.add_argument('bundle')
+        command.add_argument('--languages', nargs='+', help='language names (default: all)')
+        command.add_argument('--lessons', nargs='+', help='curriculum lesson keys (default: all)')
+        # Normal speed by default: the app derives slower playback rates from it with ffmpeg
+        command.add_argument('--slow-speed', action='store_true',
+                             help="synthesize at gTTS's slow instead of normal speed (for hosts without ffmpeg)")
+
+    for name in ('verify', 'list'):
+        commands.add_parser(name).add_argument('bundle')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        count = write_bundle(args.output, curriculum_clips(args.languages, args.lessons,
+                                                           slow=args.slow_speed))
+        print(f"wrote {count} clips to {args.output}")
+    elif args.command == 'append':
+        bundle = AudioBundle(args.bundle)
+        existing = frozenset(bundle.keys())
+        bundle.close()
+        count = append_to_bundle(args.bundle, curriculum_clips(args.languages, args.lessons, skip=existing,
+                                                               slow=args.slow_speed))
+        print(f"appended {count} clips to {args.bundle}")
+    elif args.command == 'verify':
+        bundle = AudioBundle(args.bundle)
+        bad = bundle.verify()
+        for key in bad:
+            print(f"corrupt: {key.language_code} {key.speed} {key.text!r}")
+        print(f"{len(bundle) - len(bad)}/{len(bundle)} clips ok")
+        return 1 if bad else 0
+    else:
+        bundle = AudioBundle(args.bundle)
+        for key in bundle.keys():
+            entry = bundle.entry(*key)
+            print(f"{key.language_code}\t{key.speed}\t{entry.length}\t{key.text}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
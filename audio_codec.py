@@ -0,0 +1,88 @@
+"""ffmpeg-backed audio transcoding for playback in the browser.
+
+Browser recordings come back from `audio_recorder` as 16-bit WAV at
+44.1/48 kHz (often stereo, ~1.5 Mbit/s) and TTS clips as 32 kbit/s MP3.
+Speech needs far less: `PlaybackEncoder` transcodes a clip once to mono
+AAC (ADTS, which every current browser plays) at a speech bitrate, keeps the
+encoded form in the shared cache keyed by the source's hash, and hands the
+small payload to `st.audio`, which serves it by media-file URL. Ogg/Opus is
+smaller still, but Safari only plays it from 17, so it is opt-in with
+PLAYBACK_CODEC=opus. Without the `ffmpeg` binary (packages.txt) audio is
+passed through unchanged.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+from typing import Dict, Optional, Tuple
+
+from live_audio import Audio, AudioConfig
+from shared_cache import SharedCache
+
+FFMPEG = shutil.which('ffmpeg')
+# gTTS MP3s are 24 kHz mono
+DECODE_CONFIG = AudioConfig(sample_rate=24000)
+
+# codec -> (MIME type, ffmpeg output options)
+PLAYBACK_CODECS: Dict[str, Tuple[str, list]] = {
+    'opus': ('audio/ogg', ['-c:a', 'libopus', '-b:a', '24k', '-application', 'voip', '-f', 'ogg']),
+    'aac': ('audio/aac', ['-c:a', 'aac', '-b:a', '32k', '-f', 'adts']),
+}
+PLAYBACK_CODEC = os.getenv('PLAYBACK_CODEC', 'aac')
+PLAYBACK_SAMPLE_RATE = 24000
+
+
+def run_ffmpeg(args, data: bytes) -> bytes:
+    if FFMPEG is None:
+        raise RuntimeError("Audio transcoding needs the 'ffmpeg' binary")
+    result = subprocess.run([FFMPEG, '-hide_banner', '-loglevel', 'error', *args],
+                            input=data, capture_output=True, timeout=30, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def decode_mp3(data: bytes, config: AudioConfig = DECODE_CONFIG) -> Audio:
+    pcm = run_ffmpeg(['-i', 'pipe:0', '-f', 's16le', '-ac', str(config.channels),
+                      '-ar', str(config.sample_rate), 'pipe:1'], data)
+    return Audio(config, pcm)
+
+
+def encode_mp3(audio: Audio, bitrate: str = '32k') -> bytes:
+    return run_ffmpeg(['-f', 's16le', '-ar', str(audio.config.sample_rate), '-ac', str(audio.config.channels),
+                       '-i', 'pipe:0', '-b:a', bitrate, '-f', 'mp3', 'pipe:1'], bytes(audio.data))
+
+
+def transcode(data: bytes, codec: str = PLAYBACK_CODEC) -> bytes:
+    """Any clip ffmpeg can read (WAV, MP3, M4A, ...) as mono speech-rate `codec`"""
+    _, options = PLAYBACK_CODECS[codec]
+    return run_ffmpeg(['-i', 'pipe:0', '-vn', '-ac', '1', '-ar', str(PLAYBACK_SAMPLE_RATE), *options, 'pipe:1'],
+                      data)
+
+
+class PlaybackEncoder:
+    """Encodes each distinct clip once; falls back to the original when that is not smaller"""
+
+    def __init__(self, cache: Optional[SharedCache], codec: str = PLAYBACK_CODEC):
+        if codec not in PLAYBACK_CODECS:
+            raise ValueError(f"PLAYBACK_CODEC must be one of {sorted(PLAYBACK_CODECS)}, got {codec!r}")
+        self.cache = cache
+        self.codec = codec
+        self.mime_type = PLAYBACK_CODECS[codec][0]
+
+    def encode(self, data: bytes, mime_type: str, ttl: float) -> Tuple[bytes, str]:
+        """(payload, MIME type) to send for `data`"""
+        if FFMPEG is None or not data:
+            return data, mime_type
+        try:
+            if self.cache is None:
+                encoded = transcode(data, self.codec)
+            else:
+                key = self.cache.make_key('playback', self.codec, hashlib.sha256(data).hexdigest())
+                encoded = self.cache.get_or_compute(key, lambda: transcode(data, self.codec),
+                                                    ttl=ttl, codec='bytes')
+        except Exception:
+            return data, mime_type
+        if not encoded or len(encoded) >= len(data):
+            return data, mime_type
+        return encoded, self.mime_type
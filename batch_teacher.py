@@ -0,0 +1,205 @@
+"""Headless batch translation and evaluation jobs.
+
+    python batch_teacher.py translate phrases.csv -o translations.jsonl --languages French German
+    python batch_teacher.py evaluate attempts.jsonl -o evaluations.jsonl --concurrency 8 --rpm 30
+
+Input is CSV (with a header row) or JSONL, streamed row by row:
+
+    translate   text, language (or --languages to fan each phrase out), optional id
+    evaluate    attempt, target, language, optional id
+
+Rows are fanned out over a bounded thread pool, admitted through the same
+token bucket scheduler the app uses (`--rpm`, `--concurrency`), and every
+result is appended to the output JSONL as soon as it is ready. The output file
+doubles as the checkpoint: rerunning the same command skips rows that already
+have a result and retries the ones that failed. Translations and evaluations
+go through the shared cache, so the app reuses them afterwards.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, Set
+
+from evaluation_cache import EvaluationCache
+from language_teacher import DEFAULT_PROMPT_PROFILE, LANGUAGES, PROMPT_PROFILES, GeminiLanguageTeacher
+from model_scheduler import ModelScheduler, Priority, TokenBucket
+from shared_cache import SharedCache, backend_from_env
+
+REQUIRED_FIELDS = {
+    'translate': ('text', 'language'),
+    'evaluate': ('attempt', 'target', 'language'),
+}
+
+
+def read_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Stream rows from a CSV (header row required) or JSONL file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.jsonl') or path.endswith('.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def expand_jobs(task: str, rows: Iterator[Dict[str, str]], languages) -> Iterator[Dict[str, str]]:
+    """Validated jobs with a stable id, one per (row, language)"""
+    for n, row in enumerate(rows, 1):
+        targets = languages if (languages and not row.get('language')) else [row.get('language')]
+        for language in targets:
+            job = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items()}
+            job['language'] = language
+            missing = [field for field in REQUIRED_FIELDS[task] if not job.get(field)]
+            if missing:
+                print(f"row {n}: missing {', '.join(missing)}; skipped", file=sys.stderr)
+                continue
+            if job['language'] not in LANGUAGES:
+                print(f"row {n}: unknown language {job['language']!r}; skipped", file=sys.stderr)
+                continue
+            if not job.get('id'):
+                key = json.dumps([task] + [job[field] for field in REQUIRED_FIELDS[task]], ensure_ascii=False)
+                job['id'] = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+            elif languages and len(targets) > 1:
+                job['id'] = f"{job['id']}:{language}"
+            yield job
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids that already have a successful result in the output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if 'error' in record:
+                done.discard(record.get('id'))
+            else:
+                done.add(record.get('id'))
+    return done
+
+
+def run_job(teacher: GeminiLanguageTeacher, task: str, job: Dict[str, str], details: bool,
+            retries: int) -> Dict[str, object]:
+    started = time.monotonic()
+    for attempt in range(retries + 1):
+        try:
+            if task == 'translate':
+                result = teacher.translate(job['text'], job['language'], notes=details)
+            else:
+                result = teacher.evaluate(job['attempt'], job['target'], job['language'], tips=details)
+            return {**job, 'result': result, 'seconds': round(time.monotonic() - started, 3)}
+        except Exception as e:
+            if attempt == retries:
+                return {**job, 'error': f'{type(e).__name__}: {e}', 'seconds': round(time.monotonic() - started, 3)}
+            time.sleep(min(30.0, 2 ** attempt))
+
+
+class Progress:
+    def __init__(self, teacher: GeminiLanguageTeacher, every: float):
+        self.teacher = teacher
+        self.every = every
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _tokens(self) -> int:
+        return sum(t['input_tokens'] + t['output_tokens'] for t in self.teacher.ledger.totals.values())
+
+    def line(self) -> str:
+        elapsed = max(1e-9, time.monotonic() - self.started)
+        calls = sum(t['calls'] for t in self.teacher.ledger.totals.values())
+        return (f"{self.done} done, {self.failed} failed, {self.skipped} resumed | "
+                f"{self.done / elapsed:.2f} rows/s, {calls / elapsed * 60:.1f} model calls/min, "
+                f"{self._tokens() / elapsed:.0f} tokens/s | {elapsed:.0f}s")
+
+    def tick(self, force: bool = False):
+        now = time.monotonic()
+        if force or now - self.last_report >= self.every:
+            self.last_report = now
+            print(self.line(), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('task', choices=sorted(REQUIRED_FIELDS))
+    parser.add_argument('input', help='CSV or JSONL file')
+    parser.add_argument('-o', '--output', required=True, help='JSONL results, appended to (and resumed from)')
+    parser.add_argument('--languages', nargs='+', choices=sorted(LANGUAGES),
+                        help='fan rows without a language column out to these languages')
+    parser.add_argument('--concurrency', type=int, default=8, help='model calls in flight')
+    parser.add_argument('--rpm', type=float, default=30, help='model requests per minute')
+    parser.add_argument('--burst', type=float, default=5)
+    parser.add_argument('--retries', type=int, default=2)
+    parser.add_argument('--profile', choices=PROMPT_PROFILES, default=DEFAULT_PROMPT_PROFILE)
+    parser.add_argument('--no-details', action='store_true', help='skip usage notes / tips')
+    parser.add_argument('--no-cache', action='store_true', help='bypass the shared cache')
+    parser.add_argument('--report-every', type=float, default=10.0, help='seconds between progress lines')
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        sys.exit('GEMINI_API_KEY is required')
+
+    window = 2 * args.concurrency
+    scheduler = ModelScheduler(TokenBucket(args.rpm / 60, args.burst), max_concurrent=args.concurrency,
+                               interactive_token_reserve=0, interactive_slot_reserve=0,
+                               max_background_queue=window)
+    cache = None if args.no_cache else SharedCache(backend_from_env())
+    teacher = GeminiLanguageTeacher(api_key, cache=cache, scheduler=scheduler, priority=Priority.BUILD,
+                                    prompt_profile=args.profile,
+                                    evaluation_cache=None if cache is None else EvaluationCache(shared=cache))
+    details = not args.no_details
+    done = completed_ids(args.output)
+    progress = Progress(teacher, args.report_every)
+
+    with open(args.output, 'a', encoding='utf-8') as out, ThreadPoolExecutor(args.concurrency) as pool:
+        pending = set()
+
+        def drain(return_when):
+            finished, still_running = wait(pending, return_when=return_when)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                if 'error' in record:
+                    progress.failed += 1
+                else:
+                    progress.done += 1
+            out.flush()
+            progress.tick()
+            return still_running
+
+        try:
+            for job in expand_jobs(args.task, read_rows(args.input), args.languages):
+                if job['id'] in done:
+                    progress.skipped += 1
+                    continue
+                # Bounded window: the input is streamed, never loaded whole
+                if len(pending) >= window:
+                    pending = drain(FIRST_COMPLETED)
+                pending.add(pool.submit(run_job, teacher, args.task, job, details, args.retries))
+            while pending:
+                pending = drain(FIRST_COMPLETED)
+        except KeyboardInterrupt:
+            print("interrupted: finishing in-flight rows; rerun the same command to resume", file=sys.stderr)
+            for future in pending:
+                future.cancel()
+            pending = {future for future in pending if not future.cancelled()}
+            if pending:
+                drain(ALL_COMPLETED)
+    progress.tick(force=True)
+    return 1 if progress.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
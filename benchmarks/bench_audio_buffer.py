@@ -0,0 +1,65 @@
+"""Benchmark accumulating and reading multi-minute live sessions.
+
+    python benchmarks/bench_audio_buffer.py --minutes 1 2 4 8
+
+Appends 100 ms reply chunks (24 kHz mono) the way a live conversation does and
+then reads the whole session back in 100 ms windows. Compares repeated
+`Audio + Audio` (what the prototype's Audio offered) with `AudioBuffer`.
+The `+` path is quadratic, so it is only run up to --max-naive-minutes.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_audio import LIVE_OUTPUT_AUDIO_CONFIG, AudioBuffer  # noqa: E402
+
+CONFIG = LIVE_OUTPUT_AUDIO_CONFIG
+CHUNK_SECONDS = 0.1
+
+
+def naive_session(chunks):
+    data = b''
+    for chunk in chunks:
+        data = data + chunk
+    step = len(chunks[0])
+    for pos in range(0, len(data), step):
+        data[pos:pos + step]
+    return data
+
+
+def buffered_session(chunks):
+    buffer = AudioBuffer(CONFIG)
+    for chunk in chunks:
+        buffer.append(chunk)
+    for i in range(len(chunks)):
+        buffer.window(i * CHUNK_SECONDS, (i + 1) * CHUNK_SECONDS)
+    buffer.as_numpy()
+    return buffer
+
+
+def timed(fn, chunks) -> float:
+    start = time.perf_counter()
+    fn(chunks)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--max-naive-minutes', type=float, default=8)
+    args = parser.parse_args()
+
+    chunk = os.urandom(int(CONFIG.bytes_per_second * CHUNK_SECONDS))
+    print(f"{'minutes':>8} {'Audio + Audio':>14} {'AudioBuffer':>12}")
+    for minutes in args.minutes:
+        chunks = [chunk] * int(minutes * 60 / CHUNK_SECONDS)
+        buffered = timed(buffered_session, chunks)
+        naive = timed(naive_session, chunks) if minutes <= args.max_naive_minutes else float('nan')
+        print(f'{minutes:8g} {naive * 1000:12.1f}ms {buffered * 1000:10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Bytes sent to the browser per rerun, before and after playback transcoding.
+
+    python benchmarks/bench_audio_delivery.py --reruns 20
+
+Builds the two clips a practice rerun plays: a learner recording as
+`audio_recorder` returns it (5 s, 48 kHz stereo 16-bit WAV) and a TTS clip
+(3 s, gTTS-style 24 kHz mono 32 kbit/s MP3), then reports each one's size
+raw and after `audio_codec.transcode` for every playback codec, the encode
+time, and the audio bytes a session of `--reruns` reruns sends. Needs the
+ffmpeg binary.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_codec import FFMPEG, PLAYBACK_CODECS, run_ffmpeg, transcode  # noqa: E402
+from bench_time_stretch import synthetic_speech  # noqa: E402
+from live_audio import Audio, AudioConfig  # noqa: E402
+
+
+def recording_wav(seconds: float) -> bytes:
+    config = AudioConfig(sample_rate=48000, channels=2)
+    voice = synthetic_speech(seconds, sample_rate=48000)
+    pcm = np.repeat(np.clip(voice * 32768, -32768, 32767).astype('<i2'), 2)
+    return Audio(config, pcm.tobytes()).as_wav_bytes()
+
+
+def tts_mp3(seconds: float) -> bytes:
+    pcm = np.clip(synthetic_speech(seconds) * 32768, -32768, 32767).astype('<i2').tobytes()
+    return run_ffmpeg(['-f', 's16le', '-ar', '24000', '-ac', '1', '-i', 'pipe:0',
+                       '-b:a', '32k', '-f', 'mp3', 'pipe:1'], pcm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=20, help='reruns per simulated session')
+    args = parser.parse_args()
+    if FFMPEG is None:
+        sys.exit('ffmpeg is required (see packages.txt)')
+
+    clips = {'recording (WAV)': recording_wav(5.0), 'TTS (MP3)': tts_mp3(3.0)}
+    print(f"{'clip':<18}{'codec':>8}{'raw KB':>10}{'sent KB':>10}{'ratio':>8}{'encode ms':>11}")
+    session = {codec: 0 for codec in PLAYBACK_CODECS}
+    for name, data in clips.items():
+        for codec in PLAYBACK_CODECS:
+            started = time.perf_counter()
+            encoded = transcode(data, codec)
+            elapsed = time.perf_counter() - started
+            sent = min(len(encoded), len(data))
+            session[codec] += sent
+            print(f"{name:<18}{codec:>8}{len(data) / 1024:>10.1f}{sent / 1024:>10.1f}"
+                  f"{len(data) / sent:>7.1f}x{elapsed * 1e3:>11.1f}")
+    raw = sum(len(data) for data in clips.values())
+    print(f"\nper rerun: {raw / 1024:.0f} KB raw; per session of {args.reruns} reruns: "
+          f"{raw * args.reruns / 1024 / 1024:.1f} MB raw")
+    for codec, sent in session.items():
+        print(f"  {codec}: {sent / 1024:.0f} KB per rerun, {sent * args.reruns / 1024 / 1024:.2f} MB per session "
+              f"({raw / sent:.0f}x less)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Hit rate of the TinyLFU evaluation cache vs plain LRU at the same capacity.
+
+    python benchmarks/bench_evaluation_cache.py --capacity 500 --requests 200000
+
+Simulates learners per language: each attempt picks a target phrase and a
+transcript from a Zipf distribution (a few common renderings and mistakes
+dominate), interleaved with periodic scans of one-off transcripts (noise,
+half-sentences) that a recency-only cache lets flush the popular head.
+Keys go through `EvaluationCache.make_key`, so normalization merges
+case / punctuation variants exactly as in the app. No model calls are made.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation_cache import EvaluationCache, LRUCache, TinyLFUCache  # noqa: E402
+from language_teacher import CURRICULUM, LANGUAGES  # noqa: E402
+
+VARIANTS = ('{}', '{}!', '{}.', ' {} ', '{}?')
+
+
+def workload(requests: int, languages, transcripts_per_phrase: int, scan_every: int, scan_length: int,
+             skew: float, seed: int):
+    rng = random.Random(seed)
+    phrases = [phrase for lesson in CURRICULUM.values() for phrase in lesson['phrases']]
+    weights = [1 / (rank ** skew) for rank in range(1, transcripts_per_phrase + 1)]
+    one_off = 0
+    n = 0
+    while n < requests:
+        if scan_every and n and n % scan_every == 0:
+            for _ in range(scan_length):
+                one_off += 1
+                language = rng.choice(languages)
+                yield language, EvaluationCache.make_key(f'noise {one_off}', 'hello', language, 'bench')
+            n += scan_length
+            continue
+        language = rng.choice(languages)
+        phrase = rng.choices(phrases, weights=[1 / (i + 1) for i in range(len(phrases))])[0]
+        rank = rng.choices(range(transcripts_per_phrase), weights=weights)[0]
+        transcript = rng.choice(VARIANTS).format(f'{phrase.lower()} {rank}' if rank else phrase)
+        yield language, EvaluationCache.make_key(transcript, phrase, language, 'bench')
+        n += 1
+
+
+def run(cache, keys):
+    hits = {}
+    started = time.perf_counter()
+    for language, key in keys:
+        counts = hits.setdefault(language, [0, 0])
+        counts[1] += 1
+        if cache.get(key) is not None:
+            counts[0] += 1
+        else:
+            cache.put(key, True)
+    return hits, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--capacity', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--languages', nargs='+', default=list(LANGUAGES))
+    parser.add_argument('--transcripts', type=int, default=50, help='distinct transcripts per target phrase')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of transcript popularity')
+    parser.add_argument('--scan-every', type=int, default=5000, help='requests between one-off scans (0: none)')
+    parser.add_argument('--scan-length', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    keys = list(workload(args.requests, args.languages, args.transcripts, args.scan_every, args.scan_length,
+                         args.skew, args.seed))
+    results = {}
+    for name, cache in (('LRU', LRUCache(args.capacity)), ('TinyLFU', TinyLFUCache(args.capacity))):
+        results[name] = run(cache, keys)
+
+    print(f"{len(keys)} lookups, {len(set(k for _, k in keys))} distinct keys, capacity {args.capacity}")
+    print(f"{'language':<20}{'LRU':>10}{'TinyLFU':>10}")
+    for language in sorted(results['LRU'][0]):
+        row = [results[name][0][language] for name in ('LRU', 'TinyLFU')]
+        print(f"{language:<20}" + ''.join(f"{hit / total:>10.1%}" for hit, total in row))
+    for name, (hits, seconds) in results.items():
+        hit = sum(h for h, _ in hits.values())
+        total = sum(t for _, t in hits.values())
+        print(f"{name:<8} overall {hit / total:.1%} hit rate, {seconds / total * 1e6:.2f} us/lookup")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark per-chunk CPU and allocations of the live audio transport.
+
+    python benchmarks/bench_live_transport.py
+
+Compares the Colab prototype's path (base64 JSON to and from the browser,
+re-encoded again for the Live API) with the binary transport in live_tutor.py
+(raw PCM frames to the browser, one base64 pass into a reused buffer) for a
+100 ms microphone chunk and a 100 ms reply chunk.
+"""
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_audio import LIVE_OUTPUT_AUDIO_CONFIG, STANDARD_AUDIO_CONFIG  # noqa: E402
+from live_tutor import AudioInputEncoder, decode_audio_output, encode_audio_input  # noqa: E402
+
+CHUNK_SECONDS = 0.1
+
+
+def pcm(config, seconds):
+    samples = (np.sin(np.arange(int(config.sample_rate * seconds)) / 10) * 8000).astype('<i2')
+    return samples.tobytes()
+
+
+def legacy_round_trip(browser_msg: str, server_msg: str):
+    # learner -> API: JSON/base64 from the browser, decoded, re-encoded for the API
+    raw = base64.b64decode(json.loads(browser_msg)['audio_in'].encode('utf-8'))
+    json.dumps(encode_audio_input(raw, STANDARD_AUDIO_CONFIG))
+    # API -> learner: decoded once, base64-encoded again for the browser
+    reply = decode_audio_output(json.loads(server_msg))
+    json.dumps({'audio_out': base64.b64encode(reply).decode('utf-8')})
+
+
+def make_binary_round_trip():
+    encoder = AudioInputEncoder(STANDARD_AUDIO_CONFIG)
+
+    def binary_round_trip(browser_frame: bytes, server_msg: str):
+        encoder.encode(browser_frame)
+        decode_audio_output(json.loads(server_msg))  # forwarded to the browser as-is
+
+    return binary_round_trip
+
+
+def measure(name, fn, args, repeats=20_000):
+    for _ in range(100):
+        fn(*args)
+    start = time.process_time()
+    for _ in range(repeats):
+        fn(*args)
+    cpu_us = (time.process_time() - start) / repeats * 1e6
+
+    tracemalloc.start()
+    for _ in range(100):
+        fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # each stream needs one mic chunk and one reply chunk every CHUNK_SECONDS
+    streams_per_core = CHUNK_SECONDS / (cpu_us / 1e6)
+    print(f'{name:8s} {cpu_us:8.1f} us CPU per chunk pair, peak traced {peak / 1024:7.1f} KiB, '
+          f'~{streams_per_core:,.0f} streams per core')
+
+
+def main():
+    mic = pcm(STANDARD_AUDIO_CONFIG, CHUNK_SECONDS)
+    reply = pcm(LIVE_OUTPUT_AUDIO_CONFIG, CHUNK_SECONDS)
+    server_msg = json.dumps({'serverContent': {'modelTurn': {'parts': [
+        {'inlineData': {'mimeType': 'audio/pcm;rate=24000', 'data': base64.b64encode(reply).decode()}}
+    ]}}})
+    browser_msg = json.dumps({'audio_in': base64.b64encode(mic).decode()})
+
+    measure('legacy', legacy_round_trip, (browser_msg, server_msg))
+    measure('binary', make_binary_round_trip(), (mic, server_msg))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Latency and token use of the verbose vs compact prompt profiles, per language.
+
+    GEMINI_API_KEY=... python benchmarks/bench_prompt_profiles.py --phrases 3
+
+For every language in LANGUAGES, translates the first `--phrases` greetings
+and evaluates a slightly wrong attempt at each, once per profile, straight
+against the API (no cache, no fallbacks). Token counts come from each
+response's usage metadata. Uses real quota: 4 x phrases x languages calls,
+unless replayed offline from a cassette recorded earlier (see cassette.py):
+
+    CASSETTE_MODE=record GEMINI_API_KEY=... python benchmarks/bench_prompt_profiles.py
+    CASSETTE_MODE=replay CASSETTE_LATENCY=1 python benchmarks/bench_prompt_profiles.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cassette  # noqa: E402
+from language_teacher import CURRICULUM, LANGUAGES, PROMPT_PROFILES, GeminiLanguageTeacher, TokenLedger  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--phrases', type=int, default=3)
+    parser.add_argument('--languages', nargs='+', default=list(LANGUAGES))
+    parser.add_argument('--no-details', action='store_true', help='compact profile without usage notes / tips')
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds between calls, to stay under rate limits')
+    args = parser.parse_args()
+
+    api_key = os.getenv('GEMINI_API_KEY')
+    if cassette.replaying():
+        api_key = api_key or 'replay'
+    elif not api_key:
+        sys.exit('GEMINI_API_KEY is required')
+    phrases = CURRICULUM['greetings']['phrases'][:args.phrases]
+    details = not args.no_details
+
+    ledgers = {profile: TokenLedger() for profile in PROMPT_PROFILES}
+    rows = []
+    failures = {profile: 0 for profile in PROMPT_PROFILES}
+    for language in args.languages:
+        row = {'language': language}
+        for profile in PROMPT_PROFILES:
+            teacher = GeminiLanguageTeacher(api_key, prompt_profile=profile, ledger=TokenLedger())
+            for phrase in phrases:
+                try:
+                    translation = teacher._request_translation(phrase, language, details)['translation']
+                    time.sleep(args.pause)
+                    teacher._request_evaluation(translation[:-1] or translation, translation, language, details)
+                except Exception as e:
+                    failures[profile] += 1
+                    print(f"{profile} / {language} / {phrase}: {e}", file=sys.stderr)
+                time.sleep(args.pause)
+            for summary in teacher.ledger.summary():
+                row[(profile, summary['kind'])] = summary
+            for key, totals in teacher.ledger.totals.items():
+                merged = ledgers[profile].totals.setdefault(key, dict.fromkeys(totals, 0))
+                for name, value in totals.items():
+                    merged[name] += value
+        rows.append(row)
+
+    header = f"{'language':<20}" + ''.join(
+        f"{profile + ' ' + kind[:5]:>28}" for profile in PROMPT_PROFILES for kind in ('translation', 'evaluation'))
+    print(header)
+    print(f"{'':<20}" + f"{'ms / in tok / out tok':>28}" * 2 * len(PROMPT_PROFILES))
+    for row in rows:
+        cells = []
+        for profile in PROMPT_PROFILES:
+            for kind in ('translation', 'evaluation'):
+                s = row.get((profile, kind))
+                cells.append(f"{'-':>28}" if s is None else
+                             f"{s['mean_seconds'] * 1000:>12.0f} / {s['mean_input_tokens']:>5.0f} / {s['mean_output_tokens']:>5.0f}")
+        print(f"{row['language']:<20}" + ''.join(cells))
+
+    print()
+    for profile in PROMPT_PROFILES:
+        for summary in ledgers[profile].summary():
+            print(f"{profile:<8} {summary['kind']:<12} calls {summary['calls']:4d}  "
+                  f"mean {summary['mean_seconds'] * 1000:6.0f} ms  in {summary['mean_input_tokens']:6.1f}  "
+                  f"out {summary['mean_output_tokens']:6.1f} tokens")
+        print(f"{profile:<8} failed calls: {failures[profile]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark resampling throughput in seconds of audio per CPU-second.
+
+    python benchmarks/bench_resample.py --seconds 30
+
+Covers the conversions the app needs: stereo browser recordings (44.1/48 kHz)
+down to 16 kHz for speech recognition, and 16 kHz <-> 24 kHz between the
+microphone and the Live API. Each is timed as a whole clip and as a stream of
+20 ms chunks carrying filter state.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_audio import Audio, AudioConfig  # noqa: E402
+from resample import Resampler, resample_audio  # noqa: E402
+
+CONVERSIONS = [
+    (AudioConfig(48000, channels=2), AudioConfig(16000)),
+    (AudioConfig(44100, channels=2), AudioConfig(16000)),
+    (AudioConfig(16000), AudioConfig(24000)),
+    (AudioConfig(24000), AudioConfig(16000)),
+]
+
+
+def noise(config: AudioConfig, seconds: float) -> Audio:
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 3000, int(config.sample_rate * seconds) * config.channels)
+    return Audio(config, samples.astype(config.numpy_dtype).tobytes())
+
+
+def cpu_seconds(fn) -> float:
+    start = time.process_time()
+    fn()
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--chunk-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"{'conversion':28s} {'whole clip':>14s} {'streamed':>14s}   (x realtime per CPU core)")
+    for in_config, out_config in CONVERSIONS:
+        audio = noise(in_config, args.seconds)
+        whole = cpu_seconds(lambda: resample_audio(audio, out_config))
+
+        chunk_bytes = int(in_config.sample_rate * args.chunk_ms / 1000) * in_config.frame_size
+        data = memoryview(audio.data)
+
+        def streamed():
+            resampler = Resampler(in_config, out_config)
+            for pos in range(0, len(data), chunk_bytes):
+                resampler.process(data[pos:pos + chunk_bytes])
+
+        stream = cpu_seconds(streamed)
+        name = f'{in_config.sample_rate}Hz x{in_config.channels} -> {out_config.sample_rate}Hz'
+        print(f'{name:28s} {args.seconds / whole:12.0f}x {args.seconds / stream:12.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark next-card selection latency of the review scheduler at scale.
+
+    python benchmarks/bench_review_scheduler.py --cards 50000 --users 20
+
+Fills a temporary database with one heavy learner (``--cards`` reviewed items
+spread over every CURRICULUM-sized lesson and language) plus background
+learners, then times ``next_card`` and a full review-then-select cycle.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from review_scheduler import ReviewScheduler  # noqa: E402
+
+LANGUAGES = ['Hebrew', 'Finnish', 'French', 'German', 'Spanish', 'Italian', 'Portuguese',
+             'Japanese', 'Korean', 'Hindi', 'Arabic', 'Bahasa Melayu', 'Chinese (Mandarin)']
+
+
+def populate(scheduler: ReviewScheduler, user_id: str, cards: int, now: float):
+    rows = []
+    for i in range(cards):
+        language = LANGUAGES[i % len(LANGUAGES)]
+        rows.append((user_id, language, f'lesson_{i % 50}', f'phrase {i}', random.randint(0, 8),
+                     random.uniform(600, 90 * 86400), random.uniform(1.3, 2.8),
+                     now + random.uniform(-30 * 86400, 90 * 86400), random.randint(0, 100)))
+    with scheduler._conn:
+        scheduler._conn.executemany(
+            'INSERT OR REPLACE INTO review_cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+        )
+
+
+def timed(fn, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, default=50_000, help='reviewed items for the measured learner')
+    parser.add_argument('--users', type=int, default=20, help='background learners')
+    parser.add_argument('--repeats', type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler = ReviewScheduler(os.path.join(tmp, 'bench.db'))
+        now = time.time()
+        populate(scheduler, 'learner', args.cards, now)
+        for u in range(args.users):
+            populate(scheduler, f'background_{u}', args.cards // 10, now)
+
+        median, p99 = timed(lambda: scheduler.next_card('learner', 'Hebrew'), args.repeats)
+        print(f'next_card (one language): median {median:.1f} us, p99 {p99:.1f} us')
+        median, p99 = timed(lambda: scheduler.next_card('learner'), args.repeats)
+        print(f'next_card (all languages): median {median:.1f} us, p99 {p99:.1f} us')
+
+        def review_then_select():
+            card = scheduler.next_card('learner', 'Hebrew')
+            scheduler.review(card.user_id, card.language, card.lesson_key, card.phrase, random.randint(0, 100))
+
+        median, p99 = timed(review_then_select, args.repeats // 5)
+        print(f'select + review: median {median:.1f} us, p99 {p99:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark cache hit rate as Streamlit worker processes are added.
+
+    python benchmarks/bench_shared_cache.py --workers 1 2 4 8
+
+Each worker process serves a Zipf-distributed stream of (phrase, language)
+translation lookups, as learners spread across workers by a load balancer
+would. Compares a per-process memo (what st.cache_data gives each worker) with
+the shared SQLite cache, reporting hit rate and how many "model calls" were
+made in total. Model calls are simulated with a short sleep.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_cache import SharedCache, SQLiteCacheBackend  # noqa: E402
+
+KEYS = 13 * 50  # LANGUAGES x CURRICULUM phrases
+
+
+def requests_for(worker: int, count: int):
+    rng = random.Random(worker)
+    weights = [1 / (rank + 1) for rank in range(KEYS)]
+    return rng.choices(range(KEYS), weights=weights, k=count)
+
+
+def run_worker(args):
+    worker, count, db_path, model_ms = args
+
+    def model_call(key):
+        time.sleep(model_ms / 1000)
+        return {'translation': f'phrase {key}'}
+
+    calls = 0
+    if db_path is None:
+        memo = {}
+        for key in requests_for(worker, count):
+            if key not in memo:
+                memo[key] = model_call(key)
+                calls += 1
+        return calls
+
+    cache = SharedCache(SQLiteCacheBackend(db_path))
+    for key in requests_for(worker, count):
+        cache.get_or_compute(cache.make_key('translation', key), lambda: model_call(key))
+    return cache.stats['misses']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--requests', type=int, default=4000, help='total requests, split across workers')
+    parser.add_argument('--model-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'per-process hit rate':>22} {'shared hit rate':>16} {'shared wall s':>14}")
+    for workers in args.workers:
+        per_worker = args.requests // workers
+        with multiprocessing.Pool(workers) as pool:
+            local_calls = sum(pool.map(run_worker, [(w, per_worker, None, args.model_ms) for w in range(workers)]))
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = os.path.join(tmp, 'cache.db')
+                SQLiteCacheBackend(db_path)
+                start = time.perf_counter()
+                shared_calls = sum(pool.map(run_worker, [(w, per_worker, db_path, args.model_ms)
+                                                         for w in range(workers)]))
+                wall = time.perf_counter() - start
+        total = per_worker * workers
+        print(f'{workers:7d} {1 - local_calls / total:21.1%} {1 - shared_calls / total:15.1%} {wall:14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Speed of the local pronunciation-guide engines, per language.
+
+    python benchmarks/bench_transliteration.py --repeat 2000
+
+Romanizes a few greetings per registered engine and reports the median time
+per phrase, the guide produced, and whether the translation prompt for that
+language still asks the model for a pronunciation field. Chinese and
+Japanese only appear when `pypinyin` / `pykakasi` are installed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transliteration import TRANSLITERATORS, replaces_model_guide, transliterate  # noqa: E402
+
+SAMPLES = {
+    'Korean': ['안녕하세요', '감사합니다', '만나서 반갑습니다', '이름이 뭐예요?'],
+    'Hindi': ['नमस्ते', 'आप कैसे हैं?', 'धन्यवाद', 'आपसे मिलकर खुशी हुई'],
+    'Arabic': ['مَرْحَبًا', 'شُكْرًا', 'السَّلَامُ عَلَيْكُمْ', 'كَيْفَ حَالُكَ؟'],
+    'Hebrew': ['שָׁלוֹם', 'בֹּקֶר טוֹב', 'תּוֹדָה', 'מָה שְׁלוֹמְךָ?'],
+    'Chinese (Mandarin)': ['你好', '早上好', '你叫什么名字？', '很高兴认识你'],
+    'Japanese': ['こんにちは', 'おはようございます', 'お名前は何ですか？', 'はじめまして'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'language':<20}{'scheme':<34}{'us/phrase':>10}  {'model guide':<15}example")
+    for language, engine in TRANSLITERATORS.items():
+        phrases = SAMPLES.get(language, [])
+        if not phrases:
+            continue
+        timings = []
+        for phrase in phrases:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                transliterate(phrase, language)
+            timings.append((time.perf_counter() - started) / args.repeat)
+        asks_model = ('no' if replaces_model_guide(language) else 'yes, first' if engine.fallback_only
+                      else 'unless marked')
+        example = f"{phrases[-1]} -> {transliterate(phrases[-1], language)}"
+        print(f"{language:<20}{engine.scheme:<34}{statistics.median(timings) * 1e6:>10.1f}  {asks_model:<15}{example}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Simulate streamed tutor audio under network jitter and barge-in.
+
+    python benchmarks/sim_jitter_buffer.py --jitter-ms 40 --spike-rate 0.02
+
+Generates a reply as 100 ms chunks whose arrival times follow a jittered
+schedule (exponential jitter plus occasional latency spikes), plays it out in
+20 ms frames on a simulated clock and reports underruns, overruns and playout
+delay for a fixed minimal buffer versus the adaptive JitterBuffer. A second
+run interrupts mid-reply and checks how much stale audio is played after it.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_audio import LIVE_OUTPUT_AUDIO_CONFIG  # noqa: E402
+from playback import JitterBuffer  # noqa: E402
+
+CONFIG = LIVE_OUTPUT_AUDIO_CONFIG
+CHUNK_SECONDS = 0.1
+
+
+def arrivals(seconds: float, jitter_ms: float, spike_rate: float, seed: int):
+    """(arrival time, chunk) pairs for a reply produced in real time over a jittery network"""
+    rng = random.Random(seed)
+    chunk = bytes(int(CONFIG.bytes_per_second * CHUNK_SECONDS))
+    result = []
+    for i in range(int(seconds / CHUNK_SECONDS)):
+        delay = rng.expovariate(1000 / jitter_ms) if jitter_ms else 0.0
+        if rng.random() < spike_rate:
+            delay += rng.uniform(0.2, 0.5)
+        result.append((i * CHUNK_SECONDS + delay, chunk))
+    result.sort(key=lambda item: item[0])
+    return result
+
+
+def simulate(buffer: JitterBuffer, schedule, interrupt_at=None):
+    """Drive the buffer on a simulated clock; returns seconds of audio played after interrupt_at"""
+    pending = list(schedule)
+    now, played_after_interrupt = 0.0, 0.0
+    interrupted = False
+    end = schedule[-1][0] + 5
+    while now < end:
+        while pending and pending[0][0] <= now:
+            buffer.push(pending.pop(0)[1], now)
+        if not pending:
+            buffer.mark_end_of_turn()
+        if interrupt_at is not None and now >= interrupt_at:
+            buffer.flush()
+            pending.clear()
+            interrupt_at = None
+            interrupted = True
+        frame = buffer.pull(now)
+        if frame is not None and interrupted:
+            played_after_interrupt += frame.nbytes / CONFIG.bytes_per_second
+        now += buffer.frame_seconds
+    return played_after_interrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--jitter-ms', type=float, default=40)
+    parser.add_argument('--spike-rate', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    schedule = arrivals(args.seconds, args.jitter_ms, args.spike_rate, args.seed)
+    for name, buffer in [
+        ('fixed 20ms', JitterBuffer(CONFIG, min_delay=0.0, max_delay=0.0)),
+        ('adaptive', JitterBuffer(CONFIG)),
+    ]:
+        simulate(buffer, schedule)
+        print(f'{name:10s} {buffer.stats()}')
+
+    buffer = JitterBuffer(CONFIG)
+    stale = simulate(buffer, schedule, interrupt_at=args.seconds / 2)
+    print(f'barge-in at {args.seconds / 2:.0f}s: {stale * 1000:.0f} ms of stale audio played afterwards, '
+          f'{buffer.stats()["dropped_ms"]} ms dropped')
+
+
+if __name__ == '__main__':
+    main()
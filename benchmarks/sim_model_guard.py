@@ -0,0 +1,108 @@
+"""Simulate Gemma tail latency and an outage, with and without ModelGuard.
+
+    python benchmarks/sim_model_guard.py --seconds 6 --timeout-ms 300
+
+A fake backend answers in a log-normal time with an occasional slow tail; for
+the middle third of the run it has an incident (most calls hang or fail).
+Learners (threads) call it directly, as GeminiLanguageTeacher used to, and
+then through ModelGuard with a per-call deadline, hedging and the circuit
+breaker. Reports the latency a learner waits for an answer or a fallback.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resilience import CircuitBreaker, ModelGuard  # noqa: E402
+
+
+class FakeBackend:
+    def __init__(self, seconds: float, seed: int, median_ms: float, slow_rate: float):
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.seconds = seconds
+        self.median = median_ms / 1000
+        self.slow_rate = slow_rate
+
+    def __call__(self, timeout: float = None):
+        with self._lock:
+            r = self._rng.random()
+            latency = self.median * self._rng.lognormvariate(0, 0.3)
+        elapsed = time.monotonic() - self._start
+        in_incident = self.seconds / 3 <= elapsed < 2 * self.seconds / 3
+        if in_incident and r < 0.6:
+            latency = 3.0  # hung connection
+        elif in_incident and r < 0.8:
+            time.sleep(latency)
+            raise ConnectionError('503 from provider')
+        elif r < self.slow_rate:
+            latency *= 10  # slow tail
+        if timeout is not None:
+            # Transport timeout passed down by the guard
+            if latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError('transport timeout')
+        time.sleep(latency)
+        return 'ok'
+
+
+def run(label: str, args, call):
+    """Each learner calls, waits for an answer or fallback, thinks, and calls again"""
+    waits, fallbacks = [], 0
+    lock = threading.Lock()
+    end = time.monotonic() + args.seconds
+
+    def learner(_):
+        nonlocal fallbacks
+        while time.monotonic() < end:
+            started = time.monotonic()
+            try:
+                call()
+            except Exception:
+                with lock:
+                    fallbacks += 1
+            with lock:
+                waits.append(time.monotonic() - started)
+            time.sleep(args.think_ms / 1000)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(args.learners) as pool:
+        list(pool.map(learner, range(args.learners)))
+    elapsed = time.monotonic() - started
+    waits.sort()
+
+    def pct(q):
+        return waits[min(len(waits) - 1, int(q * len(waits)))] * 1000
+
+    print(f"{label:<10} calls {len(waits):5d}  p50 {pct(0.5):7.0f} ms  p95 {pct(0.95):7.0f} ms  p99 {pct(0.99):7.0f} ms  "
+          f"max {waits[-1] * 1000:7.0f} ms  fallbacks {fallbacks:4d}  wall {elapsed:5.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=6)
+    parser.add_argument('--think-ms', type=float, default=50)
+    parser.add_argument('--learners', type=int, default=8)
+    parser.add_argument('--median-ms', type=float, default=40)
+    parser.add_argument('--slow-rate', type=float, default=0.05)
+    parser.add_argument('--timeout-ms', type=float, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    backend = FakeBackend(args.seconds, args.seed, args.median_ms, args.slow_rate)
+    run('direct', args, backend)
+
+    backend = FakeBackend(args.seconds, args.seed, args.median_ms, args.slow_rate)
+    guard = ModelGuard(CircuitBreaker(failure_threshold=5, reset_timeout=0.5), max_workers=4 * args.learners)
+    run('guarded', args, lambda: guard.call(backend, args.timeout_ms / 1000))
+    print('guard stats:', guard.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Interactive latency under a background flood, FIFO vs ModelScheduler priorities.
+
+    python benchmarks/sim_model_scheduler.py --seconds 5 --background 0 8 32
+
+Quota is scaled down so the run takes seconds (`--rate` tokens/s instead of
+14.4k/day). Interactive learners make a call, think, and call again, while
+`--background` threads keep build calls queued. In FIFO mode every call has
+the same priority; in priority mode builds run as Priority.BUILD. Reports the
+interactive wait (queueing + call) and how much background work got through.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_scheduler import Deferred, ModelScheduler, Priority, TokenBucket  # noqa: E402
+from resilience import DeadlineExceeded  # noqa: E402
+
+
+def run(args, background: int, prioritised: bool):
+    scheduler = ModelScheduler(TokenBucket(args.rate, args.burst), max_concurrent=args.concurrency,
+                               interactive_token_reserve=args.burst / 3, interactive_slot_reserve=2)
+    build_priority = Priority.BUILD if prioritised else Priority.INTERACTIVE
+    end = time.monotonic() + args.seconds
+    waits, rejected, built = [], [0], [0]
+    lock = threading.Lock()
+
+    def call(priority, timeout):
+        with scheduler.slot(priority, timeout):
+            time.sleep(args.call_ms / 1000)
+
+    def learner(_):
+        while time.monotonic() < end:
+            started = time.monotonic()
+            try:
+                call(Priority.INTERACTIVE, args.timeout)
+                with lock:
+                    waits.append(time.monotonic() - started)
+            except DeadlineExceeded:
+                with lock:
+                    rejected[0] += 1
+            time.sleep(args.think_ms / 1000)
+
+    def builder(_):
+        while time.monotonic() < end:
+            try:
+                call(build_priority, 1.0)
+                with lock:
+                    built[0] += 1
+            except (Deferred, DeadlineExceeded):
+                pass
+
+    with ThreadPoolExecutor(args.learners + background) as pool:
+        for i in range(background):
+            pool.submit(builder, i)
+        list(pool.map(learner, range(args.learners)))
+
+    waits.sort()
+
+    def pct(q):
+        return waits[min(len(waits) - 1, int(q * len(waits)))] * 1000 if waits else float('nan')
+
+    mode = 'priority' if prioritised else 'fifo'
+    print(f"{mode:<9} background {background:3d}  interactive calls {len(waits):4d}  "
+          f"p50 {pct(0.5):6.0f} ms  p95 {pct(0.95):6.0f} ms  timed out {rejected[0]:3d}  background done {built[0]:4d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--background', type=int, nargs='+', default=[0, 8, 32])
+    parser.add_argument('--learners', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=40, help='tokens per second')
+    parser.add_argument('--burst', type=float, default=15)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--call-ms', type=float, default=50)
+    parser.add_argument('--think-ms', type=float, default=200)
+    parser.add_argument('--timeout', type=float, default=2.0, help='interactive admission deadline (s)')
+    args = parser.parse_args()
+
+    for background in args.background:
+        for prioritised in (False, True):
+            if background == 0 and not prioritised:
+                continue
+            run(args, background, prioritised)
+
+
+if __name__ == '__main__':
+    main()
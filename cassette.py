@@ -0,0 +1,223 @@
+"""Record/replay cassettes for Gemma, gTTS and Google speech recognition.
+
+Performance tests cannot call the real services, and hand-written stubs
+return neither the real response shapes nor the real sizes. With
+`CASSETTE_MODE=record`, every model call (`generate_content`), gTTS
+synthesis (`write_to_fp`) and `recognize_google` call passes through to the
+real service, and the request fingerprint, the response (text and usage
+metadata, MP3 bytes, transcript or the exception raised) and its latency are
+appended to CASSETTE_PATH. With `CASSETTE_MODE=replay` the same calls are
+served from the cassette without touching the network: repeated requests get
+their recordings back in recorded order, a request that was never recorded
+raises CassetteMiss, and `CASSETTE_LATENCY=1` sleeps for each call's
+recorded latency so timings stay production-like.
+
+Cassettes are gzip-compressed JSON lines (bytes as base64), appended one
+gzip member per call, so concurrent recorders never rewrite the file:
+
+    CASSETTE_MODE=record GEMINI_API_KEY=... python benchmarks/bench_prompt_profiles.py
+    CASSETTE_MODE=replay python benchmarks/bench_prompt_profiles.py
+    python cassette.py cassettes/default.cassette      # what a cassette holds
+"""
+import argparse
+import base64
+import collections
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+CASSETTE_MODES = ('off', 'record', 'replay')
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')
+CASSETTE_PATH = os.getenv('CASSETTE_PATH', os.path.join('cassettes', 'default.cassette'))
+CASSETTE_LATENCY = os.getenv('CASSETTE_LATENCY', '').lower() in ('1', 'true', 'yes')
+
+
+class CassetteMiss(LookupError):
+    """A replayed call that the cassette has no recording for"""
+
+
+def fingerprint(kind: str, request: Dict[str, object]) -> str:
+    canonical = json.dumps([kind, request], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _error_record(error: Exception) -> Dict[str, str]:
+    cls = type(error)
+    return {'type': f'{cls.__module__}.{cls.__qualname__}', 'message': str(error)}
+
+
+def _raise_recorded(error: Dict[str, str]):
+    """Re-raise a recorded exception as its original class when that can be imported"""
+    module, _, name = error['type'].rpartition('.')
+    try:
+        cls = importlib.import_module(module)
+        for part in name.split('.'):
+            cls = getattr(cls, part)
+        exception = cls(error['message'])
+    except Exception:
+        exception = RuntimeError(f"{error['type']}: {error['message']}")
+    raise exception
+
+
+class Cassette:
+    """Thread-safe record / replay of (kind, request) -> response pairs"""
+
+    def __init__(self, path: str, mode: str, emulate_latency: bool = False):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"mode must be 'record' or 'replay', got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.emulate_latency = emulate_latency
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, List[Dict[str, object]]] = collections.defaultdict(list)
+        self._played: Dict[str, int] = collections.Counter()
+        self.counters = collections.Counter()
+        if mode == 'replay':
+            for entry in read_entries(path):
+                self._recordings[entry['key']].append(entry)
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def call(self, kind: str, request: Dict[str, object], fn: Callable[[], object],
+             encode: Callable[[object], object] = lambda value: value,
+             decode: Callable[[object], object] = lambda value: value):
+        """fn() when recording (and store its outcome), the recorded outcome when replaying.
+        `encode` / `decode` convert the response to and from JSON-friendly values"""
+        key = fingerprint(kind, request)
+        if self.mode == 'replay':
+            return self._replay(kind, key, decode)
+        started = time.monotonic()
+        entry = {'kind': kind, 'key': key}
+        try:
+            value = fn()
+            entry['response'] = encode(value)
+            return value
+        except Exception as e:
+            entry['error'] = _error_record(e)
+            raise
+        finally:
+            entry['seconds'] = round(time.monotonic() - started, 4)
+            self._append(entry)
+
+    def _replay(self, kind: str, key: str, decode: Callable[[object], object]):
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                self.counters[f'{kind}_misses'] += 1
+                raise CassetteMiss(f"No {kind} recording for this request in {self.path}")
+            # Repeats get the recordings back in order, then the last one again
+            entry = recordings[min(self._played[key], len(recordings) - 1)]
+            self._played[key] += 1
+            self.counters[f'{kind}_replayed'] += 1
+        if self.emulate_latency:
+            time.sleep(entry['seconds'])
+        if 'error' in entry:
+            _raise_recorded(entry['error'])
+        return decode(entry['response'])
+
+    def _append(self, entry: Dict[str, object]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        data = gzip.compress(line.encode('utf-8'))
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            self.counters[f"{entry['kind']}_recorded"] += 1
+
+
+def read_entries(path: str) -> List[Dict[str, object]]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def cassette_from_env(mode: str = CASSETTE_MODE, path: str = CASSETTE_PATH,
+                      emulate_latency: bool = CASSETTE_LATENCY) -> Optional[Cassette]:
+    if mode not in CASSETTE_MODES:
+        raise ValueError(f"CASSETTE_MODE must be one of {CASSETTE_MODES}, got {mode!r}")
+    return None if mode == 'off' else Cassette(path, mode, emulate_latency)
+
+
+# One per process, like the shared cache; None (the default) leaves every call untouched
+cassette = cassette_from_env()
+
+
+def replaying() -> bool:
+    return cassette is not None and cassette.mode == 'replay'
+
+
+def encode_bytes(data: bytes) -> Dict[str, str]:
+    return {'b64': base64.b64encode(data).decode('ascii')}
+
+
+def decode_bytes(value: Dict[str, str]) -> bytes:
+    return base64.b64decode(value['b64'])
+
+
+def encode_model_response(response) -> Dict[str, object]:
+    usage = getattr(response, 'usage_metadata', None)
+    return {'text': response.text,
+            'usage': None if usage is None else {name: getattr(usage, name, 0) for name in
+                                                 ('prompt_token_count', 'candidates_token_count',
+                                                  'total_token_count')}}
+
+
+def decode_model_response(value: Dict[str, object]):
+    """Stand-in with the attributes the teacher reads: .text and .usage_metadata"""
+    usage = value.get('usage')
+    return SimpleNamespace(text=value['text'], usage_metadata=None if usage is None else SimpleNamespace(**usage))
+
+
+def generate_content(model, prompt: str, generation_config=None, **kwargs):
+    """model.generate_content, recorded or replayed; request options such as the timeout are not part
+    of the fingerprint"""
+    if cassette is None:
+        return model.generate_content(prompt, generation_config=generation_config, **kwargs)
+    request = {'model': getattr(model, 'model_name', ''), 'prompt': prompt, 'config': generation_config}
+    return cassette.call('model', request,
+                         lambda: model.generate_content(prompt, generation_config=generation_config, **kwargs),
+                         encode_model_response, decode_model_response)
+
+
+def synthesize(text: str, language_code: str, slow: bool, synthesize_now: Callable[[], bytes]) -> bytes:
+    """gTTS MP3 bytes, recorded or replayed"""
+    if cassette is None:
+        return synthesize_now()
+    return cassette.call('tts', {'text': text, 'lang': language_code, 'slow': slow}, synthesize_now,
+                         encode_bytes, decode_bytes)
+
+
+def recognize(frame_data: bytes, language_code: str, recognize_now: Callable[[], str]) -> str:
+    """recognize_google transcript, recorded or replayed; keyed by a hash of the audio sent"""
+    if cassette is None:
+        return recognize_now()
+    request = {'audio_sha256': hashlib.sha256(frame_data).hexdigest(), 'lang': language_code}
+    return cassette.call('stt', request, recognize_now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=CASSETTE_PATH)
+    args = parser.parse_args()
+
+    totals: Dict[str, Dict[str, float]] = {}
+    keys = collections.defaultdict(set)
+    for entry in read_entries(args.path):
+        row = totals.setdefault(entry['kind'], collections.Counter())
+        row['calls'] += 1
+        row['errors'] += 'error' in entry
+        row['seconds'] += entry['seconds']
+        row['bytes'] += len(json.dumps(entry.get('response', '')))
+        keys[entry['kind']].add(entry['key'])
+    print(f"{'kind':<8}{'calls':>8}{'distinct':>10}{'errors':>8}{'mean ms':>10}{'KB':>10}")
+    for kind, row in sorted(totals.items()):
+        print(f"{kind:<8}{row['calls']:>8}{len(keys[kind]):>10}{row['errors']:>8}"
+              f"{row['seconds'] / row['calls'] * 1000:>10.0f}{row['bytes'] / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Frequency-aware cache of pronunciation evaluations, keyed by normalized transcript.
+
+Beginners produce the same few transcripts for a phrase over and over
+("bonjour", "bon jour", "Bonjour!"), and each used to cost an
+`evaluate_pronunciation` call. Evaluations are keyed on the normalized
+transcript, the target text, the language and the prompt version, and kept
+in two tiers:
+
+- an in-process W-TinyLFU cache shared by every session of the worker: a
+  small LRU window for newcomers in front of a segmented-LRU main area, with
+  admission decided by a count-min sketch of recent key frequencies, so a
+  burst of one-off transcripts cannot flush the common-mistake head;
+- the cross-process `SharedCache` (with TTL) behind it.
+
+Hits and misses are counted per language.
+"""
+import collections
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, Optional
+
+from shared_cache import SharedCache
+
+
+def normalize_transcript(text: str) -> str:
+    """Case-, punctuation- and spacing-insensitive form of a transcript"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = ''.join(' ' if unicodedata.category(ch)[0] in 'PZ' else ch for ch in text)
+    return ' '.join(text.split())
+
+
+class CountMinSketch:
+    """Approximate key frequencies in fixed memory, halved periodically so old popularity fades"""
+
+    def __init__(self, width: int, depth: int = 4, sample_size: Optional[int] = None):
+        self.width = max(16, 1 << (width - 1).bit_length())
+        self.depth = depth
+        self._rows = [[0] * self.width for _ in range(depth)]
+        self._sample_size = sample_size or 10 * width
+        self._additions = 0
+
+    def _indexes(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8 * self.depth).digest()
+        mask = self.width - 1
+        return [int.from_bytes(digest[8 * i:8 * i + 8], 'little') & mask for i in range(self.depth)]
+
+    def estimate(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key)))
+
+    def add(self, key: str) -> None:
+        indexes = self._indexes(key)
+        current = min(row[i] for row, i in zip(self._rows, indexes))
+        # Conservative update: only raise the counters that hold the minimum
+        for row, i in zip(self._rows, indexes):
+            if row[i] == current:
+                row[i] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._additions //= 2
+            for row in self._rows:
+                for i in range(self.width):
+                    row[i] >>= 1
+
+
+class TinyLFUCache:
+    """W-TinyLFU: 1% LRU window + segmented LRU main area (20% probation / 80% protected)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(2, capacity)
+        self._window_capacity = max(1, self.capacity // 100)
+        main = self.capacity - self._window_capacity
+        self._protected_capacity = max(1, int(main * 0.8))
+        self._window = collections.OrderedDict()
+        self._probation = collections.OrderedDict()
+        self._protected = collections.OrderedDict()
+        self._sketch = CountMinSketch(self.capacity)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            self._sketch.add(key)
+            if key in self._window:
+                self._window.move_to_end(key)
+                return self._window[key]
+            if key in self._protected:
+                self._protected.move_to_end(key)
+                return self._protected[key]
+            if key in self._probation:
+                # Second hit: promote, demoting the protected segment's LRU if it is full
+                value = self._probation.pop(key)
+                self._protected[key] = value
+                if len(self._protected) > self._protected_capacity:
+                    demoted, demoted_value = self._protected.popitem(last=False)
+                    self._probation[demoted] = demoted_value
+                return value
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            for segment in (self._window, self._probation, self._protected):
+                if key in segment:
+                    segment[key] = value
+                    return
+            self._window[key] = value
+            if len(self._window) <= self._window_capacity:
+                return
+            candidate, candidate_value = self._window.popitem(last=False)
+            if len(self) < self.capacity:
+                self._probation[candidate] = candidate_value
+                return
+            # Main area is full: the window's loser only gets in if it is more
+            # popular than the victim it would replace
+            victim_segment = self._probation if self._probation else self._protected
+            victim = next(iter(victim_segment))
+            self.evictions += 1
+            if self._sketch.estimate(candidate) > self._sketch.estimate(victim):
+                del victim_segment[victim]
+                self._probation[candidate] = candidate_value
+
+
+class LRUCache:
+    """Plain LRU with the same interface, as a baseline for benchmarks"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+
+class EvaluationCache:
+    """Two-tier evaluation cache with per-language hit statistics"""
+
+    def __init__(self, capacity: int = 5000, shared: Optional[SharedCache] = None,
+                 ttl: float = 7 * 24 * 60 * 60):
+        self.local = TinyLFUCache(capacity)
+        self.shared = shared
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(transcript: str, target: str, language: str, prompt_version: str) -> str:
+        parts = [normalize_transcript(transcript), unicodedata.normalize('NFC', target.strip()),
+                 language, prompt_version]
+        return 'evaluation:' + hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def _count(self, language: str, outcome: str) -> None:
+        with self._lock:
+            counts = self.stats.setdefault(language, {'local_hits': 0, 'shared_hits': 0, 'misses': 0})
+            counts[outcome] += 1
+
+    def get_or_evaluate(self, transcript: str, target: str, language: str, prompt_version: str,
+                        compute: Callable[[], Dict[str, Any]],
+                        max_wait: Optional[float] = None) -> Dict[str, Any]:
+        key = self.make_key(transcript, target, language, prompt_version)
+        value = self.local.get(key)
+        if value is not None:
+            self._count(language, 'local_hits')
+            return value
+        if self.shared is None:
+            value = compute()
+            self._count(language, 'misses')
+        else:
+            value = self.shared.get(key)
+            if value is not None:
+                self._count(language, 'shared_hits')
+            else:
+                value = self.shared.get_or_compute(key, compute, ttl=self.ttl, max_wait=max_wait)
+                self._count(language, 'misses')
+        if value is not None:
+            self.local.put(key, value)
+        return value
+
+    def hit_rates(self) -> Dict[str, Dict[str, float]]:
+        """Per language: request count and the share answered without calling the model"""
+        with self._lock:
+            snapshot = {language: dict(counts) for language, counts in self.stats.items()}
+        rates = {}
+        for language, counts in sorted(snapshot.items()):
+            requests = sum(counts.values())
+            rates[language] = {
+                'requests': requests,
+                'hit_rate': round((counts['local_hits'] + counts['shared_hits']) / requests, 3) if requests else 0.0,
+                **counts,
+            }
+        return rates
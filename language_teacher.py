@@ -0,0 +1,473 @@
+"""Curriculum, language tables and the Gemma-backed teacher.
+
+Kept free of Streamlit so the app, the audio bundle builder and other
+headless tools share one copy of the curriculum and prompts.
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+from fuzzywuzzy import fuzz
+
+import cassette
+from evaluation_cache import EvaluationCache
+from model_scheduler import ModelScheduler, Priority
+from resilience import DeadlineExceeded, LatencyBudget, ModelGuard
+from shared_cache import SharedCache
+from tracing import tracer
+from transliteration import replaces_model_guide, transliterate
+
+# Curriculum structure
+CURRICULUM = {
+    'greetings': {
+        'title': 'Basic Greetings',
+        'description': 'Learn how to say hello, goodbye, and introduce yourself',
+        'phrases': [
+            'Hello', 
+            'Good morning', 
+            'Good afternoon', 
+            'Good evening',
+            'How are you?', 
+            'I am fine, thank you', 
+            'What is your name?',
+            'My name is...', 
+            'Nice to meet you', 
+            'Goodbye'
+        ],
+        'difficulty': 'beginner'
+    },
+    'numbers': {
+        'title': 'Numbers 1-20',
+        'description': 'Learn to count from 1 to 20',
+        'phrases': ['One', 
+                    'Two', 
+                    'Three', 
+                    'Four', 
+                    'Five', 
+                    'Six', 
+                    'Seven',
+                    'Eight', 
+                    'Nine', 
+                    'Ten', 
+                    'Eleven', 
+                    'Twelve', 
+                    'Thirteen',
+                    'Fourteen', 
+                    'Fifteen', 
+                    'Sixteen', 
+                    'Seventeen', 
+                    'Eighteen',
+                    'Nineteen', 
+                    'Twenty'],
+        'difficulty': 'beginner'
+    },
+    'daily_phrases': {
+        'title': 'Daily Phrases',
+        'description': 'Common phrases for everyday situations',
+        'phrases': [
+            'Please', 
+            'Thank you', 
+            'You are welcome', 
+            'Excuse me',
+            'I am sorry', 
+            'Can you help me?', 
+            'Where is the bathroom?',
+            'How much does this cost?', 
+            'I do not understand',
+            'Can you speak slower?'
+        ],
+        'difficulty': 'beginner'
+    },
+    'food_drink': {
+        'title': 'Food & Drink',
+        'description': 'Essential vocabulary for restaurants and cafes',
+        'phrases': [
+            'I would like...', 
+            'Water, please', 
+            'Coffee', 
+            'Tea',
+            'The menu, please', 
+            'The bill, please', 
+            'Is this vegetarian?',
+            'I am allergic to...', 
+            'Delicious!', 
+            'More, please'
+        ],
+        'difficulty': 'intermediate'
+    },
+    'directions': {
+        'title': 'Directions',
+        'description': 'Ask for and understand directions',
+        'phrases': [
+            'Where is...?', 
+            'Turn left', 
+            'Turn right', 
+            'Go straight',
+            'Near', 
+            'Far', 
+            'Next to', 
+            'Behind', 
+            'In front of',
+            'How do I get to...?'
+        ],
+        'difficulty': 'intermediate'
+    }
+}
+
+# Language options with full names and codes
+# used for google text to speech gTTS
+LANGUAGES = {
+    'Hebrew': 'iw', # 2025.07.17 fix language code
+    'Finnish': 'fi',
+    'French': 'fr',
+    'German': 'de',
+    'Spanish': 'es',
+    'Italian': 'it',
+    'Portuguese': 'pt',
+    'Japanese': 'ja',
+    'Korean': 'ko',
+    'Hindi': 'hi',
+    'Arabic': 'ar',
+    'Bahasa Melayu': 'ms',
+    'Chinese (Mandarin)': 'zh'
+}
+
+# 2025.07.24
+# https://github.com/Uberi/speech_recognition/blob/master/speech_recognition/__init__.py
+# https://github.com/Uberi/speech_recognition/blob/master/speech_recognition/recognizers/google.py#L225
+# speech to text requires another set of language tags
+# specifically RFC5646 language tags
+# for the full list, refer to https://stackoverflow.com/questions/14257598/what-are-language-codes-in-chromes-implementation-of-the-html5-speech-recogniti/14302134#14302134
+LANGUAGES_stt = {
+    'Hebrew': 'he-IL',
+    'Finnish': 'fi',
+    'French': 'fr-FR',
+    'German': 'de-DE',
+    'Spanish': 'es-ES',
+    'Italian': 'it-IT',
+    'Portuguese': 'pt-PT',
+    'Japanese': 'ja',
+    'Korean': 'ko',
+    'Hindi': 'hi-IN',
+    'Arabic': 'ar',
+    'Bahasa Melayu': 'ms-MY',
+    'Chinese (Mandarin)': 'zh-cn'
+}
+
+
+# How long shared-cache entries live
+TRANSLATION_CACHE_TTL = 30 * 24 * 60 * 60
+EVALUATION_CACHE_TTL = 7 * 24 * 60 * 60
+TTS_CACHE_TTL = 30 * 24 * 60 * 60
+
+# 'verbose': the original example-laden prompts asking for every field.
+# 'compact': a one-line instruction with the JSON shape spelled out, only the
+# fields the UI will show, and a capped output length. Gemma on the Gemini API
+# has no JSON mode / response_schema, so the shape is pinned in the prompt.
+PROMPT_PROFILES = ('verbose', 'compact')
+DEFAULT_PROMPT_PROFILE = os.getenv('PROMPT_PROFILE', 'compact')
+COMPACT_GENERATION_CONFIG = {'temperature': 0.2, 'max_output_tokens': 200}
+# Bump when an evaluation prompt changes, so feedback cached from the old one is not served
+EVALUATION_PROMPT_VERSION = 1
+
+
+def compact_translation_prompt(text: str, target_language: str, notes: bool, pronunciation: bool = True) -> str:
+    shape = ('{"translation":"..."' + (',"pronunciation":"..."' if pronunciation else '')
+             + (',"usage_notes":"..."' if notes else '') + '}')
+    fields = []
+    if pronunciation:
+        fields.append('pronunciation: phonetic spelling in English letters.')
+    if notes:
+        fields.append('usage_notes: one short sentence.')
+    lines = [f'Translate to {target_language}: "{text}"'] + ([' '.join(fields)] if fields else [])
+    return '\n'.join(lines + [f'Reply with only this JSON: {shape}'])
+
+
+def with_local_pronunciation(result: Dict[str, str], target_language: str) -> Dict[str, str]:
+    """Replace the model's pronunciation guide with the local romanization, where there is one"""
+    guide = transliterate(result.get('translation', ''), target_language, result.get('pronunciation', ''))
+    if guide is None:
+        return result
+    return {**result, 'pronunciation': guide}
+
+
+def compact_evaluation_prompt(user_text: str, target_text: str, language: str, tips: bool) -> str:
+    shape = '{"accuracy_score":0-100,"feedback":"..."' + (',"tips":["..."]' if tips else '') + '}'
+    return (f'A {language} learner tried to say "{target_text}" and said "{user_text}".\n'
+            f'feedback: one sentence.{" tips: at most two, short." if tips else ""}\n'
+            f'Reply with only this JSON: {shape}')
+
+
+def encouragement_for(score: int) -> str:
+    """Local stand-in for the model's encouragement line, which the compact profile does not ask for"""
+    if score >= 80:
+        return "Great pronunciation - keep it up!"
+    if score >= 60:
+        return "You're getting there - try it once more!"
+    return "You're making progress!"
+
+
+def fallback_translation(text: str, target_language: str) -> Dict[str, str]:
+    """Placeholder shown when no translation can be had"""
+    return {
+        "translation": f"[Translation of '{text}' to {target_language}]",
+        "pronunciation": "[pronunciation guide]",
+        "literal": text,
+        "usage_notes": "Translation service temporarily unavailable. Please try again."
+    }
+
+
+def fallback_evaluation(user_text: str, target_text: str) -> Dict[str, any]:
+    """Simple comparison fallback when the model cannot evaluate"""
+    similarity_ex = fuzz.ratio(user_text.lower(), target_text)
+    # similarity = len(set(user_text.lower().split()) & set(target_text.lower().split())) / max(
+    #     len(target_text.split()), 1) * 100
+    return {
+        "accuracy_score": int(similarity_ex),
+        "feedback": "Keep practicing!" if similarity_ex < 70 else "Good job!",
+        "tips": ["Try speaking more slowly", "Focus on each syllable"],
+        "encouragement": "You're making progress!"
+    }
+
+
+class TokenLedger:
+    """Input/output token counts per model call, from the API's usage metadata"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.last: Optional[Dict[str, object]] = None
+
+    def record(self, kind: str, profile: str, usage, seconds: float) -> None:
+        input_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        with self._lock:
+            totals = self.totals.setdefault((kind, profile), {
+                'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'seconds': 0.0})
+            totals['calls'] += 1
+            totals['input_tokens'] += input_tokens
+            totals['output_tokens'] += output_tokens
+            totals['seconds'] += seconds
+            self.last = {'kind': kind, 'profile': profile, 'input_tokens': input_tokens,
+                         'output_tokens': output_tokens, 'seconds': seconds}
+
+    def summary(self) -> List[Dict[str, object]]:
+        """One row per (call kind, prompt profile) with totals and per-call means"""
+        with self._lock:
+            items = sorted(self.totals.items())
+        return [{'kind': kind, 'profile': profile, **totals,
+                 'mean_input_tokens': totals['input_tokens'] / totals['calls'],
+                 'mean_output_tokens': totals['output_tokens'] / totals['calls'],
+                 'mean_seconds': totals['seconds'] / totals['calls']}
+                for (kind, profile), totals in items]
+
+
+class GeminiLanguageTeacher:
+    """Handle Gemini API interactions for language learning"""
+
+    MODEL_NAME = 'gemma-3-27b-it'  # 14.4k requests per day
+    CALL_TIMEOUT = 8.0  # seconds per model call, unless the rerun's budget has less left
+    BACKGROUND_QUEUE_TIMEOUT = 120.0  # how long prefetch / build calls may queue for quota
+
+    def __init__(self, api_key: str, cache: Optional[SharedCache] = None,
+                 error_reporter: Callable[[str], None] = print,
+                 guard: Optional[ModelGuard] = None, budget: Optional[LatencyBudget] = None,
+                 scheduler: Optional[ModelScheduler] = None, priority: Priority = Priority.INTERACTIVE,
+                 prompt_profile: str = DEFAULT_PROMPT_PROFILE, ledger: Optional[TokenLedger] = None,
+                 evaluation_cache: Optional[EvaluationCache] = None):
+        genai.configure(api_key=api_key)
+        # Use gemini-1.5-flash which is the current model
+        # self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model = genai.GenerativeModel(self.MODEL_NAME)
+        self.cache = cache
+        # st.error in the app; print (or a collector) in headless tools
+        self.error_reporter = error_reporter
+        # Shared per process (breaker state, latency history); the budget is per rerun
+        self.guard = guard
+        self.budget = budget
+        self.scheduler = scheduler
+        self.priority = priority
+        if prompt_profile not in PROMPT_PROFILES:
+            raise ValueError(f"prompt_profile must be one of {PROMPT_PROFILES}")
+        self.prompt_profile = prompt_profile
+        self.ledger = ledger if ledger is not None else TokenLedger()
+        # Keyed on the normalized transcript; replaces the plain shared-cache entry for evaluations
+        self.evaluation_cache = evaluation_cache
+
+    def _call_timeout(self) -> float:
+        if self.budget is None:
+            return self.CALL_TIMEOUT
+        return self.budget.call_timeout(self.CALL_TIMEOUT)
+
+    def _cached(self, kind: str, key_parts: tuple, compute, ttl: float):
+        """Serve from the shared cache when configured; failures are never cached"""
+        if self.cache is None:
+            return compute()
+        key = self.cache.make_key(kind, self.MODEL_NAME, *key_parts)
+        return self.cache.get_or_compute(key, compute, ttl=ttl, max_wait=self._call_timeout())
+
+    def _generate(self, prompt: str, kind: str):
+        """generate_content within the call deadline, hedged and circuit-broken when a guard is set"""
+        if self.scheduler is None:
+            return self._generate_now(prompt, kind)
+        queue_timeout = (self._call_timeout() if self.priority == Priority.INTERACTIVE
+                         else self.BACKGROUND_QUEUE_TIMEOUT)
+        queued = time.monotonic()
+        with self.scheduler.slot(self.priority, queue_timeout):
+            tracer.current().set_attribute('model.queue_s', round(time.monotonic() - queued, 3))
+            return self._generate_now(prompt, kind)
+
+    def _generate_now(self, prompt: str, kind: str):
+        generation_config = COMPACT_GENERATION_CONFIG if self.prompt_profile == 'compact' else None
+
+        def request(timeout: float):
+            # Straight to the model unless a cassette is recording or replaying
+            return cassette.generate_content(self.model, prompt, generation_config=generation_config,
+                                             request_options={'timeout': timeout})
+
+        timeout = self._call_timeout()
+        started = time.monotonic()
+        with tracer.span('model.generate', model=self.MODEL_NAME, kind=kind, profile=self.prompt_profile,
+                         prompt_chars=len(prompt), timeout_s=round(timeout, 2)) as span:
+            if self.guard is not None:
+                response = self.guard.call(request, timeout)
+            elif timeout <= 0:
+                raise DeadlineExceeded('latency budget already spent')
+            else:
+                response = request(timeout)
+            usage = getattr(response, 'usage_metadata', None)
+            span.set_attribute('input_tokens', getattr(usage, 'prompt_token_count', None))
+            span.set_attribute('output_tokens', getattr(usage, 'candidates_token_count', None))
+        self.ledger.record(kind, self.prompt_profile, usage, time.monotonic() - started)
+        return response
+
+    def translate(self, text: str, target_language: str, notes: bool = True) -> Dict[str, str]:
+        """Cached translation; raises instead of falling back (batch jobs, services)"""
+        # Languages with a local romanization do not ask the model for a guide
+        model_guide = not replaces_model_guide(target_language)
+        with tracer.span('translate', language=target_language, phrase=text, notes=notes) as span:
+            def compute():
+                span.set_attribute('cache.hit', False)
+                return self._request_translation(text, target_language, notes, model_guide)
+
+            span.set_attribute('cache.hit', True)  # until compute() runs
+            result = self._cached('translation', (text, target_language, self.prompt_profile, notes, model_guide),
+                                  compute, ttl=TRANSLATION_CACHE_TTL)
+            return with_local_pronunciation(result, target_language)
+
+    def get_translation(self, text: str, target_language: str, notes: bool = True) -> Dict[str, str]:
+        """Get translation and pronunciation guide (and usage notes, if they will be shown)"""
+        try:
+            return self.translate(text, target_language, notes)
+        except Exception as e:
+            self.error_reporter(f"Translation error: {e}")
+            return fallback_translation(text, target_language)
+
+    def _request_translation(self, text: str, target_language: str, notes: bool = True,
+                             pronunciation: bool = True) -> Dict[str, str]:
+        if self.prompt_profile == 'compact':
+            prompt = compact_translation_prompt(text, target_language, notes, pronunciation)
+        else:
+            prompt = f"""
+        Translate the following text to {target_language}:
+        "{text}"
+
+        Provide the response in JSON format with:
+        1. "translation": the translated text
+        2. "pronunciation": phonetic pronunciation guide
+        3. "literal": literal word-by-word translation
+        4. "usage_notes": brief usage notes or cultural context
+
+        Example format:
+        {{
+            "translation": "Hola",
+            "pronunciation": "OH-lah",
+            "literal": "Hello",
+            "usage_notes": "Informal greeting used throughout the day"
+        }}
+        """
+
+        response = self._generate(prompt, 'translation')
+        response_text = response.text.strip()
+
+        # Try to extract JSON from the response
+        if '```json' in response_text:
+            json_str = response_text.split('```json')[1].split('```')[0].strip()
+        elif '```' in response_text:
+            json_str = response_text.split('```')[1].split('```')[0].strip()
+        else:
+            # Try to find JSON pattern
+            json_match = re.search(r'\{[^{}]*\}', response_text, re.DOTALL)
+            if json_match:
+                json_str = json_match.group()
+            else:
+                json_str = response_text
+
+        result = json.loads(json_str)
+        result.setdefault('pronunciation', '')
+        return result
+
+    def evaluate(self, user_text: str, target_text: str, language: str, tips: bool = True) -> Dict[str, any]:
+        """Cached evaluation; raises instead of falling back (batch jobs, services)"""
+        with tracer.span('evaluate', language=language, phrase=target_text, tips=tips) as span:
+            def compute():
+                span.set_attribute('cache.hit', False)
+                return self._request_evaluation(user_text, target_text, language, tips)
+
+            span.set_attribute('cache.hit', True)  # until compute() runs
+            if self.evaluation_cache is not None:
+                version = (f'{self.MODEL_NAME}:{self.prompt_profile}:v{EVALUATION_PROMPT_VERSION}:'
+                           f'{"tips" if tips else "brief"}')
+                return self.evaluation_cache.get_or_evaluate(user_text, target_text, language, version, compute,
+                                                             max_wait=self._call_timeout())
+            return self._cached('evaluation', (user_text, target_text, language, self.prompt_profile, tips),
+                                compute, ttl=EVALUATION_CACHE_TTL)
+
+    def evaluate_pronunciation(self, user_text: str, target_text: str, language: str,
+                               tips: bool = True) -> Dict[str, any]:
+        """Evaluate user's pronunciation attempt (with tips, if they will be shown)"""
+        try:
+            return self.evaluate(user_text, target_text, language, tips)
+        except Exception:
+            return fallback_evaluation(user_text, target_text)
+
+    def _request_evaluation(self, user_text: str, target_text: str, language: str,
+                            tips: bool = True) -> Dict[str, any]:
+        if self.prompt_profile == 'compact':
+            prompt = compact_evaluation_prompt(user_text, target_text, language, tips)
+        else:
+            prompt = f"""
+        The user is learning {language} and tried to say: "{target_text}"
+        They said: "{user_text}"
+
+        Provide feedback in JSON format:
+        {{
+            "accuracy_score": 0-100,
+            "feedback": "constructive feedback",
+            "tips": ["tip1", "tip2"],
+            "encouragement": "positive message"
+        }}
+        """
+
+        response = self._generate(prompt, 'evaluation')
+        response_text = response.text.strip()
+
+        # Extract JSON
+        if '```json' in response_text:
+            json_str = response_text.split('```json')[1].split('```')[0].strip()
+        elif '```' in response_text:
+            json_str = response_text.split('```')[1].split('```')[0].strip()
+        else:
+            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+            if json_match:
+                json_str = json_match.group()
+            else:
+                json_str = response_text
+
+        result = json.loads(json_str)
+        result.setdefault('encouragement', encouragement_for(int(result.get('accuracy_score', 0))))
+        return result
@@ -0,0 +1,165 @@
+"""Whole-lesson listening drill streamed as one MP3.
+
+For every phrase of a CURRICULUM lesson the drill plays the English prompt,
+a short pause, the target-language audio and a longer pause to repeat it.
+MP3 frames are self-contained, so clips from the TTS cache (and the audio
+bundle) can be concatenated as they are, and the pauses are runs of silent
+frames cloned from the first clip's frame header. Segments are synthesized
+on a bounded thread pool a few phrases ahead of the one being sent, and are
+yielded strictly in order, so a browser can start playing as soon as the
+first phrase is ready.
+
+    python lesson_drill.py greetings French -o greetings-fr.mp3
+"""
+import argparse
+import functools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# (text, gTTS language code, slow) -> MP3 bytes
+Speaker = Callable[[str, str, bool], bytes]
+
+PROMPT_LANGUAGE_CODE = 'en'
+PROMPT_GAP = 0.8    # seconds between the English prompt and the answer
+REPEAT_GAP = 2.5    # seconds for the learner to repeat before the next phrase
+DRILL_WORKERS = 4
+
+# MPEG audio: bitrate (kbps) tables for layer III, and sample rates by version
+_BITRATES = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],   # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],        # MPEG-2 / 2.5
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _frame_header(mp3: bytes) -> Optional[Tuple[bytes, int, float]]:
+    """First layer III frame header: (header bytes, frame length, seconds per frame)"""
+    start = 0
+    if mp3[:3] == b'ID3' and len(mp3) >= 10:
+        size = mp3[6] << 21 | mp3[7] << 14 | mp3[8] << 7 | mp3[9]
+        start = 10 + size
+    for i in range(start, len(mp3) - 3):
+        if mp3[i] != 0xFF or mp3[i + 1] & 0xE0 != 0xE0:
+            continue
+        version = (mp3[i + 1] >> 3) & 0x3
+        layer = (mp3[i + 1] >> 1) & 0x3
+        bitrate_index = mp3[i + 2] >> 4
+        rate_index = (mp3[i + 2] >> 2) & 0x3
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        bitrate = _BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        samples = 1152 if version == 3 else 576
+        length = samples // 8 * bitrate // sample_rate
+        # No CRC, no padding: every silent frame has the same length
+        header = bytes((mp3[i], mp3[i + 1] | 0x01, mp3[i + 2] & 0xFD, mp3[i + 3]))
+        return header, length, samples / sample_rate
+    return None
+
+
+def silence(reference: bytes, seconds: float) -> bytes:
+    """MP3 silence in the same format as `reference`: frames with empty side info decode to zeros"""
+    found = _frame_header(reference)
+    if found is None or seconds <= 0:
+        return b''
+    header, length, frame_seconds = found
+    frame = header + bytes(length - len(header))
+    return frame * max(1, round(seconds / frame_seconds))
+
+
+def drill_clips(phrases: List[str], language_code: str, translate: Callable[[str], str], speak: Speaker,
+                slow: bool = True) -> List[Callable[[], bytes]]:
+    """One job per clip, in playback order: English prompt, then the translation spoken.
+    Translating inside the job keeps the first clip from waiting on the whole lesson"""
+    clips = []
+    for phrase in phrases:
+        clips.append(functools.partial(speak, phrase, PROMPT_LANGUAGE_CODE, False))
+        clips.append(lambda phrase=phrase: speak(translate(phrase), language_code, slow))
+    return clips
+
+
+def stream_clips(clips: List[Callable[[], bytes]], workers: int = DRILL_WORKERS,
+                 error_reporter: Callable[[str], None] = print) -> Iterator[Tuple[int, bytes]]:
+    """(position, clip) in order, running at most `workers` jobs ahead of the consumer"""
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            submitted = 0
+            for position in range(len(clips)):
+                while submitted < len(clips) and submitted < position + workers:
+                    pending[submitted] = pool.submit(clips[submitted])
+                    submitted += 1
+                try:
+                    clip = pending.pop(position).result()
+                except Exception as e:
+                    error_reporter(f"Drill clip {position}: {e}")
+                    continue
+                yield position, clip
+        finally:
+            # A consumer that stops early (closed connection) leaves nothing queued
+            for future in pending.values():
+                future.cancel()
+
+
+def stream_drill(clips: List[Callable[[], bytes]], workers: int = DRILL_WORKERS,
+                 error_reporter: Callable[[str], None] = print) -> Iterator[bytes]:
+    """The drill as a sequence of MP3 chunks; the first one is ready after a single prompt clip"""
+    gaps = None
+    for position, clip in stream_clips(clips, workers, error_reporter):
+        if not clip:
+            continue
+        if gaps is None:
+            gaps = (silence(clip, PROMPT_GAP), silence(clip, REPEAT_GAP))
+        # Prompts sit at even positions, answers at odd ones
+        yield clip + gaps[position % 2]
+
+
+def lesson_drill(lesson_key: str, language: str, teacher, speak: Speaker, workers: int = DRILL_WORKERS,
+                 error_reporter: Callable[[str], None] = print) -> Iterator[bytes]:
+    """Stream the drill for a CURRICULUM lesson in one of LANGUAGES"""
+    from language_teacher import CURRICULUM, LANGUAGES
+
+    def translate(phrase):
+        # Default notes, so the drill shares the app's cache entries
+        return teacher.translate(phrase, language)['translation']
+
+    clips = drill_clips(CURRICULUM[lesson_key]['phrases'], LANGUAGES[language], translate, speak)
+    return stream_drill(clips, workers, error_reporter)
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from language_teacher import CURRICULUM, LANGUAGES, TTS_CACHE_TTL, GeminiLanguageTeacher
+    from shared_cache import SharedCache, backend_from_env
+    from speech import speed_label, synthesize_speech
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('lesson', choices=sorted(CURRICULUM))
+    parser.add_argument('language', choices=sorted(LANGUAGES))
+    parser.add_argument('-o', '--output', required=True, help='MP3 file to write')
+    parser.add_argument('--workers', type=int, default=DRILL_WORKERS)
+    args = parser.parse_args()
+
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        sys.exit('GEMINI_API_KEY is required')
+    cache = SharedCache(backend_from_env())
+    teacher = GeminiLanguageTeacher(api_key, cache=cache)
+
+    def speak(text, code, slow):
+        key = cache.make_key('tts', text, code, speed_label(slow))
+        return cache.get_or_compute(key, lambda: synthesize_speech(text, code, slow=slow),
+                                    ttl=TTS_CACHE_TTL, codec='bytes')
+
+    with open(args.output, 'wb') as out:
+        for chunk in lesson_drill(args.lesson, args.language, teacher, speak, args.workers):
+            out.write(chunk)
+    print(f"{CURRICULUM[args.lesson]['title']} ({args.language}) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""PCM audio primitives for live voice conversations.
+
+Ported from the Colab Live API prototype (artifacts/LiveAPI_streaming_in_colab.py)
+without the Colab/IPython bindings, so they can be used from the app, the live
+tutor bridge and benchmarks alike.
+"""
+import asyncio
+import dataclasses
+import io
+import time
+import wave
+from collections.abc import AsyncIterator
+from typing import Optional
+
+import numpy as np
+
+
+@dataclasses.dataclass(frozen=True)
+class AudioConfig:
+    """Configuration of audio stream."""
+
+    sample_rate: int
+    format: str = 'S16_LE'  # only supported value
+    channels: int = 1
+
+    @property
+    def sample_size(self) -> int:
+        assert self.format == 'S16_LE'
+        return 2
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_size
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.frame_size
+
+    @property
+    def numpy_dtype(self) -> np.dtype:
+        assert self.format == 'S16_LE'
+        return np.dtype(np.int16).newbyteorder('<')
+
+    @property
+    def mime_type(self) -> str:
+        """MIME type the Live API expects for raw PCM in this config"""
+        return f'audio/pcm;rate={self.sample_rate}'
+
+
+# Live API input is 16 kHz mono, its spoken replies come back at 24 kHz
+STANDARD_AUDIO_CONFIG = AudioConfig(sample_rate=16000, channels=1)
+LIVE_OUTPUT_AUDIO_CONFIG = AudioConfig(sample_rate=24000, channels=1)
+
+
+@dataclasses.dataclass(frozen=True)
+class Audio:
+    """Unit of audio data with configuration.
+
+    `data` may be any bytes-like object, including a memoryview into an
+    `AudioBuffer`, so wrapping buffered audio does not copy it.
+    """
+
+    config: AudioConfig
+    data: bytes
+
+    @staticmethod
+    def silence(config: AudioConfig, length_seconds: float | int) -> 'Audio':
+        num_frames = int(length_seconds * config.sample_rate)
+        if num_frames < 0:
+            num_frames = 0
+        # bytes(n) is a single zero-filled allocation
+        return Audio(config=config, data=bytes(num_frames * config.frame_size))
+
+    @staticmethod
+    def concat(config: AudioConfig, parts) -> 'Audio':
+        """Join many Audio/bytes-like parts with one copy, instead of repeated `+`"""
+        buffer = AudioBuffer(config)
+        for part in parts:
+            if isinstance(part, Audio):
+                assert part.config == config
+                part = part.data
+            buffer.append(part)
+        return buffer.to_audio()
+
+    @property
+    def duration(self) -> float:
+        return len(self.data) / self.config.bytes_per_second
+
+    @staticmethod
+    def from_wav_bytes(wav_bytes: bytes) -> Optional['Audio']:
+        """Parse 16-bit PCM WAV (any rate / channel count); None for anything else"""
+        try:
+            with wave.open(io.BytesIO(wav_bytes), 'rb') as wav:
+                if wav.getsampwidth() != 2 or wav.getcomptype() != 'NONE':
+                    return None
+                config = AudioConfig(sample_rate=wav.getframerate(), channels=wav.getnchannels())
+                return Audio(config=config, data=wav.readframes(wav.getnframes()))
+        except (wave.Error, EOFError):
+            return None
+
+    def as_numpy(self):
+        return np.frombuffer(self.data, dtype=self.config.numpy_dtype)
+
+    def as_wav_bytes(self) -> bytes:
+        buf = io.BytesIO()
+        with wave.open(buf, 'w') as wav:
+            wav.setnchannels(self.config.channels)
+            wav.setframerate(self.config.sample_rate)
+            assert self.config.format == 'S16_LE'
+            wav.setsampwidth(2)  # 16bit
+            wav.writeframes(self.data)
+        return buf.getvalue()
+
+    async def astream_realtime(
+            self, expected_delta_sec: float = 0.1
+    ) -> AsyncIterator[bytes]:
+        """Yields audio data in chunks as if it was played realtime."""
+        data = memoryview(self.data).cast('B')
+        current_pos = 0
+        mono_start_ns = time.monotonic_ns()
+        while current_pos < len(data):
+            await asyncio.sleep(expected_delta_sec)
+            delta_ns = time.monotonic_ns() - mono_start_ns
+            expected_pos_frames = int(delta_ns * self.config.sample_rate / 1e9)
+            next_pos = expected_pos_frames * self.config.frame_size
+            if next_pos > current_pos:
+                # Zero-copy window; the view is clamped to the end of the data
+                yield data[current_pos:next_pos]
+                current_pos = next_pos
+
+    def __add__(self, other: 'Audio') -> 'Audio':
+        """Concatenate two clips. Accumulating many chunks this way is quadratic - use `concat` or `AudioBuffer`"""
+        assert self.config == other.config
+        return Audio.concat(self.config, (self, other))
+
+
+class AudioBuffer:
+    """Append-friendly PCM buffer with zero-copy windowed reads.
+
+    Backed by one bytearray whose capacity doubles when full, so `append` is
+    amortised O(1) and a long session copies each byte O(1) times instead of
+    once per chunk. Reads return memoryview/NumPy views into the buffer. Growth
+    moves data to a new bytearray rather than resizing in place, so views taken
+    earlier stay valid (they keep seeing the audio as it was when taken).
+    """
+
+    def __init__(self, config: AudioConfig, capacity_seconds: float = 1.0):
+        self.config = config
+        capacity = max(config.frame_size, int(capacity_seconds * config.sample_rate) * config.frame_size)
+        self._data = bytearray(capacity)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def duration(self) -> float:
+        return self._length / self.config.bytes_per_second
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def append(self, chunk) -> None:
+        n = len(chunk) if not isinstance(chunk, memoryview) else chunk.nbytes
+        end = self._length + n
+        if end > len(self._data):
+            grown = bytearray(max(end, 2 * len(self._data)))
+            grown[:self._length] = memoryview(self._data)[:self._length]
+            self._data = grown
+        self._data[self._length:end] = chunk
+        self._length = end
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Zero-copy byte range [start, end) of the buffered audio"""
+        end = self._length if end is None else min(end, self._length)
+        return memoryview(self._data)[start:end]
+
+    def window(self, start_seconds: float, end_seconds: Optional[float] = None) -> memoryview:
+        """Zero-copy, frame-aligned time window of the buffered audio"""
+        bytes_per_second = self.config.bytes_per_second
+        frame = self.config.frame_size
+        start = int(start_seconds * bytes_per_second) // frame * frame
+        end = None if end_seconds is None else int(end_seconds * bytes_per_second) // frame * frame
+        return self.view(start, end)
+
+    def as_numpy(self) -> np.ndarray:
+        """NumPy view (no copy) of all samples appended so far"""
+        return np.frombuffer(self._data, dtype=self.config.numpy_dtype,
+                             count=self._length // self.config.sample_size)
+
+    def to_audio(self) -> 'Audio':
+        """Audio wrapping a view of the current contents"""
+        return Audio(config=self.config, data=self.view())
+
+    def clear(self) -> None:
+        """Start over; the old storage is left to existing views"""
+        self._data = bytearray(len(self._data))
+        self._length = 0
+
+
+def rms_level(data: bytes, config: AudioConfig = STANDARD_AUDIO_CONFIG) -> float:
+    """Root-mean-square level of a PCM chunk on a 0..1 scale"""
+    samples = np.frombuffer(data, dtype=config.numpy_dtype)
+    if samples.size == 0:
+        return 0.0
+    as_float = samples.astype(np.float32)
+    return float(np.sqrt(np.dot(as_float, as_float) / samples.size)) / 32768.0
@@ -0,0 +1,176 @@
+"""Pool of pre-established, pre-configured Live API sessions.
+
+Opening a conversation costs a TLS handshake, the websocket upgrade and the
+`setup` round trip before the tutor can hear a word. The pool keeps a few
+sessions per (model, system prompt, language) already connected and set up,
+hands them to learners on demand and refills in the background.
+
+A session remembers its conversation, so it is never handed to a second
+learner: released sessions are closed and replaced with fresh warm ones.
+Idle sessions are health-checked and expired before the server's own session
+limits can bite.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from live_tutor import LiveTutorSession, Transport
+
+
+class PoolKey(NamedTuple):
+    model: str
+    system_prompt: str
+    language: str
+
+
+class LiveConnectionPool:
+    """Warm LiveTutorSessions keyed by model, system prompt and language"""
+
+    def __init__(self, transport_factory: Callable[[], Awaitable[Transport]],
+                 warm_per_key: int = 2, max_idle_total: int = 16, max_idle_seconds: float = 300.0,
+                 max_concurrent_opens: int = 4, check_interval: float = 15.0):
+        self._transport_factory = transport_factory
+        self.warm_per_key = warm_per_key
+        self.max_idle_total = max_idle_total
+        self.max_idle_seconds = max_idle_seconds
+        self.check_interval = check_interval
+        self._idle: Dict[PoolKey, List[Tuple[LiveTutorSession, float]]] = {}
+        self._demand: Dict[PoolKey, float] = {}  # key -> last time a learner asked for it
+        self._opening: Dict[PoolKey, int] = {}
+        self._open_slots = asyncio.Semaphore(max_concurrent_opens)
+        self._background: set = set()
+        self._janitor: Optional[asyncio.Task] = None
+        self.stats = {'warm_hits': 0, 'cold_misses': 0, 'expired': 0, 'unhealthy': 0,
+                      'open_failures': 0, 'last_warm_acquire_ms': None, 'last_cold_acquire_ms': None}
+
+    @property
+    def idle_count(self) -> int:
+        return sum(len(sessions) for sessions in self._idle.values())
+
+    async def start(self):
+        self._janitor = asyncio.create_task(self._janitor_loop(), name='live-pool-janitor')
+
+    async def __aenter__(self) -> 'LiveConnectionPool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def prewarm(self, key: PoolKey, count: Optional[int] = None):
+        """Mark a key as in demand and open sessions for it in the background"""
+        self._demand[key] = time.monotonic()
+        self._refill(key, self.warm_per_key if count is None else count)
+
+    async def acquire(self, key: PoolKey) -> LiveTutorSession:
+        """A ready session for `key`: warm from the pool if possible, otherwise opened now"""
+        started = time.monotonic()
+        self._demand[key] = started
+        session = self._pop_healthy(key)
+        if session is not None:
+            self.stats['warm_hits'] += 1
+            self.stats['last_warm_acquire_ms'] = (time.monotonic() - started) * 1000
+        else:
+            self.stats['cold_misses'] += 1
+            session = await self._open(key)
+            self.stats['last_cold_acquire_ms'] = (time.monotonic() - started) * 1000
+        self._refill(key, self.warm_per_key)
+        return session
+
+    async def release(self, session: LiveTutorSession):
+        """Done with a conversation: it carries that learner's context, so close it"""
+        await session.close()
+
+    def _pop_healthy(self, key: PoolKey) -> Optional[LiveTutorSession]:
+        sessions = self._idle.get(key, [])
+        now = time.monotonic()
+        while sessions:
+            session, idle_since = sessions.pop()
+            if session.is_alive and now - idle_since < self.max_idle_seconds:
+                return session
+            self.stats['unhealthy' if not session.is_alive else 'expired'] += 1
+            self._spawn(session.close())
+        return None
+
+    async def _open(self, key: PoolKey) -> LiveTutorSession:
+        async with self._open_slots:
+            transport = await self._transport_factory()
+            session = LiveTutorSession(transport, key.system_prompt, model=key.model)
+            try:
+                await session.start()
+            except BaseException:
+                await session.close()
+                raise
+            return session
+
+    def _refill(self, key: PoolKey, target: int):
+        missing = target - len(self._idle.get(key, [])) - self._opening.get(key, 0)
+        room = self.max_idle_total - self.idle_count - sum(self._opening.values())
+        for _ in range(max(0, min(missing, room))):
+            self._opening[key] = self._opening.get(key, 0) + 1
+            self._spawn(self._open_idle(key))
+
+    async def _open_idle(self, key: PoolKey):
+        try:
+            session = await self._open(key)
+        except Exception as e:
+            self.stats['open_failures'] += 1
+            print(f"live pool: could not pre-open a session for {key.language}: {e}")
+            return
+        finally:
+            self._opening[key] -= 1
+        self._idle.setdefault(key, []).append((session, time.monotonic()))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _janitor_loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            self.check()
+
+    def check(self):
+        """Drop dead or expired idle sessions, trim to the cap and refill keys still in demand"""
+        now = time.monotonic()
+        for key, sessions in self._idle.items():
+            keep = []
+            for session, idle_since in sessions:
+                if not session.is_alive:
+                    self.stats['unhealthy'] += 1
+                    self._spawn(session.close())
+                elif now - idle_since >= self.max_idle_seconds:
+                    self.stats['expired'] += 1
+                    self._spawn(session.close())
+                else:
+                    keep.append((session, idle_since))
+            sessions[:] = keep
+
+        # Over the cap: close the oldest idle sessions first
+        overflow = self.idle_count - self.max_idle_total
+        if overflow > 0:
+            oldest = sorted(((since, key) for key, sessions in self._idle.items() for _, since in sessions))
+            for since, key in oldest[:overflow]:
+                sessions = self._idle[key]
+                for i, (session, idle_since) in enumerate(sessions):
+                    if idle_since == since:
+                        self._spawn(sessions.pop(i)[0].close())
+                        break
+
+        for key, last_asked in list(self._demand.items()):
+            if now - last_asked < self.max_idle_seconds:
+                self._refill(key, self.warm_per_key)
+            else:
+                # Nobody has wanted this key for a while: stop keeping it warm
+                del self._demand[key]
+
+    async def close(self):
+        if self._janitor is not None:
+            self._janitor.cancel()
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        sessions = [session for sessions in self._idle.values() for session, _ in sessions]
+        self._idle.clear()
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
@@ -0,0 +1,658 @@
+"""Full-duplex voice tutoring over the Gemini Live API (BidiGenerateContent).
+
+`LiveTutorSession` is the transport-agnostic core, ported from the Colab
+prototype in artifacts/LiveAPI_streaming_in_colab.py: it sends learner audio
+and receives spoken replies through bounded queues, handles barge-in
+(`interrupted`) by dropping stale reply audio, and cancels cleanly.
+
+Streamlit cannot stream microphone audio itself, so the app embeds a small
+browser client that talks to a side service run with
+
+    python live_tutor.py --port 8765
+
+which bridges each browser websocket to its own Live API session, handed out
+warm (already connected and set up) by `live_pool.LiveConnectionPool`.
+
+PCM travels between browser and bridge as binary websocket frames. It is
+base64-encoded exactly once, into a reused buffer, at the Live API boundary
+(`AudioInputEncoder`), and reply audio is decoded exactly once on arrival.
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import collections
+import json
+import os
+import statistics
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Protocol, Union
+
+from live_audio import AudioBuffer, AudioConfig, LIVE_OUTPUT_AUDIO_CONFIG, STANDARD_AUDIO_CONFIG, rms_level
+from playback import JitterBuffer, PlaybackScheduler
+from resample import Resampler
+
+try:
+    from websockets.asyncio.client import connect as ws_connect
+    from websockets.asyncio.server import serve as ws_serve
+    from websockets.exceptions import ConnectionClosed
+
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+    class ConnectionClosed(Exception):
+        """Placeholder so except clauses work without websockets installed"""
+
+HOST = 'generativelanguage.googleapis.com'
+LIVE_API_PATH = '/ws/google.ai.generativelanguage.v1beta.GenerativeService.BidiGenerateContent'
+DEFAULT_LIVE_MODEL = 'models/gemini-live-2.5-flash-preview'
+
+Message = Union[str, bytes, bytearray, memoryview]
+
+
+##########################
+# Live API messages
+##########################
+def tutor_system_prompt(language: str, phrase: Optional[str] = None) -> str:
+    """System instruction for a spoken tutoring conversation"""
+    prompt = (f"You are a friendly, patient {language} tutor talking with a beginner. "
+              f"Speak slowly, keep replies short, and correct their {language} pronunciation gently.")
+    if phrase:
+        prompt += f' Today you are practising the phrase "{phrase}".'
+    return prompt
+
+
+def build_setup_message(model: str, system_prompt: str) -> dict:
+    """First message of every session: model, audio replies and the tutor persona"""
+    return {
+        'setup': {
+            'model': model,
+            'generationConfig': {'responseModalities': ['AUDIO']},
+            'systemInstruction': {'parts': [{'text': system_prompt}]},
+        },
+    }
+
+
+def encode_audio_input(data: bytes, config: AudioConfig) -> dict:
+    """Build JSPB message with user input audio bytes."""
+    return {
+        'realtimeInput': {
+            'mediaChunks': [{
+                'mimeType': config.mime_type,
+                'data': base64.b64encode(data).decode('UTF-8'),
+            }],
+        },
+    }
+
+
+class AudioInputEncoder:
+    """Builds `realtimeInput` JSON for PCM chunks inside one reused buffer.
+
+    The JSON around the base64 payload never changes for a given config, so it
+    is rendered once; each chunk costs a single base64 pass plus one copy into
+    the buffer, and the returned view is only valid until the next `encode`.
+    """
+
+    _MARKER = '__PCM_PAYLOAD__'
+
+    def __init__(self, config: AudioConfig, initial_chunk_bytes: int = 8192):
+        template = json.dumps(encode_audio_input(b'', config)).replace('""', f'"{self._MARKER}"')
+        prefix, suffix = template.split(self._MARKER)
+        self._prefix = prefix.encode('ascii')
+        self._suffix = suffix.encode('ascii')
+        self._allocate(initial_chunk_bytes)
+
+    def _allocate(self, chunk_bytes: int):
+        size = len(self._prefix) + 4 * (chunk_bytes // 3 + 1) + len(self._suffix)
+        self._buffer = bytearray(size)
+        self._buffer[:len(self._prefix)] = self._prefix
+        self._view = memoryview(self._buffer)
+
+    def encode(self, data) -> memoryview:
+        payload = binascii.b2a_base64(data, newline=False)
+        start = len(self._prefix)
+        end = start + len(payload) + len(self._suffix)
+        if end > len(self._buffer):
+            self._allocate(len(data) * 2)
+        self._buffer[start:start + len(payload)] = payload
+        self._buffer[start + len(payload):end] = self._suffix
+        return self._view[:end]
+
+
+def encode_text_input(text: str) -> dict:
+    """Builds JSPB message with user input text."""
+    return {
+        'clientContent': {
+            'turns': [{
+                'role': 'USER',
+                'parts': [{'text': text}],
+            }],
+            'turnComplete': True,
+        },
+    }
+
+
+def decode_audio_output(input: dict) -> bytes:
+    """Returns byte string with model output audio."""
+    result = []
+    content_input = input.get('serverContent', {})
+    content = content_input.get('modelTurn', {})
+    for part in content.get('parts', []):
+        data = part.get('inlineData', {}).get('data', '')
+        if data:
+            result.append(base64.b64decode(data))
+    return b''.join(result)
+
+
+def decode_text_output(input: dict) -> List[str]:
+    """Returns text parts of a model turn (transcripts, if the model sends any)"""
+    content = input.get('serverContent', {}).get('modelTurn', {})
+    return [part['text'] for part in content.get('parts', []) if part.get('text')]
+
+
+##########################
+# Transports
+##########################
+class Transport(Protocol):
+    """Anything that can carry Live API messages: a websocket, a test double, a relay"""
+
+    async def send(self, message: Message) -> None: ...
+
+    async def recv(self) -> Message: ...
+
+    async def close(self) -> None: ...
+
+
+class WebSocketTransport:
+    """Transport over a `websockets` client connection"""
+
+    def __init__(self, websocket):
+        self._websocket = websocket
+
+    @classmethod
+    async def connect(cls, api_key: str, host: str = HOST) -> 'WebSocketTransport':
+        if not WEBSOCKETS_AVAILABLE:
+            raise RuntimeError("Live conversations need the 'websockets' package")
+        websocket = await ws_connect(f'wss://{host}{LIVE_API_PATH}?key={api_key}', max_size=None)
+        return cls(websocket)
+
+    async def send(self, message: Message) -> None:
+        # Live API requests are JSON, so bytes-like messages still go out as text frames
+        if isinstance(message, str):
+            await self._websocket.send(message)
+        else:
+            await self._websocket.send(message, text=True)
+
+    async def recv(self) -> Message:
+        return await self._websocket.recv()
+
+    async def close(self) -> None:
+        await self._websocket.close()
+
+
+##########################
+# Session
+##########################
+AUDIO = 'audio'
+TEXT = 'text'
+INTERRUPTED = 'interrupted'
+TURN_COMPLETE = 'turn_complete'
+
+
+@dataclass
+class LiveEvent:
+    """Something the tutor said or did"""
+    kind: str
+    data: bytes = b''
+    text: str = ''
+
+
+class LatencyTracker:
+    """Speak-to-reply latency: last voiced input chunk sent to first reply audio received"""
+
+    def __init__(self, voice_threshold: float = 0.02, window: int = 500):
+        self.voice_threshold = voice_threshold
+        self.samples_ms = collections.deque(maxlen=window)
+        self._last_voiced_at: Optional[float] = None
+        self._awaiting_reply = False
+
+    def on_input(self, chunk: bytes, config: AudioConfig):
+        if rms_level(chunk, config) >= self.voice_threshold:
+            self._last_voiced_at = time.monotonic()
+            self._awaiting_reply = True
+
+    def on_reply_audio(self):
+        if self._awaiting_reply and self._last_voiced_at is not None:
+            self.samples_ms.append((time.monotonic() - self._last_voiced_at) * 1000)
+            self._awaiting_reply = False
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples_ms:
+            return {'count': 0}
+        ordered = sorted(self.samples_ms)
+        return {
+            'count': len(ordered),
+            'p50_ms': statistics.median(ordered),
+            'p95_ms': ordered[max(0, int(len(ordered) * 0.95) - 1)],
+            'last_ms': self.samples_ms[-1],
+        }
+
+
+class SetupError(Exception):
+    """Raised when the Live API does not acknowledge the session setup"""
+
+
+class LiveTutorSession:
+    """One full-duplex conversation with bounded send/receive queues"""
+
+    def __init__(self, transport: Transport, system_prompt: str, model: str = DEFAULT_LIVE_MODEL,
+                 input_config: AudioConfig = STANDARD_AUDIO_CONFIG,
+                 output_config: AudioConfig = LIVE_OUTPUT_AUDIO_CONFIG,
+                 send_queue_size: int = 32, recv_queue_size: int = 64, record_turns: bool = False):
+        self.input_config = input_config
+        self.output_config = output_config
+        self.latency = LatencyTracker()
+        self.dropped_input_chunks = 0
+        self.dropped_output_chunks = 0
+        self._transport = transport
+        self._system_prompt = system_prompt
+        self._model = model
+        self._audio_encoder = AudioInputEncoder(input_config)
+        self._send_queue: asyncio.Queue = asyncio.Queue(maxsize=send_queue_size)
+        self._events: asyncio.Queue = asyncio.Queue(maxsize=recv_queue_size)
+        # With record_turns, TURN_COMPLETE events carry the whole reply for later playback
+        self._turn_audio = AudioBuffer(output_config) if record_turns else None
+        self._tasks: List[asyncio.Task] = []
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    @property
+    def is_alive(self) -> bool:
+        """Started, not closed, and both loops still running"""
+        return bool(self._tasks) and not self._closed and not any(task.done() for task in self._tasks)
+
+    async def __aenter__(self) -> 'LiveTutorSession':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self, setup_timeout: float = 10.0):
+        """Send the setup message, wait for `setupComplete`, then start the send/receive loops"""
+        await self._transport.send(json.dumps(build_setup_message(self._model, self._system_prompt)))
+        try:
+            async with asyncio.timeout(setup_timeout):
+                while 'setupComplete' not in json.loads(await self._transport.recv()):
+                    pass
+        except TimeoutError:
+            raise SetupError(f"No setupComplete within {setup_timeout}s") from None
+        self._tasks = [
+            asyncio.create_task(self._send_loop(), name='live-send'),
+            asyncio.create_task(self._recv_loop(), name='live-recv'),
+        ]
+
+    # ---------- learner -> tutor ----------
+    async def send_audio(self, chunk):
+        """Queue microphone audio (any bytes-like object), waiting while the send queue is full"""
+        await self._send_queue.put((AUDIO, chunk))
+
+    def send_audio_nowait(self, chunk) -> bool:
+        """Queue microphone audio without waiting; a full queue sheds its oldest chunk"""
+        dropped = False
+        while self._send_queue.full():
+            self._send_queue.get_nowait()
+            self.dropped_input_chunks += 1
+            dropped = True
+        self._send_queue.put_nowait((AUDIO, chunk))
+        return not dropped
+
+    async def send_text(self, text: str):
+        await self._send_queue.put((TEXT, text))
+
+    async def _send_loop(self):
+        while True:
+            kind, payload = await self._send_queue.get()
+            if kind == AUDIO:
+                self.latency.on_input(payload, self.input_config)
+                # The encoder's view is reused, so it must be sent before the next chunk is encoded
+                await self._transport.send(self._audio_encoder.encode(payload))
+            else:
+                await self._transport.send(json.dumps(encode_text_input(payload)))
+
+    # ---------- tutor -> learner ----------
+    async def _recv_loop(self):
+        try:
+            while True:
+                msg = json.loads(await self._transport.recv())
+                content = msg.get('serverContent')
+                if not content:
+                    continue
+                if content.get('interrupted'):
+                    # Barge-in: whatever the tutor was still going to say is stale now
+                    self._drop_queued_audio()
+                    await self._events.put(LiveEvent(INTERRUPTED))
+                    continue
+                if audio := decode_audio_output(msg):
+                    self.latency.on_reply_audio()
+                    if self._turn_audio is not None:
+                        self._turn_audio.append(audio)
+                    await self._events.put(LiveEvent(AUDIO, data=audio))
+                for text in decode_text_output(msg):
+                    await self._events.put(LiveEvent(TEXT, text=text))
+                if content.get('turnComplete'):
+                    turn_audio = b''
+                    if self._turn_audio is not None:
+                        turn_audio = self._turn_audio.view()
+                        self._turn_audio.clear()
+                    await self._events.put(LiveEvent(TURN_COMPLETE, data=turn_audio))
+        except asyncio.CancelledError:
+            raise
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put_end_of_stream()
+
+    def _drop_queued_audio(self):
+        kept = []
+        while not self._events.empty():
+            event = self._events.get_nowait()
+            if event is not None and event.kind == AUDIO:
+                self.dropped_output_chunks += 1
+            else:
+                kept.append(event)
+        for event in kept:
+            self._events.put_nowait(event)
+
+    def _put_end_of_stream(self):
+        if self._events.full():
+            self._events.get_nowait()
+        self._events.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[LiveEvent]:
+        """Tutor events in arrival order until the session ends"""
+        while True:
+            event = await self._events.get()
+            if event is None:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield event
+
+    async def close(self):
+        """Cancel both loops and close the transport; safe to call more than once"""
+        if self._closed:
+            return
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._put_end_of_stream()
+        try:
+            await self._transport.close()
+        except Exception:
+            pass
+
+
+##########################
+# Browser bridge (side service)
+##########################
+async def _browser_to_session(browser, session: LiveTutorSession, browser_config: AudioConfig):
+    # Browsers capture at whatever rate their AudioContext runs at
+    resampler = None
+    if browser_config != session.input_config:
+        resampler = Resampler(browser_config, session.input_config)
+    try:
+        async for raw in browser:
+            if isinstance(raw, bytes):
+                # Binary frames are raw PCM from the microphone
+                session.send_audio_nowait(resampler.process(raw) if resampler else raw)
+                continue
+            msg = json.loads(raw)
+            if 'text' in msg:
+                await session.send_text(msg['text'])
+    finally:
+        # Browser went away: end the Live API session too
+        await session.close()
+
+
+async def _session_to_browser(session: LiveTutorSession, browser):
+    # Reply audio is paced out in real time (raw PCM binary frames) so the
+    # browser's own queue stays short and barge-in takes effect at once
+    player = PlaybackScheduler(JitterBuffer(session.output_config), browser.send)
+    player_task = asyncio.create_task(player.run(), name='live-playback')
+    try:
+        async for event in session.events():
+            if event.kind == AUDIO:
+                await player.put(event.data)
+            elif event.kind == INTERRUPTED:
+                player.interrupt()
+                await browser.send(json.dumps({'flush': True}))
+            elif event.kind == TURN_COMPLETE:
+                player.end_of_turn()
+                await browser.send(json.dumps({'turn_complete': True, 'latency': session.latency.summary(),
+                                               'playback': player.buffer.stats()}))
+            elif event.kind == TEXT:
+                await browser.send(json.dumps({'text': event.text}))
+    finally:
+        player_task.cancel()
+        # Live API session ended: hang up on the browser too
+        await browser.close()
+
+
+async def serve_bridge(api_key: str, host: str = 'localhost', port: int = 8765,
+                       model: str = DEFAULT_LIVE_MODEL, prewarm_languages: Optional[List[str]] = None):
+    """Bridge every browser websocket to its own (pre-warmed) Live API session"""
+    from live_pool import LiveConnectionPool, PoolKey
+
+    if not WEBSOCKETS_AVAILABLE:
+        raise RuntimeError("The live tutor bridge needs the 'websockets' package")
+
+    async def open_transport():
+        return await WebSocketTransport.connect(api_key)
+
+    async def handler(browser):
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(browser.request.path).query)
+        language = params.get('language', ['Hebrew'])[0]
+        phrase = params.get('phrase', [None])[0]
+        browser_config = AudioConfig(sample_rate=int(params.get('rate', [STANDARD_AUDIO_CONFIG.sample_rate])[0]))
+
+        # The system prompt only depends on the language so sessions can be
+        # pooled; the phrase is introduced as the learner's first turn
+        session = await pool.acquire(PoolKey(model, tutor_system_prompt(language), language))
+        try:
+            if phrase:
+                await session.send_text(f'I want to practise saying "{phrase}" in {language}.')
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(_browser_to_session(browser, session, browser_config))
+                tg.create_task(_session_to_browser(session, browser))
+        except* ConnectionClosed:
+            pass
+        finally:
+            await pool.release(session)
+            print(f"live session ended ({language}): latency {session.latency.summary()}, "
+                  f"dropped in/out {session.dropped_input_chunks}/{session.dropped_output_chunks}, "
+                  f"pool {pool.stats}")
+
+    async with LiveConnectionPool(open_transport) as pool:
+        for language in prewarm_languages or []:
+            pool.prewarm(PoolKey(model, tutor_system_prompt(language), language))
+        async with ws_serve(handler, host, port, max_size=None) as server:
+            print(f"live tutor bridge listening on ws://{host}:{port}")
+            await server.serve_forever()
+
+
+##########################
+# Browser client (embedded by the Streamlit app)
+##########################
+# AudioWorklet from the Colab prototype: forwards mic audio in ~50 ms batches
+# and plays queued reply audio.
+_audio_processor_worklet_js = """
+class PortProcessor extends AudioWorkletProcessor {
+  constructor() {
+    super();
+    this._queue = [];
+    this._out = [];
+    this._out_len = 0;
+    this.port.onmessage = (event) => {
+      if ('enqueue' in event.data) this.enqueueAudio(event.data.enqueue);
+      if ('clear' in event.data) this._queue = [];
+    };
+  }
+  encodeAudio(input) {
+    const channel = input[0] || new Float32Array(128);
+    const data = new ArrayBuffer(2 * channel.length);
+    const view = new DataView(data);
+    for (let i = 0; i < channel.length; i++) {
+      view.setInt16(2 * i, Math.max(-1, Math.min(1, channel[i])) * 32767, true);
+    }
+    return data;
+  }
+  enqueueAudio(input) {
+    const view = new DataView(input);
+    const floats = new Float32Array(input.byteLength / 2);
+    for (let i = 0; i < floats.length; i++) floats[i] = view.getInt16(2 * i, true) / 32768.0;
+    this._queue.push(floats);
+  }
+  dequeueIntoBuffer(output) {
+    let idx = 0;
+    while (idx < output.length && this._queue.length) {
+      const input = this._queue[0];
+      const n = Math.min(input.length, output.length - idx);
+      output.set(input.subarray(0, n), idx);
+      this._queue[0] = input.subarray(n);
+      if (this._queue[0].length === 0) this._queue.shift();
+      idx += n;
+    }
+  }
+  process(inputs, outputs) {
+    const data = this.encodeAudio(inputs[0]);
+    this._out.push(data);
+    this._out_len += data.byteLength;
+    if (this._out_len > (2 * sampleRate / 20)) {
+      const concat = new Uint8Array(this._out_len);
+      let idx = 0;
+      for (const a of this._out) { concat.set(new Uint8Array(a), idx); idx += a.byteLength; }
+      this._out = [];
+      this._out_len = 0;
+      this.port.postMessage({'audio_in': concat.buffer}, [concat.buffer]);
+    }
+    this.dequeueIntoBuffer(outputs[0][0]);
+    for (let i = 1; i < outputs[0].length; i++) outputs[0][i].set(outputs[0][0]);
+    return true;
+  }
+}
+registerProcessor('port-processor', PortProcessor);
+"""
+
+_browser_client_html = """
+<div style="font-family: sans-serif">
+  <button id="live-toggle" style="font-size: 18px; padding: 12px 24px; border-radius: 10px">
+    🎙️ Start conversation
+  </button>
+  <span id="live-status" role="status" style="margin-left: 12px"></span>
+</div>
+<script>
+const BRIDGE_URL = __BRIDGE_URL__;
+const SAMPLE_RATE = __SAMPLE_RATE__;
+const WORKLET_JS = __WORKLET_JS__;
+const button = document.getElementById('live-toggle');
+const status = document.getElementById('live-status');
+let running = null;
+
+async function start() {
+  const audioCtx = new AudioContext({sampleRate: SAMPLE_RATE});
+  await audioCtx.audioWorklet.addModule(URL.createObjectURL(
+    new Blob([WORKLET_JS], {type: 'text/javascript'})));
+  const media = await navigator.mediaDevices.getUserMedia({
+    audio: {sampleRate: SAMPLE_RATE, echoCancellation: true, channelCount: 1}});
+  const processor = new AudioWorkletNode(audioCtx, 'port-processor');
+  audioCtx.createMediaStreamSource(media).connect(processor);
+  processor.connect(audioCtx.destination);
+
+  const ws = new WebSocket(BRIDGE_URL);
+  ws.binaryType = 'arraybuffer';
+  processor.port.onmessage = (event) => {
+    // Raw PCM goes out as a binary frame, no base64
+    if ('audio_in' in event.data && ws.readyState === WebSocket.OPEN) {
+      ws.send(event.data.audio_in);
+    }
+  };
+  ws.onmessage = (event) => {
+    if (event.data instanceof ArrayBuffer) {
+      processor.port.postMessage({'enqueue': event.data}, [event.data]);
+      return;
+    }
+    const msg = JSON.parse(event.data);
+    if ('flush' in msg) {
+      processor.port.postMessage({'clear': ''});
+    } else if ('latency' in msg && msg.latency.count) {
+      status.textContent = `Reply latency ${Math.round(msg.latency.last_ms)} ms`;
+    }
+  };
+  ws.onclose = () => stop();
+  status.textContent = 'Listening...';
+  return {audioCtx, media, ws};
+}
+
+function stop() {
+  if (!running) return;
+  running.media.getTracks().forEach(t => t.stop());
+  running.audioCtx.close();
+  running.ws.close();
+  running = null;
+  button.textContent = '🎙️ Start conversation';
+  status.textContent = '';
+}
+
+button.onclick = async () => {
+  if (running) { stop(); return; }
+  try {
+    running = await start();
+    button.textContent = '⏹️ End conversation';
+  } catch (e) {
+    status.textContent = 'Could not start: ' + e;
+  }
+};
+</script>
+"""
+
+
+def browser_client_html(bridge_url: str, language: str, phrase: Optional[str] = None,
+                        config: AudioConfig = LIVE_OUTPUT_AUDIO_CONFIG) -> str:
+    """HTML/JS for `st.components.v1.html` that talks to the bridge with mic and speakers"""
+    query = {'language': language, 'rate': config.sample_rate}
+    if phrase:
+        query['phrase'] = phrase
+    url = f"{bridge_url}?{urllib.parse.urlencode(query)}"
+    return (_browser_client_html
+            .replace('__BRIDGE_URL__', json.dumps(url))
+            .replace('__SAMPLE_RATE__', json.dumps(config.sample_rate))
+            .replace('__WORKLET_JS__', json.dumps(_audio_processor_worklet_js)))
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Live tutor bridge between browsers and the Gemini Live API")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--model', default=DEFAULT_LIVE_MODEL)
+    parser.add_argument('--prewarm', nargs='*', default=['Hebrew'], metavar='LANGUAGE',
+                        help='languages to keep warm Live API sessions ready for')
+    args = parser.parse_args()
+
+    api_key = os.getenv('GEMINI_API_KEY', '')
+    if not api_key:
+        parser.error("GEMINI_API_KEY is not set")
+    asyncio.run(serve_bridge(api_key, args.host, args.port, args.model, args.prewarm))
+
+
+if __name__ == '__main__':
+    main()
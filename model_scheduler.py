@@ -0,0 +1,207 @@
+"""Priority admission for Gemma calls against the shared request quota.
+
+Interactive traffic (a learner waiting on a translation or feedback) and
+background traffic (prefetching, audio bundle builds) draw from the same
+`gemma-3-27b-it` quota (30 requests per minute, 14.4k per day) and the same
+concurrency. `ModelScheduler` admits calls in priority order through a token
+bucket refilled at the per-minute limit and a separate count of the day's
+requests, and keeps a reserve of tokens, daily requests and concurrency slots
+that only interactive calls may use, so queued background work can never
+push learners to the back of the line. Background calls that cannot be
+admitted in time, or arrive when too many are already queued, are rejected
+with `Deferred` for the caller to retry later or drop.
+
+Both limits are per process: with several worker processes (or an audio
+bundle build next to the app), give each one its share via `MODEL_RPM` and
+`MODEL_QUOTA_PER_DAY`.
+"""
+import contextlib
+import enum
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from resilience import DeadlineExceeded
+
+MINUTE_QUOTA = float(os.getenv('MODEL_RPM', '30'))
+DAILY_QUOTA = int(os.getenv('MODEL_QUOTA_PER_DAY', '14400'))
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0
+    PREFETCH = 1
+    BUILD = 2
+
+
+class Deferred(RuntimeError):
+    """Background call not admitted: the quota or the queue is under pressure"""
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity` (the allowed burst)"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    @classmethod
+    def per_minute(cls, requests: float = MINUTE_QUOTA) -> 'TokenBucket':
+        """A minute's worth of requests may go at once, then they are paced at the limit"""
+        return cls(requests / 60, requests)
+
+    @property
+    def tokens(self) -> float:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return self._tokens
+
+    def try_take(self, floor: float = 0.0) -> bool:
+        """Take one token if that leaves at least `floor` in the bucket"""
+        if self.tokens - 1 < floor:
+            return False
+        self._tokens -= 1
+        return True
+
+    def time_until(self, floor: float = 0.0) -> float:
+        """Seconds until `try_take(floor)` can succeed"""
+        return max(0.0, (1 + floor - self.tokens) / self.rate)
+
+
+class DailyQuota:
+    """Requests left today (UTC); the count starts over at midnight"""
+
+    def __init__(self, requests: int = DAILY_QUOTA, clock: Callable[[], float] = time.time):
+        self.requests = requests
+        self._clock = clock
+        self._day = self._today()
+        self._used = 0
+
+    def _today(self) -> int:
+        return int(self._clock() // 86400)
+
+    @property
+    def remaining(self) -> int:
+        today = self._today()
+        if today != self._day:
+            self._day, self._used = today, 0
+        return self.requests - self._used
+
+    def try_take(self, floor: float = 0.0) -> bool:
+        """Count one request if that leaves at least `floor` for the rest of the day"""
+        if self.remaining - 1 < floor:
+            return False
+        self._used += 1
+        return True
+
+
+class ModelScheduler:
+    """Admits model calls by priority under a token bucket and a concurrency cap.
+
+    Interactive calls may use every token and slot; lower priorities must
+    leave `interactive_token_reserve` tokens, `interactive_slot_reserve`
+    slots and `interactive_daily_reserve` of the day's requests untouched.
+    """
+
+    def __init__(self, bucket: TokenBucket, max_concurrent: int = 8,
+                 interactive_token_reserve: float = 10, interactive_slot_reserve: int = 2,
+                 max_background_queue: int = 64, daily: Optional[DailyQuota] = None,
+                 interactive_daily_reserve: Optional[float] = None):
+        self.bucket = bucket
+        self.daily = daily
+        # A tenth of the day's requests stays for learners by default
+        self.interactive_daily_reserve = (interactive_daily_reserve if interactive_daily_reserve is not None
+                                          else 0.1 * daily.requests if daily is not None else 0.0)
+        self.max_concurrent = max_concurrent
+        self.interactive_token_reserve = interactive_token_reserve
+        self.interactive_slot_reserve = interactive_slot_reserve
+        self.max_background_queue = max_background_queue
+        self._cond = threading.Condition()
+        self._waiting: List[tuple] = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self.stats: Dict[str, Dict[str, float]] = {
+            p.name.lower(): {'admitted': 0, 'deferred': 0, 'timed_out': 0, 'waited_s': 0.0}
+            for p in Priority}
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'ModelScheduler':
+        """Paced at MODEL_RPM, capped at MODEL_QUOTA_PER_DAY"""
+        return cls(TokenBucket.per_minute(), daily=DailyQuota(), **kwargs)
+
+    def _limits(self, priority: Priority):
+        if priority == Priority.INTERACTIVE:
+            return 0.0, self.max_concurrent, 0.0
+        return (self.interactive_token_reserve, self.max_concurrent - self.interactive_slot_reserve,
+                self.interactive_daily_reserve)
+
+    def _daily_exhausted(self, floor: float) -> bool:
+        return self.daily is not None and self.daily.remaining - 1 < floor
+
+    @property
+    def queued_background(self) -> int:
+        return sum(1 for priority, _ in self._waiting if priority != Priority.INTERACTIVE)
+
+    @contextlib.contextmanager
+    def slot(self, priority: Priority, timeout: float) -> Iterator[None]:
+        """Hold a call slot (and spend one token) for the duration of a model call.
+
+        Raises DeadlineExceeded if an interactive call is not admitted within
+        `timeout`, and Deferred for background calls.
+        """
+        priority = Priority(priority)
+        stats = self.stats[priority.name.lower()]
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            if priority != Priority.INTERACTIVE and self.queued_background >= self.max_background_queue:
+                stats['deferred'] += 1
+                raise Deferred('background queue is full')
+            entry = (int(priority), next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    floor, slots, daily_floor = self._limits(priority)
+                    if self._daily_exhausted(daily_floor):
+                        # Nothing frees up before midnight: fail now instead of at the deadline
+                        if priority == Priority.INTERACTIVE:
+                            stats['timed_out'] += 1
+                            raise DeadlineExceeded('daily model quota exhausted')
+                        stats['deferred'] += 1
+                        raise Deferred('daily quota is reserved for learners')
+                    if self._waiting[0] == entry and self._in_flight < slots and self.bucket.try_take(floor):
+                        if self.daily is not None:
+                            self.daily.try_take(daily_floor)
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        if priority == Priority.INTERACTIVE:
+                            stats['timed_out'] += 1
+                            raise DeadlineExceeded('model quota exhausted')
+                        stats['deferred'] += 1
+                        raise Deferred('no quota for background work right now')
+                    wait = remaining
+                    if self._waiting[0] == entry and self._in_flight < slots:
+                        # Only short of tokens: sleep until the bucket refills
+                        wait = min(wait, self.bucket.time_until(floor))
+                    self._cond.wait(max(wait, 0.001))
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                # Whoever is at the head now may be able to go
+                self._cond.notify_all()
+            self._in_flight += 1
+            stats['admitted'] += 1
+            stats['waited_s'] += time.monotonic() - started
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
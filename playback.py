@@ -0,0 +1,215 @@
+"""Adaptive jitter buffer and playback scheduler for streamed tutor audio.
+
+Reply audio from the Live API arrives in bursts with network jitter. Rather
+than pushing every chunk straight to the speaker queue, the live tutor bridge
+paces it out in real time from a `JitterBuffer` whose target depth follows
+the observed inter-arrival jitter. That keeps the client's own queue short, so
+barge-in (`interrupted`) silences the tutor immediately instead of after
+seconds of already-queued speech.
+
+`JitterBuffer` is clock-agnostic (every call takes `now`), so it can be driven
+by a simulated-jitter source; `PlaybackScheduler` runs it against real time.
+"""
+import asyncio
+import collections
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from live_audio import AudioConfig
+
+
+class JitterBuffer:
+    """FIFO of PCM chunks played out in fixed frames after an adaptive prebuffer"""
+
+    def __init__(self, config: AudioConfig, frame_seconds: float = 0.02,
+                 min_delay: float = 0.06, max_delay: float = 0.5, capacity_seconds: float = 30.0):
+        self.config = config
+        self.frame_bytes = int(frame_seconds * config.sample_rate) * config.frame_size
+        self.frame_seconds = self.frame_bytes / config.bytes_per_second
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.capacity_bytes = int(capacity_seconds * config.bytes_per_second)
+
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.jitter = 0.0  # smoothed inter-arrival lateness, RFC 3550 style
+        self.last_playout_delay = 0.0
+        self.max_playout_delay = 0.0
+
+        self._chunks = collections.deque()  # (memoryview, arrival time)
+        self._buffered = 0
+        self._playing = False
+        self._end_of_turn = False
+        self._underrun_boost = 0.0
+        self._last_arrival: Optional[float] = None
+        self._last_duration = 0.0
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._buffered
+
+    @property
+    def buffered_seconds(self) -> float:
+        return self._buffered / self.config.bytes_per_second
+
+    @property
+    def target_delay(self) -> float:
+        """Prebuffer depth: a floor, plus headroom for observed jitter and recent underruns"""
+        return min(self.max_delay, self.min_delay + 2 * self.jitter + self._underrun_boost)
+
+    def push(self, chunk, now: float) -> None:
+        view = memoryview(chunk).cast('B')
+        if not view.nbytes:
+            return
+        if self._last_arrival is not None:
+            # Only lateness hurts playout; the Live API routinely sends audio
+            # faster than real time, and early chunks just deepen the buffer
+            lateness = max(0.0, (now - self._last_arrival) - self._last_duration)
+            self.jitter += (lateness - self.jitter) / 16
+        self._last_arrival = now
+        self._last_duration = view.nbytes / self.config.bytes_per_second
+
+        self._chunks.append((view, now))
+        self._buffered += view.nbytes
+        self._end_of_turn = False
+        if self._buffered > self.capacity_bytes:
+            self.overruns += 1
+            self._drop(self._buffered - self.capacity_bytes)
+
+    def mark_end_of_turn(self) -> None:
+        """The tutor finished speaking: drain what is left without waiting for a full prebuffer"""
+        self._end_of_turn = True
+        # The silence until the next reply is turn-taking, not network jitter
+        self._last_arrival = None
+
+    def flush(self) -> None:
+        """Barge-in: drop every buffered byte right now"""
+        self._drop(self._buffered)
+        self._playing = False
+        self._last_arrival = None
+
+    def pull(self, now: float):
+        """Next frame due for playout, or None while prebuffering / idle"""
+        if not self._playing:
+            # Hold back one chunk plus the target, so a late next chunk still finds audio queued
+            target_bytes = int((self.target_delay + self._last_duration) * self.config.bytes_per_second)
+            if self._buffered >= max(target_bytes, self.frame_bytes) or (self._end_of_turn and self._buffered):
+                self._playing = True
+            else:
+                return None
+
+        if self._buffered < self.frame_bytes and not self._end_of_turn:
+            # Ran dry mid-turn: rebuffer deeper next time
+            self.underruns += 1
+            self._underrun_boost = min(self.max_delay, self._underrun_boost + self.frame_seconds)
+            self._playing = False
+            return None
+        if not self._buffered:
+            self._playing = False
+            return None
+
+        self.last_playout_delay = now - self._chunks[0][1]
+        self.max_playout_delay = max(self.max_playout_delay, self.last_playout_delay)
+        # Let extra headroom decay slowly while playback is healthy
+        self._underrun_boost *= 0.995
+        return self._take(min(self.frame_bytes, self._buffered))
+
+    def _take(self, n: int):
+        head, arrival = self._chunks[0]
+        if head.nbytes > n:
+            self._chunks[0] = (head[n:], arrival + n / self.config.bytes_per_second)
+            self._buffered -= n
+            return head[:n]
+        if head.nbytes == n:
+            self._chunks.popleft()
+            self._buffered -= n
+            return head
+        # Frame spans chunks: the only place audio is copied
+        frame = bytearray()
+        while len(frame) < n:
+            head, arrival = self._chunks[0]
+            needed = n - len(frame)
+            frame += head[:needed]
+            if head.nbytes > needed:
+                self._chunks[0] = (head[needed:], arrival + needed / self.config.bytes_per_second)
+            else:
+                self._chunks.popleft()
+        self._buffered -= n
+        return memoryview(frame)
+
+    def _drop(self, n: int) -> None:
+        self.dropped_bytes += n
+        while n > 0 and self._chunks:
+            head, arrival = self._chunks[0]
+            if head.nbytes > n:
+                self._chunks[0] = (head[n:], arrival)
+                self._buffered -= n
+                return
+            self._chunks.popleft()
+            self._buffered -= head.nbytes
+            n -= head.nbytes
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'underruns': self.underruns,
+            'overruns': self.overruns,
+            'dropped_ms': round(self.dropped_bytes / self.config.bytes_per_second * 1000),
+            'jitter_ms': round(self.jitter * 1000, 1),
+            'target_delay_ms': round(self.target_delay * 1000, 1),
+            'playout_delay_ms': round(self.last_playout_delay * 1000, 1),
+            'max_playout_delay_ms': round(self.max_playout_delay * 1000, 1),
+        }
+
+
+class PlaybackScheduler:
+    """Plays a JitterBuffer out to an async sink in real time"""
+
+    def __init__(self, buffer: JitterBuffer, sink: Callable[[memoryview], Awaitable[None]],
+                 clock: Callable[[], float] = time.monotonic):
+        self.buffer = buffer
+        self._sink = sink
+        self._clock = clock
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+
+    async def put(self, chunk) -> None:
+        """Buffer reply audio; waits (backpressure) rather than overrun the buffer"""
+        while self.buffer.buffered_bytes >= self.buffer.capacity_bytes:
+            self._space.clear()
+            await self._space.wait()
+        self.buffer.push(chunk, self._clock())
+        self._wakeup.set()
+
+    def end_of_turn(self) -> None:
+        self.buffer.mark_end_of_turn()
+        self._wakeup.set()
+
+    def interrupt(self) -> None:
+        self.buffer.flush()
+        self._space.set()
+
+    async def run(self) -> None:
+        frame_seconds = self.buffer.frame_seconds
+        next_tick = self._clock()
+        while True:
+            now = self._clock()
+            frame = self.buffer.pull(now)
+            if frame is not None:
+                self._space.set()
+                await self._sink(frame)
+            elif not self.buffer.buffered_bytes:
+                # Idle until the tutor speaks again
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                next_tick = self._clock()
+                continue
+
+            next_tick += frame_seconds
+            delay = next_tick - self._clock()
+            if delay < -frame_seconds:
+                # Fell behind (slow sink or event loop): resync instead of bursting
+                next_tick = self._clock()
+                delay = 0
+            await asyncio.sleep(max(0.0, delay))
@@ -0,0 +1,229 @@
+"""Durable practice progress backed by SQLite.
+
+Practice attempts are queued in memory and written behind by one background
+thread in batches, so recording an attempt from a Streamlit rerun never waits
+on disk. The database runs in WAL mode, so any number of server processes on
+the same host can read the lesson grid while a writer is committing.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+DEFAULT_DB_PATH = os.getenv('PROGRESS_DB_PATH', 'progress.db')
+
+# Score (0-100) a phrase needs before it counts towards lesson completion
+PASS_SCORE = 80
+
+# Called inside the writer's transaction with each committed batch of attempt rows
+# (user_id, language, lesson_key, phrase, kind, score, created_at)
+AttemptHook = Callable[[sqlite3.Connection, List[Tuple]], None]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    lesson_key TEXT NOT NULL,
+    phrase TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attempts_user_time ON attempts (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS phrase_progress (
+    user_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    lesson_key TEXT NOT NULL,
+    phrase TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    last_score INTEGER NOT NULL,
+    last_attempt_at REAL NOT NULL,
+    PRIMARY KEY (user_id, language, lesson_key, phrase)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS lesson_completion (
+    user_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    lesson_key TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (user_id, language, lesson_key)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_PROGRESS = """
+INSERT INTO phrase_progress
+    (user_id, language, lesson_key, phrase, attempts, best_score, last_score, last_attempt_at)
+VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (user_id, language, lesson_key, phrase) DO UPDATE SET
+    attempts = attempts + 1,
+    best_score = MAX(best_score, excluded.best_score),
+    last_score = excluded.last_score,
+    last_attempt_at = excluded.last_attempt_at
+"""
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open a SQLite connection tuned for many readers and one batching writer"""
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class ProgressStore:
+    """Per-user attempts, best scores and lesson completion with write-behind batching"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, batch_size: int = 500,
+                 flush_interval: float = 0.25, max_pending: int = 100_000,
+                 attempt_hooks: Sequence[AttemptHook] = ()):
+        self.db_path = db_path
+        self.attempt_hooks = list(attempt_hooks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        with connect(db_path) as conn:
+            conn.executescript(_SCHEMA)
+
+        self._pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._readers = threading.local()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name='progress-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ---------- writes (never block the caller) ----------
+    def record_attempt(self, user_id: str, language: str, lesson_key: str, phrase: str,
+                       kind: str, score: int) -> None:
+        """Queue one practice attempt; `kind` is 'speech' or 'typed'"""
+        self._enqueue(('attempt', (user_id, language, lesson_key, phrase, kind, int(score), time.time())))
+
+    def mark_completed(self, user_id: str, language: str, lesson_key: str) -> None:
+        """Queue a lesson completion"""
+        self._enqueue(('completed', (user_id, language, lesson_key, time.time())))
+
+    def _enqueue(self, item: Tuple) -> None:
+        try:
+            self._pending.put_nowait(item)
+        except queue.Full:
+            # Shedding a progress row is better than stalling a learner's rerun
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything queued so far has been committed"""
+        done = threading.Event()
+        self._pending.put(('flush', done))
+        done.wait(timeout)
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self.flush(timeout=5)
+        self._closed.set()
+        self._pending.put(('stop', None))
+        self._writer.join(timeout=5)
+
+    def _write_loop(self):
+        conn = connect(self.db_path)
+        try:
+            while True:
+                item = self._pending.get()
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+                # Gather whatever else arrives within the flush window
+                while len(batch) < self.batch_size and item[0] == 'attempt':
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._pending.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+                if not self._commit(conn, batch):
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch) -> bool:
+        """Write one batch in a single transaction; returns False once asked to stop"""
+        attempts = [args for kind, args in batch if kind == 'attempt']
+        completions = [args for kind, args in batch if kind == 'completed']
+        try:
+            with conn:
+                if attempts:
+                    conn.executemany(
+                        'INSERT INTO attempts (user_id, language, lesson_key, phrase, kind, score, created_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        attempts
+                    )
+                    conn.executemany(
+                        _UPSERT_PROGRESS,
+                        [(u, lang, lesson, phrase, score, score, ts)
+                         for u, lang, lesson, phrase, _, score, ts in attempts]
+                    )
+                    for hook in self.attempt_hooks:
+                        try:
+                            hook(conn, attempts)
+                        except sqlite3.Error:
+                            raise
+                        except Exception as e:
+                            # A bad hook must not take the writer thread (and every later write) with it
+                            print(f"Progress store attempt hook error: {e!r}")
+                if completions:
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO lesson_completion (user_id, language, lesson_key, completed_at) '
+                        'VALUES (?, ?, ?, ?)',
+                        completions
+                    )
+        except sqlite3.Error as e:
+            print(f"Progress store write error: {e}")
+
+        keep_running = True
+        for kind, args in batch:
+            if kind == 'flush':
+                args.set()
+            elif kind == 'stop':
+                keep_running = False
+        return keep_running
+
+    # ---------- reads (indexed, per-thread connections) ----------
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            conn = connect(self.db_path)
+            self._readers.conn = conn
+        return conn
+
+    def load_progress(self, user_id: str, language: str) -> Dict[str, Dict[str, int]]:
+        """Best score per phrase, grouped by lesson: {lesson_key: {phrase: best_score}}"""
+        rows = self._reader().execute(
+            'SELECT lesson_key, phrase, best_score FROM phrase_progress '
+            'WHERE user_id = ? AND language = ?',
+            (user_id, language)
+        ).fetchall()
+        progress: Dict[str, Dict[str, int]] = {}
+        for lesson_key, phrase, best_score in rows:
+            progress.setdefault(lesson_key, {})[phrase] = best_score
+        return progress
+
+    def load_completed(self, user_id: str, language: str) -> Set[str]:
+        rows = self._reader().execute(
+            'SELECT lesson_key FROM lesson_completion WHERE user_id = ? AND language = ?',
+            (user_id, language)
+        ).fetchall()
+        return {lesson_key for (lesson_key,) in rows}
+
+    def popular_lessons(self, limit: int = 10, since: float = 0.0) -> List[Tuple[str, str, int]]:
+        """(lesson_key, language, attempts) with the most attempts since `since`, busiest first"""
+        return self._reader().execute(
+            'SELECT lesson_key, language, COUNT(*) AS n FROM attempts WHERE created_at >= ? '
+            'GROUP BY lesson_key, language ORDER BY n DESC LIMIT ?',
+            (since, limit)
+        ).fetchall()
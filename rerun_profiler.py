@@ -0,0 +1,134 @@
+"""Opt-in sampling profiler for single Streamlit reruns.
+
+Off by default; when off the only cost is one flag check per rerun, so it
+stays in production builds. It is switched on for every rerun with
+`PROFILE_RERUNS=1`, or for one page load with `?profile=<PROFILE_TOKEN>`
+(the query parameter is ignored unless PROFILE_TOKEN is set).
+
+While on, a background thread samples the script thread's Python stack
+every PROFILE_INTERVAL_MS milliseconds. Each profiled rerun is written to
+PROFILE_DIR as collapsed stacks ("main;practice_interface;... 12"), the
+format read by flamegraph.pl, inferno and speedscope:
+
+    flamegraph.pl profiles/20260101-120000-greetings.folded > rerun.svg
+
+The page also lists the hottest functions in an admin expander, including
+for reruns that end in st.stop(). A rerun that ends in st.rerun() is
+replaced by the next one straight away, so its profile is only on disk.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROFILE_RERUNS = os.getenv('PROFILE_RERUNS', '').lower() in ('1', 'true', 'yes')
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '2'))
+
+
+def _frame_name(code) -> str:
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled on a timer from another"""
+
+    def __init__(self, thread_id: int, interval: float, outer_frame=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        # Frames already on the stack when sampling starts (the Streamlit runner) are left out
+        self._outer = set()
+        while outer_frame is not None:
+            self._outer.add(id(outer_frame))
+            outer_frame = outer_frame.f_back
+        self.stacks: Dict[Tuple[str, ...], int] = collections.Counter()
+        self.samples = 0
+        self.started = self.stopped = 0.0
+        self.path: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rerun-profiler', daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.perf_counter()
+
+    def _run(self) -> None:
+        names = {}  # code object -> display name, so each is formatted once
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and id(frame) not in self._outer:
+                code = frame.f_code
+                name = names.get(code)
+                if name is None:
+                    name = names[code] = _frame_name(code)
+                stack.append(name)
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+                self.samples += 1
+
+    @property
+    def seconds(self) -> float:
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def folded(self) -> str:
+        """Collapsed-stack text for flame graph tools"""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def hot_functions(self, limit: int = 15) -> List[Dict[str, object]]:
+        """Functions by samples where they were running (self) and on the stack at all (total)"""
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+        samples = max(1, self.samples)
+        return [{'function': name, 'self_pct': round(100 * own[name] / samples, 1),
+                 'total_pct': round(100 * total[name] / samples, 1), 'self_samples': own[name]}
+                for name, _ in sorted(total.items(), key=lambda item: (-own[item[0]], -item[1]))[:limit]]
+
+    def write(self, directory: str, label: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        safe_label = ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in label)[:40]
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.folded())
+        return path
+
+
+def profiling_requested(query_token: Optional[str]) -> bool:
+    if PROFILE_RERUNS:
+        return True
+    return bool(PROFILE_TOKEN) and query_token == PROFILE_TOKEN
+
+
+@contextmanager
+def profile_rerun(enabled: bool, label: str = 'rerun', directory: str = PROFILE_DIR,
+                  interval_ms: float = PROFILE_INTERVAL_MS) -> Iterator[Optional[StackSampler]]:
+    """Sample the calling thread for the duration of the block; yields None when not enabled"""
+    if not enabled:
+        yield None
+        return
+    # Skip this generator's own frames and everything that called the block
+    sampler = StackSampler(threading.get_ident(), interval_ms / 1000, sys._getframe(2))
+    sampler.start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+        try:
+            sampler.path = sampler.write(directory, label)
+        except OSError as e:
+            print(f"Could not write profile: {e}")
@@ -0,0 +1,217 @@
+"""Deadlines, hedged requests and circuit breaking for model calls.
+
+A Streamlit rerun blocks on every Gemma call it makes, so each call gets a
+deadline carved out of a per-rerun `LatencyBudget` instead of waiting for the
+provider indefinitely. `ModelGuard` runs calls on a small thread pool so it can
+stop waiting at the deadline, fires one duplicate (hedged) request when the
+first is slower than the recent p95, and trips a `CircuitBreaker` after
+repeated failures so later calls fail fast to the caller's cached or local
+fallback while the backend is unhealthy.
+"""
+import collections
+import concurrent.futures
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not finish within its deadline"""
+
+
+class CircuitOpenError(RuntimeError):
+    """The backend is marked unhealthy; the call was not attempted"""
+
+
+class LatencyBudget:
+    """Wall-clock budget for everything one rerun waits on"""
+
+    def __init__(self, total_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.total_seconds = total_seconds
+        self._clock = clock
+        self._deadline = clock() + total_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self._deadline - self._clock())
+
+    def call_timeout(self, cap: float) -> float:
+        """Deadline for the next call: its own cap, cut short by what is left of the budget"""
+        return min(cap, self.remaining())
+
+
+class LatencyWindow:
+    """Rolling window of recent successful call latencies"""
+
+    def __init__(self, size: int = 200):
+        self._samples = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures -> half-open after `reset_timeout`"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {'successes': 0, 'failures': 0, 'short_circuits': 0, 'opened': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """May a call go to the backend now? Half-open lets a single probe through"""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.stats['short_circuits'] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.stats['successes'] += 1
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.stats['failures'] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats['opened'] += 1
+                    print(f"circuit breaker: backend unhealthy after {self._failures} failures, "
+                          f"failing fast for {self.reset_timeout:g}s")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+
+class ModelGuard:
+    """Runs backend calls with a deadline, an optional hedge and a circuit breaker.
+
+    `fn` receives the time it has left, so it can pass its own transport
+    timeout down (abandoned attempts then end on their own instead of holding
+    a worker thread forever).
+    """
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None, max_workers: int = 16,
+                 hedge_min_samples: int = 20, hedge_quantile: float = 0.95, max_hedge_ratio: float = 0.1):
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyWindow()
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_quantile = hedge_quantile
+        self.max_hedge_ratio = max_hedge_ratio
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                           thread_name_prefix='model-call')
+        self._lock = threading.Lock()
+        self.counters = {'calls': 0, 'timeouts': 0, 'errors': 0, 'hedged': 0, 'hedge_wins': 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _hedge_delay(self) -> Optional[float]:
+        """When to fire a duplicate request, or None if hedging is off right now"""
+        if len(self.latencies) < self.hedge_min_samples:
+            return None
+        with self._lock:
+            # Hedges cost quota: cap them to a fraction of all calls
+            if self.counters['hedged'] >= self.max_hedge_ratio * max(1, self.counters['calls']):
+                return None
+        return self.latencies.percentile(self.hedge_quantile)
+
+    def call(self, fn: Callable[[float], T], timeout: float, hedge: bool = True) -> T:
+        if timeout <= 0:
+            self._count('timeouts')
+            raise DeadlineExceeded('latency budget already spent')
+        if not self.breaker.allow():
+            raise CircuitOpenError('model backend is unhealthy')
+        self._count('calls')
+
+        started = time.monotonic()
+        deadline = started + timeout
+        attempts = {self._pool.submit(fn, timeout): 'primary'}
+        hedge_at = self._hedge_delay() if hedge else None
+        last_error: Optional[BaseException] = None
+
+        while attempts:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_until = deadline
+            if hedge_at is not None and started + hedge_at < deadline:
+                wait_until = min(wait_until, started + hedge_at)
+            done, _ = concurrent.futures.wait(attempts, timeout=max(0.0, wait_until - now),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                which = attempts.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                self.latencies.add(time.monotonic() - started)
+                if which == 'hedge':
+                    self._count('hedge_wins')
+                self.breaker.record_success()
+                return result
+            if not done and hedge_at is not None and time.monotonic() >= started + hedge_at:
+                # The primary is slower than p95: race a duplicate against it
+                hedge_at = None
+                self._count('hedged')
+                attempts[self._pool.submit(fn, deadline - time.monotonic())] = 'hedge'
+
+        self.breaker.record_failure()
+        if last_error is not None and not attempts:
+            self._count('errors')
+            raise last_error
+        self._count('timeouts')
+        raise DeadlineExceeded(f'no response within {timeout:.1f}s')
+
+    def stats(self) -> Dict[str, object]:
+        """Breaker state, counters and latency percentiles, for dashboards and logs"""
+        p50 = self.latencies.percentile(0.5)
+        p95 = self.latencies.percentile(0.95)
+        return {
+            'state': self.breaker.state,
+            **self.breaker.stats,
+            **self.counters,
+            'p50_ms': None if p50 is None else round(p50 * 1000),
+            'p95_ms': None if p95 is None else round(p95 * 1000),
+        }
@@ -0,0 +1,149 @@
+"""SM-2 spaced-repetition scheduler for the Review mode.
+
+Every scored attempt (pronunciation evaluation or typed answer) reschedules the
+phrase for that learner. The app registers `apply_attempts` as a ProgressStore
+attempt hook, so the SM-2 update is committed by the progress writer thread in
+the same transaction as the attempt, never on the rerun thread. Cards live in an SQLite table with a (user, language,
+due_at) index, so picking the next due card is a single B-tree seek - O(log n)
+however many phrases a learner has reviewed.
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from progress_store import DEFAULT_DB_PATH, connect
+
+DAY_SECONDS = 24 * 60 * 60
+# Failed cards come back within the same session
+RELEARN_SECONDS = 10 * 60
+MIN_EASE = 1.3
+DEFAULT_EASE = 2.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS review_cards (
+    user_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    lesson_key TEXT NOT NULL,
+    phrase TEXT NOT NULL,
+    repetitions INTEGER NOT NULL,
+    interval_seconds REAL NOT NULL,
+    ease REAL NOT NULL,
+    due_at REAL NOT NULL,
+    last_score INTEGER NOT NULL,
+    PRIMARY KEY (user_id, language, lesson_key, phrase)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_review_due ON review_cards (user_id, language, due_at);
+CREATE INDEX IF NOT EXISTS idx_review_due_any_language ON review_cards (user_id, due_at);
+"""
+
+
+@dataclass
+class ReviewCard:
+    """Scheduling state of one (learner, language, lesson, phrase)"""
+    user_id: str
+    language: str
+    lesson_key: str
+    phrase: str
+    repetitions: int = 0
+    interval_seconds: float = 0.0
+    ease: float = DEFAULT_EASE
+    due_at: float = 0.0
+    last_score: int = 0
+
+    @property
+    def is_due(self) -> bool:
+        return self.due_at <= time.time()
+
+
+def score_to_quality(score: int) -> int:
+    """Map a 0-100 score onto SM-2's 0-5 recall quality"""
+    return max(0, min(5, round(score / 20)))
+
+
+def schedule(card: ReviewCard, score: int, now: float) -> ReviewCard:
+    """Apply one SM-2 review to `card` in place and return it"""
+    quality = score_to_quality(score)
+    if quality >= 3:
+        if card.repetitions == 0:
+            card.interval_seconds = DAY_SECONDS
+        elif card.repetitions == 1:
+            card.interval_seconds = 6 * DAY_SECONDS
+        else:
+            card.interval_seconds = card.interval_seconds * card.ease
+        card.repetitions += 1
+    else:
+        card.repetitions = 0
+        card.interval_seconds = RELEARN_SECONDS
+
+    card.ease = max(MIN_EASE, card.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    card.due_at = now + card.interval_seconds
+    card.last_score = int(score)
+    return card
+
+
+class ReviewScheduler:
+    """Persistent per-learner due queue"""
+
+    _COLUMNS = 'user_id, language, lesson_key, phrase, repetitions, interval_seconds, ease, due_at, last_score'
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def review(self, user_id: str, language: str, lesson_key: str, phrase: str,
+               score: int, now: Optional[float] = None) -> ReviewCard:
+        """Grade an attempt and reschedule the phrase, committing synchronously"""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            return self._review(self._conn, user_id, language, lesson_key, phrase, score, now)
+
+    def apply_attempts(self, conn: sqlite3.Connection, attempts: List[Tuple]) -> None:
+        """ProgressStore attempt hook: reschedule each attempt's phrase on the store's writer connection"""
+        for user_id, language, lesson_key, phrase, _, score, created_at in attempts:
+            self._review(conn, user_id, language, lesson_key, phrase, score, created_at)
+
+    def _review(self, conn: sqlite3.Connection, user_id: str, language: str, lesson_key: str,
+                phrase: str, score: int, now: float) -> ReviewCard:
+        row = conn.execute(
+            f'SELECT {self._COLUMNS} FROM review_cards '
+            'WHERE user_id = ? AND language = ? AND lesson_key = ? AND phrase = ?',
+            (user_id, language, lesson_key, phrase)
+        ).fetchone()
+        card = ReviewCard(*row) if row else ReviewCard(user_id, language, lesson_key, phrase)
+        schedule(card, score, now)
+        conn.execute(
+            f'INSERT OR REPLACE INTO review_cards ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (card.user_id, card.language, card.lesson_key, card.phrase, card.repetitions,
+             card.interval_seconds, card.ease, card.due_at, card.last_score)
+        )
+        return card
+
+    def next_card(self, user_id: str, language: Optional[str] = None,
+                  exclude: Iterable[Tuple[str, str, str]] = ()) -> Optional[ReviewCard]:
+        """Earliest-due card for the learner (optionally in one language), skipping the (language,
+        lesson_key, phrase) ids in `exclude`; None without history or when every card is excluded"""
+        query = f'SELECT {self._COLUMNS} FROM review_cards WHERE user_id = ?'
+        params = [user_id]
+        if language is not None:
+            query += ' AND language = ?'
+            params.append(language)
+        for card_id in exclude:
+            query += ' AND NOT (language = ? AND lesson_key = ? AND phrase = ?)'
+            params.extend(card_id)
+        with self._lock:
+            row = self._conn.execute(query + ' ORDER BY due_at LIMIT 1', params).fetchone()
+        return ReviewCard(*row) if row else None
+
+    def due_count(self, user_id: str, language: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            (count,) = self._conn.execute(
+                'SELECT COUNT(*) FROM review_cards WHERE user_id = ? AND language = ? AND due_at <= ?',
+                (user_id, language, now)
+            ).fetchone()
+        return count
@@ -0,0 +1,241 @@
+"""Cache shared by every Streamlit worker process on a host (or beyond).
+
+Translations, TTS clips and evaluations are memoised here instead of per
+process, so adding workers does not add cold caches. The default backend is an
+SQLite file in WAL mode, which all local processes can read concurrently.
+`SHARED_CACHE_URL=redis://...` switches to Redis when the `redis` package is
+installed; `MemoryCacheBackend` is the in-process stand-in used for local runs
+and benchmarks.
+
+Stampede protection: on a miss, one worker takes a short lease on the key and
+computes the value while the others poll for it, instead of N workers all
+calling Gemma for the same phrase at once.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Protocol
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+DEFAULT_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', 'cache.db')
+DEFAULT_TTL = 30 * 24 * 60 * 60
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    def try_lease(self, key: str, owner: str, ttl: float) -> bool: ...
+
+    def release_lease(self, key: str, owner: str) -> None: ...
+
+
+class SQLiteCacheBackend:
+    """Host-local backend: one WAL-mode SQLite file shared by all worker processes"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, prune_every: int = 1000):
+        self.path = path
+        self._prune_every = prune_every
+        self._writes = 0
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS leases (
+                    key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        conn = self._conn()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                     (key, value, time.time() + ttl))
+        self._writes += 1
+        if self._writes % self._prune_every == 0:
+            now = time.time()
+            conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+            conn.execute('DELETE FROM leases WHERE expires_at <= ?', (now,))
+
+    def try_lease(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        cursor = self._conn().execute(
+            'INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.expires_at <= ?',
+            (key, owner, now + ttl, now)
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, key: str, owner: str) -> None:
+        self._conn().execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, owner))
+
+
+class MemoryCacheBackend:
+    """In-process stand-in for a network backend (local runs, benchmarks)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, tuple] = {}
+        self._leases: Dict[str, tuple] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._values.get(key)
+        if item is None or item[1] <= time.time():
+            return None
+        return item[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._values[key] = (value, time.time() + ttl)
+
+    def try_lease(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease[1] > now:
+                return False
+            self._leases[key] = (owner, now + ttl)
+            return True
+
+    def release_lease(self, key: str, owner: str) -> None:
+        with self._lock:
+            if self._leases.get(key, (None,))[0] == owner:
+                del self._leases[key]
+
+
+class RedisCacheBackend:
+    """Network backend for workers spread over several hosts"""
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("SHARED_CACHE_URL needs the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._client.set(key, value, px=int(ttl * 1000))
+
+    def try_lease(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(self._client.set(f'lease:{key}', owner, nx=True, px=int(ttl * 1000)))
+
+    def release_lease(self, key: str, owner: str) -> None:
+        lease_key = f'lease:{key}'
+        if self._client.get(lease_key) == owner.encode():
+            self._client.delete(lease_key)
+
+
+def backend_from_env() -> CacheBackend:
+    url = os.getenv('SHARED_CACHE_URL', '')
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisCacheBackend(url)
+    if url == 'memory://':
+        return MemoryCacheBackend()
+    return SQLiteCacheBackend(DEFAULT_CACHE_PATH)
+
+
+_CODECS = {
+    'json': (lambda value: json.dumps(value).encode('utf-8'), lambda raw: json.loads(raw)),
+    'bytes': (bytes, bytes),
+}
+
+
+class SharedCache:
+    """get-or-compute over a CacheBackend with stampede protection"""
+
+    def __init__(self, backend: CacheBackend, namespace: str = 'v1', lease_seconds: float = 30.0):
+        self.backend = backend
+        self.namespace = namespace
+        self.lease_seconds = lease_seconds
+        self._owner = f'{os.getpid()}-{id(self)}'
+        self.stats = {'hits': 0, 'misses': 0, 'waited_hits': 0, 'backend_errors': 0}
+
+    def make_key(self, *parts) -> str:
+        digest = hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+        return f'{self.namespace}:{parts[0]}:{digest}'
+
+    def get(self, key: str, codec: str = 'json') -> Any:
+        try:
+            raw = self.backend.get(key)
+        except Exception:
+            self.stats['backend_errors'] += 1
+            return None
+        return None if raw is None else _CODECS[codec][1](raw)
+
+    def set(self, key: str, value: Any, ttl: float = DEFAULT_TTL, codec: str = 'json') -> None:
+        try:
+            self.backend.set(key, _CODECS[codec][0](value), ttl)
+        except Exception:
+            self.stats['backend_errors'] += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: float = DEFAULT_TTL,
+                       codec: str = 'json', max_wait: Optional[float] = None) -> Any:
+        """Cached value for `key`, computing it at most once across workers.
+
+        If `compute` raises, nothing is cached and the exception propagates.
+        `max_wait` caps how long to wait on another worker's computation
+        (default: the lease length) before computing it here.
+        """
+        value = self.get(key, codec)
+        if value is not None:
+            self.stats['hits'] += 1
+            return value
+
+        owner = f'{self._owner}-{threading.get_ident()}'
+        deadline = time.monotonic() + (self.lease_seconds if max_wait is None else min(max_wait, self.lease_seconds))
+        poll = 0.02
+        while True:
+            try:
+                leased = self.backend.try_lease(key, owner, self.lease_seconds)
+            except Exception:
+                self.stats['backend_errors'] += 1
+                leased = True  # cache unavailable: just compute
+            if leased or time.monotonic() >= deadline:
+                break
+            # Another worker is computing this value: wait for it rather than duplicate the call
+            time.sleep(poll)
+            poll = min(poll * 2, 0.25)
+            value = self.get(key, codec)
+            if value is not None:
+                self.stats['waited_hits'] += 1
+                return value
+
+        self.stats['misses'] += 1
+        try:
+            value = compute()
+            if value is not None:
+                self.set(key, value, ttl, codec)
+            return value
+        finally:
+            if leased:
+                try:
+                    self.backend.release_lease(key, owner)
+                except Exception:
+                    self.stats['backend_errors'] += 1
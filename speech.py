@@ -0,0 +1,84 @@
+"""Text-to-speech and speech recognition shared by the app, the teacher service and offline tools (no Streamlit)"""
+import io
+import os
+import tempfile
+
+try:
+    from gtts import gTTS
+except ImportError:
+    gTTS = None
+
+try:
+    import speech_recognition as sr
+except ImportError:
+    sr = None
+
+import cassette
+from resample import resample_wav
+from tracing import tracer
+
+TTS_MIME_TYPE = 'audio/mpeg'
+
+
+def speed_label(slow: bool) -> str:
+    return 'slow' if slow else 'normal'
+
+
+def synthesize_speech(text: str, language_code: str, slow: bool = True) -> bytes:
+    """MP3 bytes for `text` spoken in `language_code`"""
+    def synthesize_now() -> bytes:
+        if gTTS is None:
+            raise RuntimeError("Text-to-speech needs the 'gTTS' package")
+        tts = gTTS(text=text, lang=language_code, slow=slow)
+        audio_fp = io.BytesIO()
+        tts.write_to_fp(audio_fp)
+        return audio_fp.getvalue()
+
+    with tracer.span('tts.gtts', language_code=language_code, text_chars=len(text), slow=slow) as span:
+        audio = cassette.synthesize(text, language_code, slow, synthesize_now)
+        span.set_attribute('audio_bytes', len(audio))
+        return audio
+
+
+def recognize_speech(audio_bytes: bytes, language_code: str) -> str:
+    """Transcribe a WAV recording with Google speech recognition"""
+    if sr is None:
+        raise RuntimeError("Speech recognition needs the 'SpeechRecognition' package")
+    recognizer = sr.Recognizer()
+
+    # Browser recordings arrive at 44.1/48 kHz, often stereo; 16 kHz mono is
+    # all speech recognition needs and is a fraction of the upload
+    with tracer.span('stt.resample', input_bytes=len(audio_bytes)) as span:
+        audio_bytes = resample_wav(audio_bytes, 16000) or audio_bytes
+        span.set_attribute('output_bytes', len(audio_bytes))
+
+    # Save audio bytes to temporary WAV file
+    with tracer.span('stt.temp_file'), tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
+        temp_audio.write(audio_bytes)
+        temp_audio_path = temp_audio.name
+
+    try:
+        # Load audio file for recognition
+        with sr.AudioFile(temp_audio_path) as source:
+            # Adjust for ambient noise and record
+            with tracer.span('stt.calibrate'):
+                recognizer.adjust_for_ambient_noise(source)
+                audio_data = recognizer.record(source)
+            # Recognize speech using the recorded audio data
+            with tracer.span('stt.recognize_google', language_code=language_code,
+                             upload_bytes=len(audio_data.frame_data)) as span:
+                text = cassette.recognize(audio_data.frame_data, language_code,
+                                          lambda: recognizer.recognize_google(audio_data, language=language_code))
+                span.set_attribute('transcript_chars', len(text))
+                return text
+
+    except sr.UnknownValueError:
+        return "Could not understand the audio"
+    except sr.RequestError as e:
+        return f"Speech recognition error: {str(e)}"
+    finally:
+        # Clean up temporary file
+        try:
+            os.unlink(temp_audio_path)
+        except OSError:
+            pass
@@ -1,19 +1,50 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import os
 from datetime import datetime
-import json
 import base64
-import io
 import time
-import re
+import urllib.parse
 from typing import Dict, List, Optional, Tuple
-import google.generativeai as genai
 from dotenv import load_dotenv
-import tempfile
+import uuid
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fuzzywuzzy import fuzz
 import pyaudio
 
+from progress_store import ProgressStore, PASS_SCORE
+from review_scheduler import ReviewScheduler
+from live_tutor import browser_client_html
+from shared_cache import SharedCache, backend_from_env
+from language_teacher import (CURRICULUM, LANGUAGES, LANGUAGES_stt, EVALUATION_CACHE_TTL, TTS_CACHE_TTL,
+                              GeminiLanguageTeacher, TokenLedger, fallback_translation)
+from evaluation_cache import EvaluationCache
+from speech import recognize_speech, speed_label, synthesize_speech
+from audio_bundle import AudioBundle, DEFAULT_BUNDLE_PATH, open_bundle
+from resilience import CircuitBreaker, LatencyBudget, ModelGuard
+from model_scheduler import ModelScheduler, Priority
+from teacher_client import RemoteTeacher, TeacherServiceClient
+from lesson_drill import lesson_drill
+from time_stretch import FFMPEG, PLAYBACK_RATES, stretch_mp3
+from audio_codec import PlaybackEncoder
+from rerun_profiler import StackSampler, profile_rerun, profiling_requested
+from tracing import in_current_context, tracer
+from warmup import WARMUP_LIMIT, CacheWarmer, warmup_pairs
+
+# Side service from live_tutor.py, e.g. ws://localhost:8765
+LIVE_TUTOR_URL = os.getenv('LIVE_TUTOR_URL', '')
+# teacher_service.py, e.g. http://localhost:8000; unset = call Gemma / gTTS / STT in-process
+TEACHER_SERVICE_URL = os.getenv('TEACHER_SERVICE_URL', '')
+# The same service as learners' browsers reach it (https://..., behind the app's proxy); unset = the
+# lesson drill is assembled by the app instead of streamed from the service
+TEACHER_SERVICE_PUBLIC_URL = os.getenv('TEACHER_SERVICE_PUBLIC_URL', '')
+# Longest a single rerun may wait on Gemma, across all of its calls
+RERUN_LATENCY_BUDGET = float(os.getenv('RERUN_LATENCY_BUDGET', '20'))
+# Learners' own recordings are only kept (encoded, for playback) this long
+RECORDING_PLAYBACK_TTL = 60 * 60
+DEFAULT_PLAYBACK_RATE = 0.75
+
 # Optional audio imports
 try:
     import speech_recognition as sr
@@ -57,254 +88,104 @@ def init_session_state():
         st.session_state.dark_mode = False
         st.session_state.font_size = 'medium'
         st.session_state.high_contrast = False
+        st.session_state.show_details = True
+        st.session_state.playback_rate = DEFAULT_PLAYBACK_RATE
         st.session_state.current_topic = None
         st.session_state.lesson_completed = set()
         st.session_state.last_recording = None
+        st.session_state.user_id = get_user_id()
+        st.session_state.recorded_attempts = set()
+        load_progress_from_store()
 
 
+@st.cache_resource
+def get_progress_store() -> ProgressStore:
+    """One write-behind progress store shared by every session in this process; its writer also
+    reschedules review cards, so grading an attempt never waits on SQLite"""
+    return ProgressStore(attempt_hooks=[get_review_scheduler().apply_attempts])
 
-# Curriculum structure
-CURRICULUM = {
-    'greetings': {
-        'title': 'Basic Greetings',
-        'description': 'Learn how to say hello, goodbye, and introduce yourself',
-        'phrases': [
-            'Hello', 
-            'Good morning', 
-            'Good afternoon', 
-            'Good evening',
-            'How are you?', 
-            'I am fine, thank you', 
-            'What is your name?',
-            'My name is...', 
-            'Nice to meet you', 
-            'Goodbye'
-        ],
-        'difficulty': 'beginner'
-    },
-    'numbers': {
-        'title': 'Numbers 1-20',
-        'description': 'Learn to count from 1 to 20',
-        'phrases': ['One', 
-                    'Two', 
-                    'Three', 
-                    'Four', 
-                    'Five', 
-                    'Six', 
-                    'Seven',
-                    'Eight', 
-                    'Nine', 
-                    'Ten', 
-                    'Eleven', 
-                    'Twelve', 
-                    'Thirteen',
-                    'Fourteen', 
-                    'Fifteen', 
-                    'Sixteen', 
-                    'Seventeen', 
-                    'Eighteen',
-                    'Nineteen', 
-                    'Twenty'],
-        'difficulty': 'beginner'
-    },
-    'daily_phrases': {
-        'title': 'Daily Phrases',
-        'description': 'Common phrases for everyday situations',
-        'phrases': [
-            'Please', 
-            'Thank you', 
-            'You are welcome', 
-            'Excuse me',
-            'I am sorry', 
-            'Can you help me?', 
-            'Where is the bathroom?',
-            'How much does this cost?', 
-            'I do not understand',
-            'Can you speak slower?'
-        ],
-        'difficulty': 'beginner'
-    },
-    'food_drink': {
-        'title': 'Food & Drink',
-        'description': 'Essential vocabulary for restaurants and cafes',
-        'phrases': [
-            'I would like...', 
-            'Water, please', 
-            'Coffee', 
-            'Tea',
-            'The menu, please', 
-            'The bill, please', 
-            'Is this vegetarian?',
-            'I am allergic to...', 
-            'Delicious!', 
-            'More, please'
-        ],
-        'difficulty': 'intermediate'
-    },
-    'directions': {
-        'title': 'Directions',
-        'description': 'Ask for and understand directions',
-        'phrases': [
-            'Where is...?', 
-            'Turn left', 
-            'Turn right', 
-            'Go straight',
-            'Near', 
-            'Far', 
-            'Next to', 
-            'Behind', 
-            'In front of',
-            'How do I get to...?'
-        ],
-        'difficulty': 'intermediate'
-    }
-}
-
-# Language options with full names and codes
-# used for google text to speech gTTS
-LANGUAGES = {
-    'Hebrew': 'iw', # 2025.07.17 fix language code
-    'Finnish': 'fi',
-    'French': 'fr',
-    'German': 'de',
-    'Spanish': 'es',
-    'Italian': 'it',
-    'Portuguese': 'pt',
-    'Japanese': 'ja',
-    'Korean': 'ko',
-    'Hindi': 'hi',
-    'Arabic': 'ar',
-    'Bahasa Melayu': 'ms',
-    'Chinese (Mandarin)': 'zh'
-}
-
-# 2025.07.24
-# https://github.com/Uberi/speech_recognition/blob/master/speech_recognition/__init__.py
-# https://github.com/Uberi/speech_recognition/blob/master/speech_recognition/recognizers/google.py#L225
-# speech to text requires another set of language tags
-# specifically RFC5646 language tags
-# for the full list, refer to https://stackoverflow.com/questions/14257598/what-are-language-codes-in-chromes-implementation-of-the-html5-speech-recogniti/14302134#14302134
-LANGUAGES_stt = {
-    'Hebrew': 'he-IL',
-    'Finnish': 'fi',
-    'French': 'fr-FR',
-    'German': 'de-DE',
-    'Spanish': 'es-ES',
-    'Italian': 'it-IT',
-    'Portuguese': 'pt-PT',
-    'Japanese': 'ja',
-    'Korean': 'ko',
-    'Hindi': 'hi-IN',
-    'Arabic': 'ar',
-    'Bahasa Melayu': 'ms-MY',
-    'Chinese (Mandarin)': 'zh-cn'
-}
-
-
-
-class GeminiLanguageTeacher:
-    """Handle Gemini API interactions for language learning"""
-
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        # Use gemini-1.5-flash which is the current model
-        # self.model = genai.GenerativeModel('gemini-1.5-flash')
-        self.model = genai.GenerativeModel('gemma-3-27b-it')  # 14.4k requests per day
-
-    def get_translation(self, text: str, target_language: str) -> Dict[str, str]:
-        """Get translation and pronunciation guide"""
-        prompt = f"""
-        Translate the following text to {target_language}:
-        "{text}"
-
-        Provide the response in JSON format with:
-        1. "translation": the translated text
-        2. "pronunciation": phonetic pronunciation guide
-        3. "literal": literal word-by-word translation
-        4. "usage_notes": brief usage notes or cultural context
-
-        Example format:
-        {{
-            "translation": "Hola",
-            "pronunciation": "OH-lah",
-            "literal": "Hello",
-            "usage_notes": "Informal greeting used throughout the day"
-        }}
-        """
 
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            # Try to extract JSON from the response
-            if '```json' in response_text:
-                json_str = response_text.split('```json')[1].split('```')[0].strip()
-            elif '```' in response_text:
-                json_str = response_text.split('```')[1].split('```')[0].strip()
-            else:
-                # Try to find JSON pattern
-                json_match = re.search(r'\{[^{}]*\}', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
-                else:
-                    json_str = response_text
+@st.cache_resource
+def get_review_scheduler() -> ReviewScheduler:
+    """Spaced-repetition due queue, stored next to the progress tables"""
+    return ReviewScheduler()
 
-            result = json.loads(json_str)
-            return result
-        except Exception as e:
-            st.error(f"Translation error: {e}")
-            # Provide a fallback response
-            return {
-                "translation": f"[Translation of '{text}' to {target_language}]",
-                "pronunciation": "[pronunciation guide]",
-                "literal": text,
-                "usage_notes": "Translation service temporarily unavailable. Please try again."
-            }
-
-    def evaluate_pronunciation(self, user_text: str, target_text: str, language: str) -> Dict[str, any]:
-        """Evaluate user's pronunciation attempt"""
-        prompt = f"""
-        The user is learning {language} and tried to say: "{target_text}"
-        They said: "{user_text}"
-
-        Provide feedback in JSON format:
-        {{
-            "accuracy_score": 0-100,
-            "feedback": "constructive feedback",
-            "tips": ["tip1", "tip2"],
-            "encouragement": "positive message"
-        }}
-        """
 
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            # Extract JSON
-            if '```json' in response_text:
-                json_str = response_text.split('```json')[1].split('```')[0].strip()
-            elif '```' in response_text:
-                json_str = response_text.split('```')[1].split('```')[0].strip()
-            else:
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
-                else:
-                    json_str = response_text
+def get_user_id() -> str:
+    """Stable learner id kept in the URL so progress survives reconnects"""
+    user_id = st.query_params.get('uid')
+    if not user_id:
+        user_id = uuid.uuid4().hex
+        st.query_params['uid'] = user_id
+    return user_id
+
+
+def load_progress_from_store():
+    """Fill lesson_progress / lesson_completed for the current target language"""
+    store = get_progress_store()
+    language = st.session_state.target_language
+    st.session_state.lesson_progress = store.load_progress(st.session_state.user_id, language)
+    st.session_state.lesson_completed = store.load_completed(st.session_state.user_id, language)
+    st.session_state.progress_language = language
+
+
+def record_attempt(lesson_key: str, phrase: str, kind: str, score: int, attempt_input):
+    """Record a practice attempt once, even though Streamlit reruns keep replaying the same input"""
+    attempt_id = (kind, lesson_key, phrase, st.session_state.target_language, hash(attempt_input))
+    if attempt_id in st.session_state.recorded_attempts:
+        return
+    st.session_state.recorded_attempts.add(attempt_id)
+
+    score = int(score)
+    language = st.session_state.target_language
+    store = get_progress_store()
+    store.record_attempt(st.session_state.user_id, language, lesson_key, phrase, kind, score)
+
+    lesson_scores = st.session_state.lesson_progress.setdefault(lesson_key, {})
+    lesson_scores[phrase] = max(score, lesson_scores.get(phrase, 0))
+
+    lesson_phrases = CURRICULUM[lesson_key]['phrases']
+    if (lesson_key not in st.session_state.lesson_completed
+            and all(lesson_scores.get(p, 0) >= PASS_SCORE for p in lesson_phrases)):
+        st.session_state.lesson_completed.add(lesson_key)
+        store.mark_completed(st.session_state.user_id, language, lesson_key)
 
-            result = json.loads(json_str)
-            return result
-        except Exception as e:
-            # Simple comparison fallback
-            similarity_ex = fuzz.ratio(user_text.lower(), target_text)
-            # similarity = len(set(user_text.lower().split()) & set(target_text.lower().split())) / max(
-            #     len(target_text.split()), 1) * 100
-            return {
-                "accuracy_score": int(similarity_ex),
-                "feedback": "Keep practicing!" if similarity_ex < 70 else "Good job!",
-                "tips": ["Try speaking more slowly", "Focus on each syllable"],
-                "encouragement": "You're making progress!"
-            }
+
+@st.cache_resource
+def get_shared_cache() -> SharedCache:
+    """Translation / TTS / evaluation cache shared with every other worker process"""
+    return SharedCache(backend_from_env())
+
+
+@st.cache_resource
+def get_model_guard(api_key: str) -> ModelGuard:
+    """Deadlines, hedging and circuit breaking shared by every session using `api_key`, so failures
+    of a key a visitor typed in never open the breaker for the deployment's key"""
+    return ModelGuard(CircuitBreaker(failure_threshold=5, reset_timeout=30))
+
+
+@st.cache_resource
+def get_service_client() -> Optional[TeacherServiceClient]:
+    """Keep-alive connection pool to the teacher service, if one is configured"""
+    return TeacherServiceClient(TEACHER_SERVICE_URL) if TEACHER_SERVICE_URL else None
+
+
+@st.cache_resource
+def get_evaluation_cache() -> EvaluationCache:
+    """Evaluations by normalized transcript, shared by every session (and, via the shared cache, process)"""
+    return EvaluationCache(capacity=5000, shared=get_shared_cache(), ttl=EVALUATION_CACHE_TTL)
+
+
+@st.cache_resource
+def get_token_ledger() -> TokenLedger:
+    """Gemma token usage of every call this process makes"""
+    return TokenLedger()
+
+
+@st.cache_resource
+def get_model_scheduler(api_key: str) -> ModelScheduler:
+    """Quota and concurrency for every Gemma call this process makes with `api_key`, learners first"""
+    return ModelScheduler.from_env()
 
 
 def apply_custom_css():
@@ -474,20 +355,127 @@ def apply_custom_css():
     """, unsafe_allow_html=True)
 
 
-def text_to_speech(text: str, language_code: str) -> Optional[bytes]:
-    """Convert text to speech using gTTS"""
+@st.cache_resource
+def get_audio_bundle() -> Optional[AudioBundle]:
+    """Precomputed pronunciations (audio_bundle.py), memory-mapped once per process"""
+    return open_bundle(DEFAULT_BUNDLE_PATH)
+
+
+def current_audio_bundle() -> Optional[AudioBundle]:
+    bundle = get_audio_bundle()
+    if bundle is not None and bundle.is_stale():
+        get_audio_bundle.clear()
+        bundle = get_audio_bundle()
+    return bundle
+
+
+def fetch_speech(text: str, language_code: str, bundle: Optional[AudioBundle],
+                 client: Optional[TeacherServiceClient], cache: SharedCache, slow: bool = True) -> Optional[bytes]:
+    """Bundle, then teacher service, then shared cache + gTTS; raises on failure. No Streamlit calls,
+    so it is safe on worker threads"""
+    clip = bundle.get(text, language_code, speed_label(slow)) if bundle is not None else None
+    if clip is not None:
+        tracer.current().set_attribute('tts.source', 'bundle')
+        # st.audio only accepts bytes, not memoryviews: this is the one copy per render
+        return bytes(clip)
+
     if not AUDIO_ENABLED:
         return None
 
-    try:
-        tts = gTTS(text=text, lang=language_code, slow=True)
-        audio_fp = io.BytesIO()
-        tts.write_to_fp(audio_fp)
-        audio_fp.seek(0)
-        return audio_fp.read()
-    except Exception as e:
-        st.error(f"Text-to-speech error: {e}")
-        return None
+    if client is not None:
+        tracer.current().set_attribute('tts.source', 'service')
+        return client.text_to_speech(text, language_code, slow=slow)
+    tracer.current().set_attribute('tts.source', 'cache')
+    key = cache.make_key('tts', text, language_code, speed_label(slow))
+    return cache.get_or_compute(key, lambda: synthesize_speech(text, language_code, slow=slow),
+                                ttl=TTS_CACHE_TTL, codec='bytes')
+
+
+def fetch_speech_at_rate(text: str, language_code: str, rate: float, bundle: Optional[AudioBundle],
+                         client: Optional[TeacherServiceClient], cache: SharedCache) -> Optional[bytes]:
+    """fetch_speech at a playback rate; raises on failure. No Streamlit calls"""
+    if FFMPEG is None:
+        # No local stretching: nearest of gTTS's own two speeds
+        return fetch_speech(text, language_code, bundle, client, cache, slow=rate < 1.0)
+    if rate == 1.0:
+        return fetch_speech(text, language_code, bundle, client, cache, slow=False)
+    if rate < 1.0 and bundle is not None and bundle.entry(text, language_code, 'normal') is None:
+        # A bundle built with --slow-speed: its slow clip beats a gTTS round trip
+        clip = bundle.get(text, language_code, 'slow')
+        if clip is not None:
+            tracer.current().set_attribute('tts.source', 'bundle')
+            return bytes(clip)
+
+    # One normal-speed clip per phrase; every other rate is derived from it and cached
+    def stretched():
+        clip = fetch_speech(text, language_code, bundle, client, cache, slow=False)
+        tracer.current().set_attribute('stretched', True)
+        return stretch_mp3(clip, rate) if clip else None
+
+    key = cache.make_key('tts', text, language_code, f'x{rate:g}')
+    return cache.get_or_compute(key, stretched, ttl=TTS_CACHE_TTL, codec='bytes')
+
+
+def text_to_speech(text: str, language_code: str, rate: Optional[float] = None) -> Optional[bytes]:
+    """Convert text to speech using gTTS, at the learner's playback rate"""
+    rate = st.session_state.playback_rate if rate is None else rate
+    with tracer.span('text_to_speech', language_code=language_code, text_chars=len(text), rate=rate) as span:
+        try:
+            return fetch_speech_at_rate(text, language_code, rate, current_audio_bundle(), get_service_client(),
+                                        get_shared_cache())
+        except Exception as e:
+            span.record_error(e)
+            st.error(f"Text-to-speech error: {e}")
+            return None
+
+
+@st.cache_resource
+def start_cache_warmup(api_key: str) -> CacheWarmer:
+    """Once per process, on the first page load: warm translations and audio of the busiest lessons in the
+    background, into the same entries a learner's rerun reads"""
+    teacher = GeminiLanguageTeacher(api_key, cache=get_shared_cache(), guard=get_model_guard(api_key),
+                                    scheduler=get_model_scheduler(api_key), priority=Priority.PREFETCH,
+                                    ledger=get_token_ledger(), evaluation_cache=get_evaluation_cache())
+    bundle, cache = current_audio_bundle(), get_shared_cache()
+
+    def warm(phrase: str, language: str):
+        translation = teacher.translate(phrase, language)['translation']
+        fetch_speech_at_rate(translation, LANGUAGES[language], DEFAULT_PLAYBACK_RATE, bundle, None, cache)
+
+    return CacheWarmer(warmup_pairs(), warm).start()
+
+
+@st.cache_resource
+def get_playback_encoder() -> PlaybackEncoder:
+    return PlaybackEncoder(get_shared_cache())
+
+
+def play_audio(audio_bytes: bytes, mime_type: str, ttl: float = TTS_CACHE_TTL):
+    """st.audio with the clip transcoded to a speech codec first (once per distinct clip).
+    st.audio serves it by media-file URL, so only the encoded size goes over the wire"""
+    with tracer.span('play_audio', mime_type=mime_type, raw_bytes=len(audio_bytes)) as span:
+        payload, sent_type = get_playback_encoder().encode(audio_bytes, mime_type, ttl)
+        span.set_attribute('sent_bytes', len(payload))
+        span.set_attribute('sent_type', sent_type)
+        sizes = st.session_state.setdefault('rerun_audio_bytes', [0, 0])
+        sizes[0] += len(audio_bytes)
+        sizes[1] += len(payload)
+        st.audio(payload, format=sent_type)
+
+
+def display_audio_usage():
+    """Audio bytes this rerun sent to the browser, against the raw clips"""
+    raw, sent = st.session_state.get('rerun_audio_bytes', (0, 0))
+    if raw:
+        st.caption(f"🔈 Audio this rerun: {sent / 1024:.0f} KB sent ({raw / 1024:.0f} KB uncompressed)")
+
+
+def display_profile(profile: StackSampler):
+    """Admin view of a profiled rerun: hottest functions and where the flame graph input went"""
+    with st.expander(f"🔬 Profile: {profile.seconds * 1000:.0f} ms, {profile.samples} samples"):
+        if profile.path:
+            st.caption(f"Collapsed stacks written to `{profile.path}` (flamegraph.pl / speedscope)")
+        st.dataframe(profile.hot_functions(), use_container_width=True, hide_index=True)
 
 
 def speech_to_text(audio_bytes: bytes, language_code: str) -> Optional[str]:
@@ -497,39 +485,20 @@ def speech_to_text(audio_bytes: bytes, language_code: str) -> Optional[str]:
     if not AUDIO_ENABLED:
         return None
 
-    try:
-        recognizer = sr.Recognizer()
-        
-        # Save audio bytes to temporary WAV file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
-
-
+    client = get_service_client()
+    with tracer.span('speech_to_text', language_code=language_code, audio_bytes=len(audio_bytes),
+                     remote=client is not None) as span:
         try:
-            # Load audio file for recognition
-            with sr.AudioFile(temp_audio_path) as source:
-                # Adjust for ambient noise and record
-                recognizer.adjust_for_ambient_noise(source)
-                audio_data = recognizer.record(source)
-                # Recognize speech using the recorded audio data
-                text = recognizer.recognize_google(audio_data, language=language_code)
-                return text
-
-        except sr.UnknownValueError:
-            return "Could not understand the audio"
-        except sr.RequestError as e:
-            return f"Speech recognition error: {str(e)}"
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_audio_path)
-            except:
-                pass
-
-    except Exception as e:
-        st.error(f"Speech-to-text error: {e}")
-        return None
+            if client is not None:
+                text = client.speech_to_text(audio_bytes, language_code)
+            else:
+                text = recognize_speech(audio_bytes, language_code)
+        except Exception as e:
+            span.record_error(e)
+            st.error(f"Speech-to-text error: {e}")
+            return None
+        span.set_attribute('transcript_chars', len(text))
+        return text
 
 
 
@@ -581,6 +550,169 @@ def display_lesson_card(lesson_key: str, lesson_data: Dict):
 ##########################
 
 
+##########################
+# tab1 REVIEW MODE
+##########################
+REVIEW_TOPIC = '__review__'
+
+
+def display_review_entry():
+    """Review button above the lesson grid, shown once the learner has some history"""
+    due = get_review_scheduler().due_count(st.session_state.user_id, st.session_state.target_language)
+    if due or st.session_state.lesson_progress:
+        label = f"🔁 Review ({due} due)" if due else "🔁 Review"
+        if st.button(label, key="start_review",
+                     help="Practise the phrases you are most likely to forget",
+                     use_container_width=True):
+            st.session_state.current_topic = REVIEW_TOPIC
+            st.session_state.review_card = None
+            st.rerun()
+
+
+def review_interface(teacher: GeminiLanguageTeacher):
+    """Practise whichever phrase the spaced-repetition scheduler says is due next"""
+    if st.button("← Back to Lessons", key="back_from_review"):
+        st.session_state.current_topic = None
+        st.rerun()
+
+    st.header("🔁 Review")
+
+    # Keep the same card across reruns until the learner moves on
+    card = st.session_state.get('review_card')
+    if card is None or card.language != st.session_state.target_language:
+        # Cards moved on from this session are skipped until every card has had its turn
+        scheduler, skipped = get_review_scheduler(), st.session_state.setdefault('review_skipped', set())
+        card = scheduler.next_card(st.session_state.user_id, st.session_state.target_language, exclude=skipped)
+        if card is None and skipped:
+            skipped.clear()
+            card = scheduler.next_card(st.session_state.user_id, st.session_state.target_language)
+        st.session_state.review_card = card
+
+    if card is None or card.lesson_key not in CURRICULUM:
+        st.info("Nothing to review yet. Practise a lesson first!")
+        return
+
+    st.markdown(f"*From {CURRICULUM[card.lesson_key]['title']}*")
+    if not card.is_due:
+        st.caption("🎉 You're all caught up - this card is being reviewed ahead of schedule.")
+
+    practice_phrase(teacher, card.lesson_key, card.phrase)
+
+    if st.button("Next card ➡️", key="next_review_card"):
+        st.session_state.review_skipped.add((card.language, card.lesson_key, card.phrase))
+        st.session_state.review_card = None
+        st.rerun()
+
+##########################
+
+
+##########################
+# tab1 COMPARE MODE
+##########################
+COMPARE_TOPIC = '__compare__'
+# Languages fetched at once; the model scheduler still caps calls per process
+COMPARE_WORKERS = 6
+COMPARE_COLUMNS = 3
+
+
+def display_compare_entry():
+    """Button above the lesson grid for the side-by-side language view"""
+    if st.button("🌐 Compare languages", key="start_compare",
+                 help="See one phrase in several languages side by side",
+                 use_container_width=True):
+        st.session_state.current_topic = COMPARE_TOPIC
+        st.rerun()
+
+
+def compare_language(teacher: GeminiLanguageTeacher, phrase: str, language: str, notes: bool, rate: float,
+                     bundle: Optional[AudioBundle], client: Optional[TeacherServiceClient],
+                     cache: SharedCache) -> Dict:
+    """Translation and audio for one column; runs on a worker thread, so no `st` calls here"""
+    started = time.monotonic()
+    result = {'language': language}
+    try:
+        result['translation'] = teacher.translate(phrase, language, notes)
+    except Exception as e:
+        result['translation'] = fallback_translation(phrase, language)
+        result['error'] = f"Translation unavailable: {e}"
+    else:
+        try:
+            result['audio'] = fetch_speech_at_rate(result['translation']['translation'], LANGUAGES[language],
+                                                   rate, bundle, client, cache)
+        except Exception as e:
+            result['audio_error'] = f"Text-to-speech error: {e}"
+    result['seconds'] = time.monotonic() - started
+    return result
+
+
+def display_comparison(result: Dict):
+    translation_data = result['translation']
+    if result.get('error'):
+        st.warning(result['error'])
+        return
+    st.markdown(f"**{translation_data['translation']}**")
+    if translation_data.get('pronunciation'):
+        st.markdown(f"*Pronunciation: {translation_data['pronunciation']}*")
+    if translation_data.get('usage_notes'):
+        st.info(f"💡 {translation_data['usage_notes']}")
+    if result.get('audio'):
+        play_audio(result['audio'], 'audio/mp3')
+    elif result.get('audio_error'):
+        st.caption(f"🔇 {result['audio_error']}")
+    st.caption(f"{result['seconds']:.1f}s")
+
+
+def compare_interface(teacher: GeminiLanguageTeacher):
+    """One phrase in several languages; every column is fetched concurrently and shown as it lands"""
+    if st.button("← Back to Lessons", key="back_from_compare"):
+        st.session_state.current_topic = None
+        st.rerun()
+
+    st.header("🌐 Compare Languages")
+
+    phrases = [phrase for lesson in CURRICULUM.values() for phrase in lesson['phrases']]
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_phrase = st.selectbox("Choose a phrase:", phrases, key="compare_phrase")
+    with col2:
+        typed_phrase = st.text_input("...or type your own:", max_chars=200, key="compare_typed")
+    phrase = typed_phrase.strip() or selected_phrase
+    languages = st.multiselect("Languages:", list(LANGUAGES.keys()),
+                               default=[st.session_state.target_language], key="compare_languages",
+                               help="Pick the languages to show side by side")
+    if not phrase or not languages:
+        st.info("Pick a phrase and at least one language.")
+        return
+
+    st.markdown(f"### English: **{phrase}**")
+
+    # Lay every column out up front, so results can land in any order
+    slots = {}
+    for start in range(0, len(languages), COMPARE_COLUMNS):
+        for language, col in zip(languages[start:start + COMPARE_COLUMNS], st.columns(COMPARE_COLUMNS)):
+            with col:
+                st.markdown(f"#### 🌍 {language}")
+                slots[language] = st.empty()
+                slots[language].caption("⏳ Loading...")
+
+    # Streamlit-cached resources and session state are read here, on the script thread
+    bundle, client, cache = current_audio_bundle(), get_service_client(), get_shared_cache()
+    rate = st.session_state.playback_rate
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=min(COMPARE_WORKERS, len(languages))) as pool:
+        # Each worker's spans nest under this rerun's trace
+        futures = [pool.submit(in_current_context(compare_language), teacher, phrase, language,
+                               st.session_state.show_details, rate, bundle, client, cache)
+                   for language in languages]
+        for future in as_completed(futures):
+            result = future.result()
+            with slots[result['language']].container():
+                display_comparison(result)
+    st.caption(f"⏱️ {len(languages)} languages in {time.monotonic() - started:.1f}s")
+
+##########################
+
+
 ##########################
 # from tab1 - after selecting a PRACTICE
 ##########################
@@ -609,111 +741,172 @@ def practice_interface(teacher: GeminiLanguageTeacher):
 
 
     if selected_phrase:
-        # Get translation
-        target_lang = st.session_state.target_language
-        translation_data = teacher.get_translation(selected_phrase, target_lang)
-
+        practice_phrase(teacher, st.session_state.current_topic, selected_phrase)
+
+    lesson_drill_player(teacher, st.session_state.current_topic)
+
+
+def lesson_drill_player(teacher: GeminiLanguageTeacher, lesson_key: str):
+    """Every phrase of the lesson as one track: English prompt, pause, translation, pause to repeat"""
+    st.markdown("### 🎧 Listen to the Whole Lesson")
+    if not AUDIO_ENABLED and get_service_client() is None:
+        st.info("🔇 Audio features are not available.")
+        return
+    if not st.button("▶️ Play lesson drill", key=f"drill_{lesson_key}",
+                     help="Hear each phrase in English, then in your target language, with time to repeat"):
+        return
+
+    language = st.session_state.target_language
+    client = get_service_client()
+    if client is not None and TEACHER_SERVICE_PUBLIC_URL:
+        # The service streams the MP3 as it is synthesized: playback starts after the first phrase
+        url = (f"{TEACHER_SERVICE_PUBLIC_URL.rstrip('/')}/v1/drill/{urllib.parse.quote(lesson_key)}"
+               f"?language={urllib.parse.quote(language)}")
+        components.html(f'<audio controls autoplay preload="auto" src="{url}" style="width:100%"></audio>',
+                        height=60)
+        return
+
+    # Otherwise st.audio needs the whole file: assemble it from the TTS cache (or the service) in parallel
+    bundle, cache = current_audio_bundle(), get_shared_cache()
+    errors: List[str] = []
+    chunks = []
+    total = 2 * len(CURRICULUM[lesson_key]['phrases'])
+    progress = st.progress(0.0, text="Preparing the drill...")
+    drill = lesson_drill(lesson_key, language, teacher,
+                         lambda text, code, slow: fetch_speech(text, code, bundle, client, cache, slow),
+                         error_reporter=errors.append)
+    for chunk in drill:
+        chunks.append(chunk)
+        progress.progress(min(1.0, len(chunks) / total), text=f"Preparing the drill... {len(chunks)}/{total}")
+    progress.empty()
+    if errors:
+        st.warning(f"{len(errors)} clip(s) could not be prepared and were skipped.")
+    if chunks:
+        play_audio(b''.join(chunks), 'audio/mp3')
+
+
+def practice_phrase(teacher: GeminiLanguageTeacher, lesson_key: str, selected_phrase: str):
+    """Translation card, audio practice and typed practice for one phrase"""
+    # Get translation
+    target_lang = st.session_state.target_language
+    translation_data = teacher.get_translation(selected_phrase, target_lang,
+                                               notes=st.session_state.show_details)
 
-        ###############################
-        # Display translation card
-        ###############################
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown("### English")
-            st.markdown(f"**{selected_phrase}**")
 
-        with col2:
-            st.markdown(f"### 🌍 {target_lang}")
-            st.markdown(f"**{translation_data['translation']}**")
-            if translation_data['pronunciation']:
-                st.markdown(f"*Pronunciation: {translation_data['pronunciation']}*")
-        ###############################
+    ###############################
+    # Display translation card
+    ###############################
+    col1, col2 = st.columns(2)
 
+    with col1:
+        st.markdown("### English")
+        st.markdown(f"**{selected_phrase}**")
 
+    with col2:
+        st.markdown(f"### 🌍 {target_lang}")
+        st.markdown(f"**{translation_data['translation']}**")
+        if translation_data['pronunciation']:
+            st.markdown(f"*Pronunciation: {translation_data['pronunciation']}*")
+    ###############################
 
 
-        ###############################
-        # Usage notes
-        ###############################        
-        if translation_data.get('usage_notes'):
-            st.info(f"💡 {translation_data['usage_notes']}")
-        ###############################
 
 
+    ###############################
+    # Usage notes
+    ###############################        
+    if translation_data.get('usage_notes'):
+        st.info(f"💡 {translation_data['usage_notes']}")
+    ###############################
 
 
-        ###############################
-        # play translation or record audio
-        ###############################
-        st.markdown("### 🔊 Listen and Practice")
-        
-        # check if TTS and audio imports worked
-        if not AUDIO_ENABLED:
-            st.info("🔇 Audio features are not available. To enable audio, install the optional audio libraries.")
 
-        # Three main audio actions
-        # col1, col2, col3 = st.columns(3)
-        # 2 main audio actions
-        col1, col2 = st.columns(2)
-
-        # Audio controls
-        with col1:
-            if st.button("🔊 Play Translation", key="play_translation",
-                         help="Listen to the pronunciation"):
-                if AUDIO_ENABLED:
-                    audio_data = text_to_speech(
-                        translation_data['translation'],
-                        LANGUAGES[target_lang]
-                    )
-                    if audio_data:
-                        st.audio(audio_data, format='audio/mp3')
-                else:
-                    st.info("🔇 Audio features are not available.")
 
+    ###############################
+    # play translation or record audio
+    ###############################
+    st.markdown("### 🔊 Listen and Practice")
+    
+    # check if TTS and audio imports worked
+    if not AUDIO_ENABLED:
+        st.info("🔇 Audio features are not available. To enable audio, install the optional audio libraries.")
 
+    # Three main audio actions
+    # col1, col2, col3 = st.columns(3)
+    # 2 main audio actions
+    col1, col2 = st.columns(2)
 
-        # up to 2025.07.22 - encountered an issue in Streamlit Community Edition
-        # where
-        # audio recording works
-        # audio file playback appears
-        # BUT error appears later
-        #     "Speech-to-text error: No Default Input Device Available"
-        # 2025.07.23 fixed in localhost and Streamlit Community Cloud
-        with col2:
-            if AUDIO_ENABLED and RECORDER_AVAILABLE:
-                st.markdown("🎤 **Record Your Voice**")
-
-                # Use audio_recorder for simple recording
-                audio_bytes = audio_recorder(
-                    text="Click to record",
-                    recording_color="#e8b62c",
-                    neutral_color="#6aa36f",
-                    icon_name="microphone",
-                    icon_size="2x",
-                    key=f"recorder_{selected_phrase}"
+    # Audio controls
+    with col1:
+        st.session_state.playback_rate = st.select_slider(
+            "🐢 Playback speed:",
+            options=PLAYBACK_RATES,
+            value=st.session_state.playback_rate,
+            format_func=lambda rate: f"{rate:g}×",
+            help="Slow the pronunciation down (same pitch) or speed it up"
+        )
+        if st.button("🔊 Play Translation", key="play_translation",
+                     help="Listen to the pronunciation"):
+            if AUDIO_ENABLED:
+                audio_data = text_to_speech(
+                    translation_data['translation'],
+                    LANGUAGES[target_lang]
                 )
+                if audio_data:
+                    play_audio(audio_data, 'audio/mp3')
+            else:
+                st.info("🔇 Audio features are not available.")
 
-                if audio_bytes:
-                    st.audio(audio_bytes, format="audio/wav")
-
-                    # Analyze the recording
-                    with st.spinner("Analyzing your pronunciation..."):
-                        # Transcribe
-                        transcribed = speech_to_text(audio_bytes, LANGUAGES_stt[target_lang])
 
-                        if transcribed:
-                            st.markdown(f"**You said:** {transcribed}")
 
-                            # Get evaluation
-                            evaluation = teacher.evaluate_pronunciation(
-                                transcribed,
-                                translation_data['translation'],
-                                target_lang
-                            )
+    # up to 2025.07.22 - encountered an issue in Streamlit Community Edition
+    # where
+    # audio recording works
+    # audio file playback appears
+    # BUT error appears later
+    #     "Speech-to-text error: No Default Input Device Available"
+    # 2025.07.23 fixed in localhost and Streamlit Community Cloud
+    with col2:
+        if AUDIO_ENABLED and RECORDER_AVAILABLE:
+            st.markdown("🎤 **Record Your Voice**")
+
+            # Use audio_recorder for simple recording
+            audio_bytes = audio_recorder(
+                text="Click to record",
+                recording_color="#e8b62c",
+                neutral_color="#6aa36f",
+                icon_name="microphone",
+                icon_size="2x",
+                key=f"recorder_{selected_phrase}"
+            )
 
+            if audio_bytes:
+                play_audio(audio_bytes, "audio/wav", ttl=RECORDING_PLAYBACK_TTL)
+
+                # Analyze the recording; one span per attempt, with the stages nested inside
+                with st.spinner("Analyzing your pronunciation..."), \
+                        tracer.span('practice.attempt', lesson=lesson_key, phrase=selected_phrase,
+                                    language=target_lang, audio_bytes=len(audio_bytes)) as attempt:
+                    # Transcribe
+                    transcribed = speech_to_text(audio_bytes, LANGUAGES_stt[target_lang])
+
+                    if transcribed:
+                        st.markdown(f"**You said:** {transcribed}")
+
+                        # Get evaluation
+                        evaluation = teacher.evaluate_pronunciation(
+                            transcribed,
+                            translation_data['translation'],
+                            target_lang,
+                            tips=st.session_state.show_details
+                        )
+
+                        score = evaluation.get('accuracy_score', 0)
+                        attempt.set_attribute('score', score)
+                        record_attempt(lesson_key, selected_phrase,
+                                       'speech', score, audio_bytes)
+                        with tracer.span('render.feedback'):
                             # Display score
-                            score = evaluation.get('accuracy_score', 0)
                             if score >= 80:
                                 st.success(f"🎯 Excellent! Score: {score}/100")
                             elif score >= 60:
@@ -732,64 +925,76 @@ def practice_interface(teacher: GeminiLanguageTeacher):
 
                             # Encouragement
                             st.info(f"💬 {evaluation.get('encouragement', 'Keep practicing!')}")
-            else:
-                # Fallback for when recorder is not available
-                st.markdown("🎤 **Recording**")
-
-                # Alternative: File upload for audio
-                uploaded_audio = st.file_uploader(
-                    "Upload an audio recording",
-                    type=['wav', 'mp3', 'm4a'],
-                    key=f"upload_{selected_phrase}",
-                    help="Record yourself saying the phrase and upload the audio file"
-                )
+        else:
+            # Fallback for when recorder is not available
+            st.markdown("🎤 **Recording**")
+
+            # Alternative: File upload for audio
+            uploaded_audio = st.file_uploader(
+                "Upload an audio recording",
+                type=['wav', 'mp3', 'm4a'],
+                key=f"upload_{selected_phrase}",
+                help="Record yourself saying the phrase and upload the audio file"
+            )
 
-                if uploaded_audio:
-                    audio_bytes = uploaded_audio.read()
-                    st.audio(audio_bytes)
-
-                    if AUDIO_ENABLED:
-                        with st.spinner("Analyzing..."):
-                            transcribed = speech_to_text(audio_bytes, LANGUAGES_stt[target_lang])
-                            if transcribed:
-                                st.markdown(f"**You said:** {transcribed}")
-                    else:
-                        st.info("Install audio libraries for speech recognition")
-
-        # with col3:
-        #     if st.button("📝 Next Phrase", key="next_phrase",
-        #                  help="Move to the next phrase"):
-        #         # Find next phrase
-        #         current_idx = current_lesson['phrases'].index(selected_phrase)
-        #         if current_idx < len(current_lesson['phrases']) - 1:
-        #             next_phrase = current_lesson['phrases'][current_idx + 1]
-        #             st.success(f"Moving to: {next_phrase}")
-        #             st.rerun()
-        #         else:
-        #             st.session_state.lesson_completed.add(st.session_state.current_topic)
-        #             st.balloons()
-        #             st.success("🎉 Lesson completed!")
-
-        # Interactive practice
-        st.markdown("### 💬 Practice Conversation")
-
-        user_input = st.text_input(
-            "Try translating this phrase yourself:",
-            placeholder=f"Type the {target_lang} translation here...",
-            help="Type your translation and press Enter"
-        )
+            if uploaded_audio:
+                audio_bytes = uploaded_audio.read()
+                play_audio(audio_bytes, uploaded_audio.type or 'audio/wav', ttl=RECORDING_PLAYBACK_TTL)
+
+                if AUDIO_ENABLED:
+                    with st.spinner("Analyzing..."):
+                        transcribed = speech_to_text(audio_bytes, LANGUAGES_stt[target_lang])
+                        if transcribed:
+                            st.markdown(f"**You said:** {transcribed}")
+                else:
+                    st.info("Install audio libraries for speech recognition")
+
+    # with col3:
+    #     if st.button("📝 Next Phrase", key="next_phrase",
+    #                  help="Move to the next phrase"):
+    #         # Find next phrase
+    #         current_idx = current_lesson['phrases'].index(selected_phrase)
+    #         if current_idx < len(current_lesson['phrases']) - 1:
+    #             next_phrase = current_lesson['phrases'][current_idx + 1]
+    #             st.success(f"Moving to: {next_phrase}")
+    #             st.rerun()
+    #         else:
+    #             st.session_state.lesson_completed.add(st.session_state.current_topic)
+    #             st.balloons()
+    #             st.success("🎉 Lesson completed!")
+
+    # Real-time voice conversation through the live tutor bridge
+    if LIVE_TUTOR_URL:
+        with st.expander("🗣️ Live conversation with your tutor"):
+            st.caption("Talk to the tutor out loud - it answers as soon as you stop speaking.")
+            components.html(browser_client_html(LIVE_TUTOR_URL, target_lang, selected_phrase),
+                            height=80)
+
+    # Interactive practice
+    st.markdown("### 💬 Practice Conversation")
+
+    user_input = st.text_input(
+        "Try translating this phrase yourself:",
+        placeholder=f"Type the {target_lang} translation here...",
+        help="Type your translation and press Enter",
+        # One box per phrase: otherwise the last answer would carry over and be scored against the next phrase
+        key=f"typed_{lesson_key}_{selected_phrase}_{target_lang}"
+    )
 
-        if user_input:
-            similarity = fuzz.ratio(user_input.lower(), translation_data['translation'].lower())
+    if user_input:
+        similarity = fuzz.ratio(user_input.lower(), translation_data['translation'].lower())
+        record_attempt(lesson_key, selected_phrase,
+                       'typed', similarity, user_input)
+
+        if similarity > 90:  # Adjust threshold as needed
+            st.success("🎯 Perfect! Great job!")
+        elif similarity > 70:
+            st.info(f"Close! The correct translation is: {translation_data['translation']}")
+            st.info("You were very close! Just a small typo.")
+        else:
+            st.warning(f"Not quite. The correct translation is: {translation_data['translation']}")
+            st.info("Keep practicing! You'll get it next time!")
 
-            if similarity > 90:  # Adjust threshold as needed
-                st.success("🎯 Perfect! Great job!")
-            elif similarity > 70:
-                st.info(f"Close! The correct translation is: {translation_data['translation']}")
-                st.info("You were very close! Just a small typo.")
-            else:
-                st.warning(f"Not quite. The correct translation is: {translation_data['translation']}")
-                st.info("Keep practicing! You'll get it next time!")
 
 ##########################
 
@@ -801,6 +1006,7 @@ def practice_interface(teacher: GeminiLanguageTeacher):
 def main():
     """Main application"""
     init_session_state()
+    st.session_state.rerun_audio_bytes = [0, 0]
     apply_custom_css()
 
     # # Skip to main content link for screen readers
@@ -824,6 +1030,8 @@ def main():
             index=list(LANGUAGES.keys()).index(st.session_state.target_language),
             help="Choose the language you want to learn"
         )
+        if st.session_state.target_language != st.session_state.progress_language:
+            load_progress_from_store()
 
     # TOP-RIGHT
     with col3:
@@ -847,6 +1055,13 @@ def main():
                         on_change=lambda: setattr(st.session_state, 'high_contrast',
                                                   not st.session_state.high_contrast))
 
+            # Off: shorter answers from the tutor, which come back faster
+            st.checkbox("💡 Usage notes & tips",
+                        value=st.session_state.show_details,
+                        key="show_details_toggle",
+                        on_change=lambda: setattr(st.session_state, 'show_details',
+                                                  not st.session_state.show_details))
+
     # TOP-MIDDLE OF THE PAGE
     # # Progress overview
     # display_progress_bar()
@@ -857,19 +1072,41 @@ def main():
 
     # Initialize teacher
     api_key = os.getenv('GEMINI_API_KEY', '')
-    if not api_key:
+    if not api_key and get_service_client() is None:
         st.warning("⚠️ Please set your GEMINI_API_KEY in the .env file")
         api_key = st.text_input("Enter your Gemini API Key:", type="password")
 
-    if api_key:
-        teacher = GeminiLanguageTeacher(api_key)
+    if get_service_client() is not None:
+        # The service holds the API key, cache and quota for every frontend
+        teacher = RemoteTeacher(get_service_client(), error_reporter=st.error)
+    elif api_key:
+        if api_key == os.getenv('GEMINI_API_KEY') and WARMUP_LIMIT > 0:
+            # Only with the deployment's own key, never one typed in by a visitor
+            start_cache_warmup(api_key)
+        teacher = GeminiLanguageTeacher(api_key, cache=get_shared_cache(), error_reporter=st.error,
+                                        guard=get_model_guard(api_key), budget=LatencyBudget(RERUN_LATENCY_BUDGET),
+                                        scheduler=get_model_scheduler(api_key), ledger=get_token_ledger(),
+                                        evaluation_cache=get_evaluation_cache())
+    else:
+        teacher = None
+
+    if teacher is not None:
+        if teacher.guard is not None and teacher.guard.breaker.state != CircuitBreaker.CLOSED:
+            st.warning("⚠️ The AI tutor is slow to respond right now - showing saved or offline feedback.")
 
         # Check if we're in PRACTICE MODE
         # AFTER SELECTING A TAB
-        if st.session_state.current_topic and st.session_state.current_topic in CURRICULUM:
+        if st.session_state.current_topic == REVIEW_TOPIC:
+            review_interface(teacher)
+        elif st.session_state.current_topic == COMPARE_TOPIC:
+            compare_interface(teacher)
+        elif st.session_state.current_topic and st.session_state.current_topic in CURRICULUM:
             # Show practice interface
             practice_interface(teacher)
         else:
+            display_review_entry()
+            display_compare_entry()
+
             # Display lesson cards in a grid
             cols = st.columns(2)
             for idx, (lesson_key, lesson_data) in enumerate(CURRICULUM.items()):
@@ -878,8 +1115,20 @@ def main():
 
     # Footer
     st.markdown("---")
+    display_audio_usage()
 
 
 
 if __name__ == "__main__":
-    main()
+    # Disabled (the default), profiling and tracing are a flag check per rerun each
+    topic = st.session_state.get('current_topic') or 'home'
+    profile = None
+    try:
+        with profile_rerun(profiling_requested(st.query_params.get('profile')), topic) as profile, \
+                tracer.span('rerun', topic=topic, language=st.session_state.get('target_language')):
+            main()
+    finally:
+        # Also after st.stop(); a rerun ended by st.rerun() is replaced by the next one at once, so its
+        # profile is only on disk
+        if profile is not None:
+            display_profile(profile)
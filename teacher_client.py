@@ -0,0 +1,93 @@
+"""Client for teacher_service.py, used by the app when `TEACHER_SERVICE_URL` is set.
+
+One `requests.Session` per process keeps connections to the service alive
+across reruns and sessions. `RemoteTeacher` mirrors the parts of
+GeminiLanguageTeacher the page uses, including its local fallbacks when the
+service cannot answer.
+"""
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from language_teacher import GeminiLanguageTeacher, fallback_evaluation, fallback_translation
+from tracing import tracer
+
+
+class ServiceError(RuntimeError):
+    """The teacher service answered with an error or not at all"""
+
+
+class TeacherServiceClient:
+    def __init__(self, base_url: str, timeout: float = GeminiLanguageTeacher.CALL_TIMEOUT + 2,
+                 pool_size: int = 16):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (3.0, timeout)  # connect, read
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _post(self, path: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        with tracer.span(f'POST {path}', service_url=self.base_url) as span:
+            # The service continues this trace (W3C Trace Context)
+            if span.traceparent:
+                headers = {**(headers or {}), 'traceparent': span.traceparent}
+            try:
+                response = self.session.post(f'{self.base_url}{path}', timeout=self.timeout, headers=headers,
+                                             **kwargs)
+            except requests.RequestException as e:
+                raise ServiceError(f'teacher service unreachable: {e}') from e
+            span.set_attribute('status_code', response.status_code)
+            span.set_attribute('response_bytes', len(response.content))
+        if response.status_code != 200:
+            try:
+                detail = response.json().get('detail', response.text)
+            except ValueError:
+                detail = response.text
+            raise ServiceError(f'teacher service {response.status_code}: {detail}')
+        return response
+
+    def translate(self, text: str, language: str, notes: bool = True) -> Dict[str, str]:
+        return self._post('/v1/translate', json={'text': text, 'language': language, 'notes': notes}).json()
+
+    def evaluate(self, attempt: str, target: str, language: str, tips: bool = True) -> Dict[str, object]:
+        return self._post('/v1/evaluate', json={'attempt': attempt, 'target': target,
+                                                'language': language, 'tips': tips}).json()
+
+    def text_to_speech(self, text: str, language_code: str, slow: bool = True) -> bytes:
+        return self._post('/v1/tts', json={'text': text, 'language_code': language_code, 'slow': slow}).content
+
+    def speech_to_text(self, audio_bytes: bytes, language_code: str) -> str:
+        return self._post('/v1/stt', params={'language_code': language_code}, data=audio_bytes,
+                          headers={'Content-Type': 'audio/wav'}).json()['text']
+
+
+class RemoteTeacher:
+    """GeminiLanguageTeacher's page-facing interface, served by the teacher service"""
+
+    guard = None  # the breaker lives in the service
+
+    def __init__(self, client: TeacherServiceClient, error_reporter: Callable[[str], None] = print):
+        self.client = client
+        self.error_reporter = error_reporter
+
+    def translate(self, text: str, target_language: str, notes: bool = True) -> Dict[str, str]:
+        return self.client.translate(text, target_language, notes)
+
+    def get_translation(self, text: str, target_language: str, notes: bool = True) -> Dict[str, str]:
+        try:
+            return self.client.translate(text, target_language, notes)
+        except ServiceError as e:
+            self.error_reporter(f"Translation error: {e}")
+            return fallback_translation(text, target_language)
+
+    def evaluate(self, user_text: str, target_text: str, language: str, tips: bool = True) -> Dict[str, object]:
+        return self.client.evaluate(user_text, target_text, language, tips)
+
+    def evaluate_pronunciation(self, user_text: str, target_text: str, language: str,
+                               tips: bool = True) -> Dict[str, object]:
+        try:
+            return self.client.evaluate(user_text, target_text, language, tips)
+        except ServiceError:
+            return fallback_evaluation(user_text, target_text)
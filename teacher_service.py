@@ -0,0 +1,296 @@
+"""Async HTTP service for translation, evaluation, text-to-speech and speech-to-text.
+
+One process owns the Gemma quota scheduler, circuit breaker, token ledger,
+audio bundle and shared cache, so every frontend (Streamlit workers with
+`TEACHER_SERVICE_URL` set, a mobile app, grading scripts) shares them instead
+of each calling Gemma, gTTS and Google STT on its own. Identical requests
+that arrive while one is already in flight are coalesced into a single call.
+
+    pip install fastapi uvicorn
+    python teacher_service.py --port 8000          # local run mode
+    python teacher_service.py --openapi > openapi.json
+
+`/v1/drill/{lesson}` streams a whole lesson as one MP3 (see lesson_drill.py).
+At startup the caches are warmed for the most-practised lessons in the
+background (see warmup.py); /healthz reports its progress.
+Interactive docs are served at /docs, the spec at /openapi.json.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from audio_bundle import DEFAULT_BUNDLE_PATH, open_bundle
+from evaluation_cache import EvaluationCache, normalize_transcript
+from language_teacher import (CURRICULUM, EVALUATION_CACHE_TTL, LANGUAGES, TTS_CACHE_TTL, GeminiLanguageTeacher,
+                              TokenLedger)
+from lesson_drill import lesson_drill
+from model_scheduler import ModelScheduler, Priority
+from resilience import CircuitBreaker, ModelGuard
+from shared_cache import SharedCache, backend_from_env
+from speech import TTS_MIME_TYPE, recognize_speech, speed_label, synthesize_speech
+from tracing import tracer
+from warmup import WARMUP_LIMIT, CacheWarmer, warmup_pairs
+
+MAX_BATCH = 50
+MAX_AUDIO_BYTES = 10 * 1024 * 1024
+
+
+class TranslateRequest(BaseModel):
+    text: str = Field(min_length=1, max_length=500)
+    language: str = Field(description='Target language name, e.g. "French"')
+    notes: bool = Field(True, description='Also ask for usage notes')
+
+
+class TranslateBatchRequest(BaseModel):
+    items: List[TranslateRequest] = Field(max_length=MAX_BATCH)
+
+
+class EvaluateRequest(BaseModel):
+    attempt: str = Field(max_length=500, description='What the learner said (transcript)')
+    target: str = Field(min_length=1, max_length=500, description='What they were trying to say')
+    language: str
+    tips: bool = Field(True, description='Also ask for improvement tips')
+
+
+class SpeechRequest(BaseModel):
+    text: str = Field(min_length=1, max_length=500)
+    language_code: str = Field(description='gTTS language code, e.g. "fr"')
+    slow: bool = True
+
+
+class Transcript(BaseModel):
+    text: str
+
+
+class TeacherService:
+    """Shared state behind the HTTP routes"""
+
+    def __init__(self, api_key: str):
+        self.cache = SharedCache(backend_from_env())
+        self.ledger = TokenLedger()
+        self.evaluations = EvaluationCache(capacity=20000, shared=self.cache, ttl=EVALUATION_CACHE_TTL)
+        self.teacher = GeminiLanguageTeacher(
+            api_key, cache=self.cache,
+            guard=ModelGuard(CircuitBreaker(failure_threshold=5, reset_timeout=30)),
+            scheduler=ModelScheduler.from_env(), ledger=self.ledger,
+            evaluation_cache=self.evaluations)
+        # Same guard, quota and cache, queued behind learners' calls
+        self.warmup_teacher = GeminiLanguageTeacher(
+            api_key, cache=self.cache, guard=self.teacher.guard, scheduler=self.teacher.scheduler,
+            priority=Priority.PREFETCH, ledger=self.ledger)
+        self.warmer: Optional[CacheWarmer] = None
+        self.bundle = open_bundle(DEFAULT_BUNDLE_PATH)
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def coalesce(self, key: tuple, compute: Callable[[], object]) -> object:
+        """Run blocking `compute` in a worker thread, once for all concurrent callers with the same key"""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(asyncio.to_thread(compute))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def translate(self, request: TranslateRequest) -> Dict[str, str]:
+        check_language(request.language)
+        return await self.coalesce(('translate', request.text, request.language, request.notes),
+                                   lambda: self.teacher.translate(request.text, request.language, request.notes))
+
+    async def evaluate(self, request: EvaluateRequest) -> Dict[str, object]:
+        check_language(request.language)
+        return await self.coalesce(
+            ('evaluate', normalize_transcript(request.attempt), request.target, request.language, request.tips),
+            lambda: self.teacher.evaluate(request.attempt, request.target, request.language, request.tips))
+
+    def _speech(self, request: SpeechRequest) -> bytes:
+        speed = speed_label(request.slow)
+        if self.bundle is not None and self.bundle.is_stale():
+            self.bundle = open_bundle(DEFAULT_BUNDLE_PATH)
+        clip = self.bundle.get(request.text, request.language_code, speed) if self.bundle is not None else None
+        if clip is not None:
+            return bytes(clip)
+        # Same key as the app's in-process path, so both hit the same entries
+        key = self.cache.make_key('tts', request.text, request.language_code, speed)
+        return self.cache.get_or_compute(
+            key, lambda: synthesize_speech(request.text, request.language_code, slow=request.slow),
+            ttl=TTS_CACHE_TTL, codec='bytes')
+
+    async def speech(self, request: SpeechRequest) -> bytes:
+        return await self.coalesce(('tts', request.text, request.language_code, request.slow),
+                                   lambda: self._speech(request))
+
+    def drill(self, lesson_key: str, language: str) -> Iterator[bytes]:
+        def speak(text: str, language_code: str, slow: bool) -> bytes:
+            return self._speech(SpeechRequest(text=text, language_code=language_code, slow=slow))
+
+        return lesson_drill(lesson_key, language, self.teacher, speak)
+
+    def warm(self, phrase: str, language: str) -> None:
+        """Translation and both gTTS speeds of one phrase, into the entries requests will hit"""
+        translation = self.warmup_teacher.translate(phrase, language)['translation']
+        for slow in (False, True):
+            self._speech(SpeechRequest(text=translation, language_code=LANGUAGES[language], slow=slow))
+
+    def start_warmup(self) -> CacheWarmer:
+        if self.warmer is None:
+            self.warmer = CacheWarmer(warmup_pairs(), self.warm).start()
+        return self.warmer
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'model': self.teacher.guard.stats(),
+            'scheduler': self.teacher.scheduler.stats,
+            'tokens': self.ledger.summary(),
+            'cache': self.cache.stats,
+            'evaluation_hit_rates': self.evaluations.hit_rates(),
+            'coalesced': self.coalesced,
+            'audio_bundle_clips': len(self.bundle) if self.bundle is not None else 0,
+            'warmup': self.warmer.status() if self.warmer is not None else None,
+        }
+
+
+def check_language(language: str):
+    if language not in LANGUAGES:
+        raise HTTPException(422, f"Unknown language {language!r}; expected one of {sorted(LANGUAGES)}")
+
+
+async def upstream(call: Awaitable):
+    """Model / speech backend failures become 503s; the frontend shows its local fallback"""
+    try:
+        return await call
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(503, f"{type(e).__name__}: {e}")
+
+
+def create_app(api_key: Optional[str] = None, warmup: bool = WARMUP_LIMIT > 0) -> FastAPI:
+    service: Optional[TeacherService] = None
+
+    def get_service() -> TeacherService:
+        nonlocal service
+        if service is None:
+            key = api_key or os.getenv('GEMINI_API_KEY', '')
+            if not key:
+                raise HTTPException(503, 'GEMINI_API_KEY is not configured')
+            service = TeacherService(key)
+        return service
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Starts warming and returns at once: requests are served while it runs
+        if warmup and (api_key or os.getenv('GEMINI_API_KEY')):
+            get_service().start_warmup()
+        yield
+        if service is not None and service.warmer is not None:
+            service.warmer.stop()
+
+    app = FastAPI(title='Language Learner teacher service', version='1.0', lifespan=lifespan,
+                  description='Translation, pronunciation evaluation, text-to-speech and speech-to-text '
+                              'behind one shared cache and model quota.')
+
+    @app.middleware('http')
+    async def trace_requests(request: Request, call_next):
+        """One span per request, continuing the app's trace when it sent a traceparent header"""
+        if not tracer.enabled:
+            return await call_next(request)
+        with tracer.span(f'{request.method} {request.url.path}', traceparent=request.headers.get('traceparent'),
+                         component='teacher_service',
+                         request_bytes=int(request.headers.get('content-length', 0))) as span:
+            response = await call_next(request)
+            span.set_attribute('status_code', response.status_code)
+            return response
+
+    @app.get('/healthz')
+    async def healthz() -> Dict[str, object]:
+        """Liveness, plus the boot-time cache warm-up's progress (`warmup.ready` once it has finished
+        and warmed at least one phrase, `warmup.degraded` when any failed)"""
+        warmer = service.warmer if service is not None else None
+        return {'status': 'ok', 'warmup': warmer.status() if warmer is not None else {'state': 'disabled'}}
+
+    @app.get('/v1/stats')
+    async def stats() -> Dict[str, object]:
+        return get_service().stats()
+
+    @app.post('/v1/translate')
+    async def translate(request: TranslateRequest) -> Dict[str, object]:
+        return await upstream(get_service().translate(request))
+
+    @app.post('/v1/translate/batch')
+    async def translate_batch(request: TranslateBatchRequest) -> Dict[str, List[Dict[str, object]]]:
+        """Translate many phrases concurrently (within the quota); failures are reported per item"""
+        service = get_service()
+        outcomes = await asyncio.gather(*(service.translate(item) for item in request.items),
+                                        return_exceptions=True)
+        return {'results': [{'error': str(getattr(o, 'detail', o))} if isinstance(o, Exception) else {'result': o}
+                            for o in outcomes]}
+
+    @app.post('/v1/evaluate')
+    async def evaluate(request: EvaluateRequest) -> Dict[str, object]:
+        return await upstream(get_service().evaluate(request))
+
+    @app.post('/v1/tts', response_class=Response,
+              responses={200: {'content': {TTS_MIME_TYPE: {}}, 'description': 'MP3 audio'}})
+    async def tts(request: SpeechRequest) -> Response:
+        audio = await upstream(get_service().speech(request))
+        return Response(content=audio, media_type=TTS_MIME_TYPE,
+                        headers={'Cache-Control': 'public, max-age=86400'})
+
+    @app.get('/v1/drill/{lesson_key}', response_class=StreamingResponse,
+             responses={200: {'content': {TTS_MIME_TYPE: {}},
+                              'description': 'MP3 stream: English prompt, pause, translation, pause, per phrase'}})
+    async def drill(lesson_key: str, language: str = Query(description='Target language name')):
+        """Whole-lesson listening drill, streamed while later phrases are still being synthesized"""
+        if lesson_key not in CURRICULUM:
+            raise HTTPException(404, f"Unknown lesson {lesson_key!r}")
+        check_language(language)
+        return StreamingResponse(get_service().drill(lesson_key, language), media_type=TTS_MIME_TYPE)
+
+    @app.post('/v1/stt', response_model=Transcript,
+              openapi_extra={'requestBody': {'required': True, 'content': {'audio/wav': {
+                  'schema': {'type': 'string', 'format': 'binary'}}}}})
+    async def stt(request: Request, language_code: str = Query(description='RFC 5646 tag, e.g. "fr-FR"')):
+        audio = await request.body()
+        if not audio:
+            raise HTTPException(400, 'Send the WAV recording as the request body')
+        if len(audio) > MAX_AUDIO_BYTES:
+            raise HTTPException(413, 'Recording too large')
+        text = await upstream(asyncio.to_thread(recognize_speech, audio, language_code))
+        return Transcript(text=text)
+
+    return app
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--openapi', action='store_true', help='print the OpenAPI spec and exit')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.openapi:
+        json.dump(app.openapi(), sys.stdout, indent=2)
+        print()
+        return
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port, timeout_keep_alive=75)
+
+
+if __name__ == '__main__':
+    main()
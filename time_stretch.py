@@ -0,0 +1,86 @@
+"""Pitch-preserving time-stretching (WSOLA) of synthesized speech.
+
+gTTS offers two speeds, each its own network call and cache entry. Instead,
+one normal-speed clip is synthesized and any playback rate between
+MIN_RATE and MAX_RATE is derived from it locally: the waveform is cut into
+overlapping Hann-windowed frames, read with an analysis hop of `rate` times
+the synthesis hop, and each frame is shifted within a small tolerance to
+where it best continues the previous one (waveform-similarity overlap-add),
+so pitch and timbre are kept while the duration changes.
+
+The similarity search runs on a 4x-decimated copy of the signal with one
+small matrix-vector product per frame and the overlap-add is vectorized,
+which keeps a 3 s clip in a few milliseconds of CPU
+(benchmarks/bench_time_stretch.py). MP3 is decoded and re-encoded with the
+`ffmpeg` binary (see audio_codec.py); without it, callers fall back to
+gTTS's own slow / normal speeds.
+"""
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from audio_codec import FFMPEG, decode_mp3, encode_mp3
+from live_audio import Audio, AudioConfig
+from resample import from_float, to_mono_float
+
+MIN_RATE = 0.5
+MAX_RATE = 1.25
+PLAYBACK_RATES = (0.5, 0.6, 0.75, 0.9, 1.0, 1.1, 1.25)
+
+
+def wsola(x: np.ndarray, rate: float, sample_rate: int, frame_ms: float = 40.0,
+          tolerance_ms: float = 8.0, decimation: int = 4) -> np.ndarray:
+    """Mono float32 `x` played `rate` times as fast (rate < 1 is slower), same pitch"""
+    if not MIN_RATE <= rate <= MAX_RATE:
+        raise ValueError(f"rate must be between {MIN_RATE} and {MAX_RATE}, got {rate}")
+    if rate == 1.0 or x.size == 0:
+        return x
+    d = decimation
+    n = int(sample_rate * frame_ms / 1000) // (2 * d) * (2 * d)
+    hop = n // 2  # synthesis hop; frames are read `rate * hop` apart
+    tolerance = int(sample_rate * tolerance_ms / 1000) // d * d
+
+    out_size = int(round(x.size / rate))
+    frames = max(1, -(-out_size // hop))
+    # Pad so every frame's search region and natural continuation stay in range
+    tail = int(frames * hop * rate) + 2 * tolerance + hop + n + d - x.size
+    padded = np.concatenate((np.zeros(tolerance, np.float32), x.astype(np.float32, copy=False),
+                             np.zeros(max(0, tail), np.float32)))
+
+    # Similarity search on a decimated copy: one small matrix-vector product per frame
+    coarse = padded[::d]
+    windows = sliding_window_view(coarse, n // d)
+    starts = (np.arange(frames) * (hop * rate)).astype(np.int64) // d
+    width, span, step = tolerance // d + 1, n // d, hop // d
+    positions = np.empty(frames, np.int64)
+    positions[0] = tolerance // d
+    for k in range(1, frames):
+        # Shift the ideal read position to best match the frame that would
+        # seamlessly follow the previous one
+        natural = positions[k - 1] + step
+        positions[k] = starts[k] + (windows[starts[k]:starts[k] + width] @ coarse[natural:natural + span]).argmax()
+
+    # Overlap-add: a periodic Hann at 50% overlap sums to exactly 1
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)).astype(np.float32)
+    chunks = sliding_window_view(padded, n)[positions * d] * window
+    out = np.zeros((frames + 1, hop), np.float32)
+    out[:-1] += chunks[:, :hop]
+    out[1:] += chunks[:, hop:]
+    return out.reshape(-1)[:out_size]
+
+
+def stretch_audio(audio: Audio, rate: float) -> Audio:
+    """`audio` (any config) as mono at `rate`, same sample rate"""
+    config = AudioConfig(sample_rate=audio.config.sample_rate)
+    y = wsola(to_mono_float(audio.data, audio.config), rate, config.sample_rate)
+    return Audio(config, from_float(y, config).tobytes())
+
+
+def stretch_mp3(data: bytes, rate: float) -> Optional[bytes]:
+    """MP3 clip at `rate`; None when ffmpeg is not installed"""
+    if rate == 1.0:
+        return data
+    if FFMPEG is None:
+        return None
+    return encode_mp3(stretch_audio(decode_mp3(data), rate))
@@ -0,0 +1,353 @@
+"""Per-attempt tracing: nested timed spans exported as OTLP/JSON.
+
+Aggregate latency histograms cannot show why one recording took eight
+seconds. With `TRACE_EXPORT` set, every rerun of the app is a trace and each
+stage of a practice attempt (resampling, noise calibration, Google STT, the
+Gemma evaluation, TTS, rendering) a span inside it, with attributes such as
+language, phrase, payload sizes and cache hits. Calls to teacher_service.py
+carry a W3C `traceparent` header, so the service's spans join the app's trace.
+
+Spans are batched on a background thread and written in the OTLP/JSON
+encoding, either appended to a file (one ExportTraceServiceRequest per line,
+the layout of the OpenTelemetry collector's file exporter) or POSTed to an
+OTLP/HTTP collector (`http://localhost:4318` for Jaeger, Tempo or otelcol):
+
+    TRACE_EXPORT=traces.jsonl streamlit run streamlit_app.py
+    python tracing.py show traces.jsonl --slowest 5     # span trees of the slowest traces
+    python tracing.py collect --port 4318 -o traces.jsonl   # stand-in collector
+
+With `TRACE_EXPORT` unset, `tracer.span` yields a shared no-op span and
+costs one attribute check.
+"""
+import argparse
+import atexit
+import contextvars
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+TRACE_EXPORT = os.getenv('TRACE_EXPORT', '')
+SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'language-learner')
+SCOPE_NAME = 'language-learner'
+
+# OTLP span status codes
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+
+class Span:
+    """One timed operation; ids are lowercase hex as in OTLP/JSON"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, object]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = STATUS_UNSET
+        self.message = ''
+
+    def set_attribute(self, key: str, value) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.message = f'{type(error).__name__}: {error}'
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def to_otlp(self) -> Dict[str, object]:
+        span = {'traceId': self.trace_id, 'spanId': self.span_id, 'name': self.name, 'kind': 1,
+                'startTimeUnixNano': str(self.start_ns), 'endTimeUnixNano': str(self.end_ns),
+                'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in self.attributes.items()]}
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.status != STATUS_UNSET:
+            span['status'] = {'code': self.status, 'message': self.message}
+        return span
+
+
+class _NoopSpan:
+    traceparent = None
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+def _otlp_value(value) -> Dict[str, object]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """(trace id, parent span id) from a W3C traceparent header"""
+    parts = (header or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2]
+
+
+def otlp_request(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, object]:
+    """An OTLP ExportTraceServiceRequest, JSON-encoded"""
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+        'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': [span.to_otlp() for span in spans]}],
+    }]}
+
+
+def file_sink(path: str) -> Callable[[Dict[str, object]], None]:
+    lock = threading.Lock()
+
+    def write(payload):
+        line = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        with lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    return write
+
+
+def http_sink(endpoint: str, timeout: float = 5.0) -> Callable[[Dict[str, object]], None]:
+    url = endpoint.rstrip('/')
+    if not url.endswith('/v1/traces'):
+        url += '/v1/traces'
+
+    def post(payload):
+        request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'), method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    return post
+
+
+class BatchExporter:
+    """Queues finished spans and hands them to `sink` in batches from a daemon thread"""
+
+    def __init__(self, sink: Callable[[Dict[str, object]], None], service_name: str = SERVICE_NAME,
+                 max_batch: int = 256, interval: float = 1.0, max_queue: int = 10000):
+        self.sink = sink
+        self.service_name = service_name
+        self.max_batch = max_batch
+        self.interval = interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._failed = False
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first: Optional[Span] = None) -> List[Span]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        try:
+            self.sink(otlp_request(batch, self.service_name))
+            self._failed = False
+        except Exception as e:
+            # Tracing never breaks the page; report once per outage
+            if not self._failed:
+                print(f"Trace export failed: {e}")
+            self._failed = True
+            self.dropped += len(batch)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            self._send(self._drain(first))
+
+    def flush(self) -> None:
+        while not self._queue.empty():
+            self._send(self._drain())
+
+
+def exporter_from_env(target: str = TRACE_EXPORT) -> Optional[BatchExporter]:
+    """`TRACE_EXPORT`: a file path, or an http(s):// OTLP/HTTP endpoint; unset disables tracing"""
+    if not target:
+        return None
+    if target.startswith(('http://', 'https://')):
+        return BatchExporter(http_sink(target))
+    return BatchExporter(file_sink(target))
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[BatchExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Span]:
+        """Child of the current span; a new trace (or one continuing `traceparent`) at the top level"""
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = parse_traceparent(traceparent) or (os.urandom(16).hex(), None)
+        span = Span(name, trace_id, parent_id, {k: v for k, v in attributes.items() if v is not None})
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+    def current(self):
+        """The active span (to add attributes to), or the no-op span"""
+        return _current_span.get() or NOOP_SPAN
+
+
+# One per process: Streamlit reruns the app script but keeps imported modules
+tracer = Tracer(exporter_from_env())
+
+
+def in_current_context(fn: Callable) -> Callable:
+    """`fn` bound to the caller's context, so spans it opens on a pool thread nest under the caller's"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def read_spans(path: str) -> List[Dict[str, object]]:
+    spans = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get('resourceSpans', []):
+                for scope in resource.get('scopeSpans', []):
+                    spans.extend(scope.get('spans', []))
+    return spans
+
+
+def format_trace(spans: List[Dict[str, object]]) -> str:
+    """Indented span tree with durations and attributes"""
+    children: Dict[Optional[str], list] = {}
+    ids = {span['spanId'] for span in spans}
+    for span in sorted(spans, key=lambda s: int(s['startTimeUnixNano'])):
+        parent = span.get('parentSpanId')
+        children.setdefault(parent if parent in ids else None, []).append(span)
+    start = min(int(s['startTimeUnixNano']) for s in spans)
+    lines = []
+
+    def walk(span, depth):
+        begin = (int(span['startTimeUnixNano']) - start) / 1e6
+        took = (int(span['endTimeUnixNano']) - int(span['startTimeUnixNano'])) / 1e6
+        attributes = ' '.join(f"{a['key']}={next(iter(a['value'].values()))}" for a in span.get('attributes', []))
+        error = ' ERROR ' + span['status'].get('message', '') if span.get('status', {}).get('code') == 2 else ''
+        lines.append(f"{begin:8.1f} ms {took:8.1f} ms  {'  ' * depth}{span['name']}  {attributes}{error}")
+        for child in children.get(span['spanId'], []):
+            walk(child, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+    return '\n'.join(lines)
+
+
+def serve_collector(port: int, output: str) -> None:
+    """Minimal OTLP/HTTP (JSON) receiver that appends each request to `output`"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    write = file_sink(output)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/v1/traces' or 'json' not in self.headers.get('Content-Type', ''):
+                self.send_error(415 if self.path == '/v1/traces' else 404)
+                return
+            write(json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0)))))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    print(f"Collecting OTLP/JSON traces on http://localhost:{port}/v1/traces -> {output}")
+    ThreadingHTTPServer(('', port), Handler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    show = commands.add_parser('show', help='print the span trees of the slowest traces in a file')
+    show.add_argument('path')
+    show.add_argument('--slowest', type=int, default=5)
+    show.add_argument('--trace', help='one trace id instead')
+    collect = commands.add_parser('collect', help='receive OTLP/HTTP JSON and append it to a file')
+    collect.add_argument('--port', type=int, default=4318)
+    collect.add_argument('-o', '--output', default='traces.jsonl')
+    args = parser.parse_args()
+
+    if args.command == 'collect':
+        serve_collector(args.port, args.output)
+        return
+    traces: Dict[str, list] = {}
+    for span in read_spans(args.path):
+        traces.setdefault(span['traceId'], []).append(span)
+    if args.trace:
+        selected = [args.trace] if args.trace in traces else []
+    else:
+        def duration(spans):
+            return max(int(s['endTimeUnixNano']) for s in spans) - min(int(s['startTimeUnixNano']) for s in spans)
+        selected = sorted(traces, key=lambda t: duration(traces[t]), reverse=True)[:args.slowest]
+    if not selected:
+        sys.exit('No matching traces')
+    for trace_id in selected:
+        print(f"trace {trace_id}")
+        print(format_trace(traces[trace_id]))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+"""Local pronunciation guides for languages with a standard romanization.
+
+The model's `pronunciation` field costs output tokens on every translation
+and comes back spelled differently from call to call. For scripts with an
+established scheme the guide is derived from the translation text instead,
+deterministically and in microseconds:
+
+    Korean               Revised Romanization (built in)
+    Hindi                IAST, with Hindi schwa deletion (built in)
+    Arabic               simplified ISO 233 / DIN 31635 (built in; vocalized text only)
+    Hebrew               simplified SBL general-purpose (built in; pointed text only)
+    Chinese (Mandarin)   Hanyu Pinyin with tone marks (needs `pypinyin`)
+    Japanese             Hepburn (needs `pykakasi`; fallback only)
+
+Arabic and Hebrew are normally written without vowels, which a romanizer
+cannot recover, so those engines only answer for text that carries harakat
+or niqqud and the model still supplies the guide otherwise. Japanese
+particles need a morphological analyzer to find reliably, so the model
+still supplies that guide too and the local one fills in when it does not. Further
+languages plug in with `@register(language, scheme)`.
+"""
+import re
+import unicodedata
+from typing import Callable, Dict, NamedTuple, Optional
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+try:
+    import pykakasi
+except ImportError:
+    pykakasi = None
+
+
+class Transliterator(NamedTuple):
+    scheme: str
+    convert: Callable[[str], Optional[str]]
+    # Only usable on vowel-marked text: the model must still be asked for a guide
+    needs_vowel_marks: bool = False
+    # Not reliable enough to replace the model: asked for a guide, which wins when it gives one
+    fallback_only: bool = False
+
+
+TRANSLITERATORS: Dict[str, Transliterator] = {}
+
+
+def register(language: str, scheme: str, needs_vowel_marks: bool = False, fallback_only: bool = False):
+    """Decorator adding `convert(text) -> guide or None` as the engine for `language`"""
+    def decorator(convert: Callable[[str], Optional[str]]):
+        TRANSLITERATORS[language] = Transliterator(scheme, convert, needs_vowel_marks, fallback_only)
+        return convert
+    return decorator
+
+
+def replaces_model_guide(language: str) -> bool:
+    """True when the translation prompt can leave out the pronunciation field"""
+    engine = TRANSLITERATORS.get(language)
+    return engine is not None and not (engine.needs_vowel_marks or engine.fallback_only)
+
+
+def transliterate(text: str, language: str, model_guide: str = '') -> Optional[str]:
+    """Local pronunciation guide for `text`, or None when there is no engine, it cannot answer, or it
+    only stands in for a missing `model_guide`"""
+    engine = TRANSLITERATORS.get(language)
+    if engine is None or not text or (engine.fallback_only and model_guide):
+        return None
+    guide = engine.convert(text)
+    return guide or None
+
+
+_ASCII_PUNCTUATION = str.maketrans('，。！？、；：（）「」『』…～', ',.!?,;:()""""~~')
+
+
+def _tidy(text: str) -> str:
+    text = text.translate(_ASCII_PUNCTUATION)
+    text = re.sub(r'\s+([,.!?;:)"~])', r'\1', text)
+    return ' '.join(text.split())
+
+
+# Korean: Revised Romanization from the Hangul syllable arithmetic, with
+# liaison, nasalization before ㄴ/ㅁ and the ㄹ-ㄹ / ㄴ-ㄹ rules
+_KO_INITIALS = ['g', 'kk', 'n', 'd', 'tt', 'r', 'm', 'b', 'pp', 's', 'ss', '', 'j', 'jj', 'ch', 'k', 't', 'p', 'h']
+_KO_MEDIALS = ['a', 'ae', 'ya', 'yae', 'eo', 'e', 'yeo', 'ye', 'o', 'wa', 'wae', 'oe', 'yo', 'u', 'wo', 'we',
+               'wi', 'yu', 'eu', 'ui', 'i']
+# Final consonant -> (sound before a consonant or a pause, initial it becomes before ㅇ, what stays behind)
+_KO_FINALS = [None, ('k', 0, None), ('k', 1, None), ('k', 9, 'k'), ('n', 2, None), ('n', 12, 'n'),
+              ('n', 2, None), ('t', 3, None), ('l', 5, None), ('k', 0, 'l'), ('m', 6, 'l'), ('l', 7, 'l'),
+              ('l', 9, 'l'), ('l', 16, 'l'), ('p', 17, 'l'), ('l', 5, None), ('m', 6, None), ('p', 7, None),
+              ('p', 9, 'p'), ('t', 9, None), ('t', 10, None), ('ng', None, None), ('t', 12, None),
+              ('t', 14, None), ('k', 15, None), ('t', 16, None), ('p', 17, None), ('t', None, None)]
+_KO_NASAL = {'k': 'ng', 't': 'n', 'p': 'm'}
+
+
+def _hangul(ch: str):
+    code = ord(ch) - 0xAC00
+    if 0 <= code < 11172:
+        return code // 588, (code % 588) // 28, code % 28
+    return None
+
+
+@register('Korean', 'Revised Romanization')
+def korean(text: str) -> Optional[str]:
+    syllables = [_hangul(ch) for ch in text]
+    if not any(syllables):
+        return None
+    out = []
+    carried = None  # initial index pushed onto this syllable by the previous final (liaison)
+    for i, (ch, syllable) in enumerate(zip(text, syllables)):
+        if syllable is None:
+            out.append(ch)
+            carried = None
+            continue
+        initial, medial, final = syllable
+        if carried is not None and initial == 11:
+            initial = carried
+        onset = _KO_INITIALS[initial]
+        if initial in (2, 5) and out and out[-1].endswith('l'):
+            onset = 'l'
+        out.append(onset + _KO_MEDIALS[medial])
+        carried = None
+        if not final:
+            continue
+        coda, liaison, remains = _KO_FINALS[final]
+        following = syllables[i + 1] if i + 1 < len(syllables) else None
+        if final == 27 and following is not None and following[0] == 11:
+            continue  # ㅎ is silent before a vowel
+        if following is not None and following[0] == 11 and liaison is not None:
+            # The final is pronounced as the next syllable's initial
+            carried = liaison
+            if remains:
+                out.append(remains)
+            continue
+        if following is not None and following[0] in (2, 6) and coda in _KO_NASAL:
+            coda = _KO_NASAL[coda]
+        elif following is not None and following[0] == 5 and coda in ('n', 'l'):
+            coda = 'l'
+        out.append(coda)
+    return _tidy(''.join(out))
+
+
+# Hindi: IAST from Devanagari, dropping the inherent vowels Hindi does not pronounce
+_HI_CONSONANTS = dict(zip(
+    'कखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसह',
+    ['k', 'kh', 'g', 'gh', 'ṅ', 'c', 'ch', 'j', 'jh', 'ñ', 'ṭ', 'ṭh', 'ḍ', 'ḍh', 'ṇ', 't', 'th', 'd', 'dh', 'n',
+     'p', 'ph', 'b', 'bh', 'm', 'y', 'r', 'l', 'v', 'ś', 'ṣ', 's', 'h']))
+_HI_NUKTA = {'क': 'q', 'ख': 'x', 'ग': 'ġ', 'ज': 'z', 'ड': 'ṛ', 'ढ': 'ṛh', 'फ': 'f'}
+_HI_VOWELS = dict(zip('अआइईउऊऋएऐओऔऑ', ['a', 'ā', 'i', 'ī', 'u', 'ū', 'ṛ', 'e', 'ai', 'o', 'au', 'ŏ']))
+_HI_MATRAS = dict(zip('ािीुूृेैोौॉ', ['ā', 'i', 'ī', 'u', 'ū', 'ṛ', 'e', 'ai', 'o', 'au', 'ŏ']))
+_HI_SIGNS = {'ं': 'ṃ', 'ँ': 'm̐', 'ः': 'ḥ', '।': '.', '॥': '.', 'ऽ': ''}
+_VIRAMA, _NUKTA = '्', '़'
+
+
+def _hindi_syllables(word: str):
+    """[consonant or '', vowel or None (inherent a), sign] per akshara; vowel '' after a virama"""
+    units = []
+    i = 0
+    while i < len(word):
+        ch = word[i]
+        if ch in _HI_CONSONANTS:
+            if i + 1 < len(word) and word[i + 1] == _NUKTA:
+                units.append([_HI_NUKTA.get(ch, _HI_CONSONANTS[ch]), None, ''])
+                i += 1
+            else:
+                units.append([_HI_CONSONANTS[ch], None, ''])
+        elif ch in _HI_MATRAS and units:
+            units[-1][1] = _HI_MATRAS[ch]
+        elif ch == _VIRAMA and units:
+            units[-1][1] = ''
+        elif ch in _HI_VOWELS:
+            units.append(['', _HI_VOWELS[ch], ''])
+        elif ch in _HI_SIGNS and units:
+            units[-1][2] += _HI_SIGNS[ch]
+        else:
+            units.append(['', '', ch])
+        i += 1
+    return units
+
+
+def _delete_schwas(units) -> None:
+    """Hindi schwa deletion: drop the inherent a word-finally and in V C(a) C V, scanning right to left"""
+    def voiced(unit):
+        return unit[1] != ''
+
+    if units and units[-1][0] and units[-1][1] is None and not units[-1][2]:
+        units[-1][1] = ''
+    for i in range(len(units) - 2, 0, -1):
+        unit, before, after = units[i], units[i - 1], units[i + 1]
+        if unit[0] and unit[1] is None and not unit[2] and voiced(before) and after[0] and voiced(after):
+            unit[1] = ''
+
+
+@register('Hindi', 'IAST')
+def hindi(text: str) -> Optional[str]:
+    # Precomposed nukta letters (क़ ...) become consonant + nukta
+    text = unicodedata.normalize('NFD', text)
+    if not any(ch in _HI_CONSONANTS or ch in _HI_VOWELS for ch in text):
+        return None
+    words = []
+    for word in text.split():
+        units = _hindi_syllables(word)
+        # Trailing punctuation does not count as part of the word
+        tail = []
+        while units and not units[-1][0] and units[-1][1] == '':
+            tail.insert(0, units.pop())
+        _delete_schwas(units)
+        words.append(''.join(consonant + ('a' if vowel is None else vowel) + sign
+                             for consonant, vowel, sign in units + tail))
+    return _tidy(' '.join(words))
+
+
+def _vowel_mark_ratio(text: str, letters: str, marks: str) -> float:
+    count_letters = sum(ch in letters for ch in text)
+    return sum(ch in marks for ch in text) / count_letters if count_letters else 0.0
+
+
+# Arabic: vocalized text only (harakat carry the short vowels)
+_AR_LETTERS = {
+    'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j', 'ح': 'ḥ', 'خ': 'kh', 'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z',
+    'س': 's', 'ش': 'sh', 'ص': 'ṣ', 'ض': 'ḍ', 'ط': 'ṭ', 'ظ': 'ẓ', 'ع': 'ʿ', 'غ': 'gh', 'ف': 'f', 'ق': 'q',
+    'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'w', 'ي': 'y', 'ء': 'ʾ', 'أ': 'ʾ', 'إ': 'ʾ',
+    'ؤ': 'ʾ', 'ئ': 'ʾ', 'ة': 'h', 'ى': 'ā', 'ا': 'ā', 'آ': 'ʾā',
+}
+_AR_HARAKAT = {'َ': 'a', 'ِ': 'i', 'ُ': 'u', 'ً': 'an', 'ٍ': 'in', 'ٌ': 'un',
+               'ْ': '', 'ٰ': 'ā'}
+_AR_SHADDA = 'ّ'
+_AR_SUN_LETTERS = set('تثدذرزسشصضطظلن')
+# Unmarked letter after a short vowel: the long vowel it spells
+_AR_LONG = {('a', 'ا'): 'ā', ('a', 'ى'): 'ā', ('i', 'ي'): 'ī', ('u', 'و'): 'ū', ('an', 'ا'): 'an',
+            ('an', 'ى'): 'an'}
+_AR_PUNCTUATION = {'،': ',', '؟': '?', '؛': ';'}
+
+
+@register('Arabic', 'ISO 233 (simplified)', needs_vowel_marks=True)
+def arabic(text: str) -> Optional[str]:
+    if _vowel_mark_ratio(text, ''.join(_AR_LETTERS), ''.join(_AR_HARAKAT) + _AR_SHADDA) < 0.4:
+        return None
+    words = []
+    for word in text.split():
+        clusters = re.findall(r'([ء-ي])([ً-ٰٟ]*)|([^ء-ي])', word)
+        out = []
+        vowel = ''  # short vowel of the previous letter
+        if len(clusters) > 2 and clusters[0][0] == 'ا' and clusters[1][0] == 'ل':
+            # Definite article; assimilated before sun letters (ash-shams)
+            follower = clusters[2]
+            if follower[0] in _AR_SUN_LETTERS and _AR_SHADDA in follower[1]:
+                out.append('a' + _AR_LETTERS[follower[0]] + '-')
+                clusters = [(follower[0], follower[1].replace(_AR_SHADDA, ''), '')] + clusters[3:]
+            else:
+                out.append('al-')
+                clusters = clusters[2:]
+        for index, (letter, marks, other) in enumerate(clusters):
+            if other:
+                out.append(_AR_PUNCTUATION.get(other, other))
+                vowel = ''
+                continue
+            harakah = next((_AR_HARAKAT[m] for m in marks if m in _AR_HARAKAT), None)
+            if harakah is None and (vowel, letter) in _AR_LONG:
+                long_vowel = _AR_LONG[vowel, letter]
+                out[-1] = out[-1][:-len(vowel)] + long_vowel
+                vowel = ''
+                continue
+            if letter == 'ا' and index == 0:
+                consonant = ''  # hamzat al-wasl: only its vowel is heard
+            else:
+                consonant = _AR_LETTERS[letter]
+            if _AR_SHADDA in marks:
+                consonant *= 2
+            vowel = harakah or ''
+            out.append(consonant + vowel)
+        words.append(''.join(out))
+    return _tidy(' '.join(words))
+
+
+# Hebrew: pointed text only (niqqud carries the vowels)
+_HE_LETTERS = {
+    'א': '', 'ב': 'v', 'ג': 'g', 'ד': 'd', 'ה': 'h', 'ו': 'v', 'ז': 'z', 'ח': 'ch', 'ט': 't', 'י': 'y',
+    'כ': 'kh', 'ך': 'kh', 'ל': 'l', 'מ': 'm', 'ם': 'm', 'נ': 'n', 'ן': 'n', 'ס': 's', 'ע': '', 'פ': 'f',
+    'ף': 'f', 'צ': 'ts', 'ץ': 'ts', 'ק': 'k', 'ר': 'r', 'ש': 'sh', 'ת': 't',
+}
+_HE_DAGESH_LETTERS = {'ב': 'b', 'כ': 'k', 'ך': 'k', 'פ': 'p', 'ף': 'p'}
+_HE_VOWELS = {'ַ': 'a', 'ָ': 'a', 'ֶ': 'e', 'ֵ': 'e', 'ִ': 'i', 'ֹ': 'o',
+              'ֺ': 'o', 'ֻ': 'u', 'ֲ': 'a', 'ֱ': 'e', 'ֳ': 'o', 'ְ': ''}
+_HE_DAGESH, _HE_SHIN_DOT, _HE_SIN_DOT, _HE_SHEVA = 'ּ', 'ׁ', 'ׂ', 'ְ'
+
+
+@register('Hebrew', 'SBL general-purpose (simplified)', needs_vowel_marks=True)
+def hebrew(text: str) -> Optional[str]:
+    if _vowel_mark_ratio(text, ''.join(_HE_LETTERS), ''.join(_HE_VOWELS) + _HE_DAGESH) < 0.4:
+        return None
+    words = []
+    for word in text.split():
+        # Letter + its marks
+        clusters = re.findall(r'([א-ת])([ְ-ׇ]*)|([^א-ת])', word)
+        out = []
+        last_vowel = ''
+        for index, (letter, marks, other) in enumerate(clusters):
+            if other:
+                out.append({'־': '-', '׳': "'", '״': '"'}.get(other, other))
+                continue
+            vowel = next((_HE_VOWELS[m] for m in marks if m in _HE_VOWELS), None)
+            if letter == 'ו' and _HE_DAGESH in marks and vowel is None:
+                out.append('u')  # shuruk
+                last_vowel = 'u'
+                continue
+            if letter == 'ו' and 'ֹ' in marks and vowel == 'o' and len(marks) == 1:
+                out.append('o')  # holam male
+                last_vowel = 'o'
+                continue
+            if letter == 'י' and not marks and last_vowel in ('i', 'e'):
+                continue  # mater lectionis after hiriq / tsere
+            if letter == 'ה' and not marks and index == len(clusters) - 1:
+                continue  # silent final he
+            if letter == 'ש':
+                consonant = 's' if _HE_SIN_DOT in marks else 'sh'
+            elif _HE_DAGESH in marks and letter in _HE_DAGESH_LETTERS:
+                consonant = _HE_DAGESH_LETTERS[letter]
+            else:
+                consonant = _HE_LETTERS[letter]
+            if letter == 'ח' and index == len(clusters) - 1 and vowel == 'a':
+                out.append('a' + consonant)  # furtive patah: sounded before the letter
+                last_vowel = 'a'
+                continue
+            if _HE_SHEVA in marks and index == 0:
+                vowel = 'e'  # vocal sheva at the start of a word
+            out.append(consonant + (vowel or ''))
+            last_vowel = vowel or ''
+        words.append(''.join(out))
+    return _tidy(' '.join(words))
+
+
+if lazy_pinyin is not None:
+    @register('Chinese (Mandarin)', 'Hanyu Pinyin')
+    def mandarin(text: str) -> Optional[str]:
+        return _tidy(' '.join(lazy_pinyin(text, style=Style.TONE)))
+
+
+# Japanese: pykakasi reads は and を as "ha" / "wo" and leaves them inside
+# runs of kana ("はどこですか", "これは", "をください"), so particles are split
+# off here: を always, は after a kanji / katakana word or a common pronoun
+_JA_HIRAGANA = re.compile(r'[\u3041-\u309f]+')
+_JA_TOPIC_AFTER = re.compile(r'^(これ|それ|あれ|どれ|ここ|そこ|あそこ|どこ|わたし|あなた|ぼく|きょう)は')
+_JA_NOT_PARTICLE = ('はい', 'はじめ')
+
+
+def _ja_particles(run: str, after_word: bool):
+    """A hiragana run as (kana, reading) pieces; the reading is None except for particles"""
+    pieces = []
+    if after_word and run.startswith('は') and not run.startswith(_JA_NOT_PARTICLE):
+        pieces.append(('は', 'wa'))
+        run = run[1:]
+    topic = _JA_TOPIC_AFTER.match(run)
+    if topic:
+        pieces += [(topic.group(1), None), ('は', 'wa')]
+        run = run[topic.end():]
+    for index, part in enumerate(run.split('を')):
+        if index:
+            pieces.append(('を', 'o'))
+        if part:
+            pieces.append((part, None))
+    return pieces
+
+
+if pykakasi is not None:
+    _kakasi = pykakasi.kakasi()
+
+    def _ja_segments(text: str):
+        """(original, Hepburn) pairs, with particles as their own words"""
+        after_word = False
+        for item in _kakasi.convert(text):
+            orig, word = item['orig'], item['hepburn']
+            if item['hira'].endswith(('にちは', 'んばんは')):
+                # Topic particle fossilized in greetings: 今日は / こんにちは
+                yield orig, word[:-2] + 'wa'
+            elif _JA_HIRAGANA.fullmatch(orig):
+                for kana, reading in _ja_particles(orig, after_word):
+                    yield kana, reading or ''.join(part['hepburn'] for part in _kakasi.convert(kana))
+            else:
+                yield orig, word
+            after_word = bool(word) and not _JA_HIRAGANA.fullmatch(orig) and word.isalpha()
+
+    # pykakasi has no morphological analysis: the particle rules above miss
+    # some sentences, so the model's guide stays first and this is the fallback
+    @register('Japanese', 'Hepburn', fallback_only=True)
+    def japanese(text: str) -> Optional[str]:
+        words = []
+        geminate = False
+        for orig, word in _ja_segments(text):
+            if not word:
+                continue
+            if geminate and word[0] not in 'aeiou':
+                # pykakasi splits after a small っ and spells it "tsu": 曲がっ|て -> magatte
+                words[-1] += ('t' if word.startswith('ch') else word[0]) + word
+            else:
+                words.append(word)
+            geminate = orig.endswith('っ') and words[-1].endswith('tsu')
+            if geminate:
+                words[-1] = words[-1][:-3]
+        return _tidy(' '.join(words))
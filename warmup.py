@@ -0,0 +1,147 @@
+"""Cache warm-up at boot for the most-practised lessons.
+
+After a deploy or restart, the first learners on each popular lesson would
+wait on cold Gemma and gTTS calls. `CacheWarmer` walks the phrases of the
+busiest (lesson, language) pairs on a background thread, translating each
+and synthesizing its audio into the shared cache, so serving never waits on
+it; hosts give it a teacher at prefetch priority, so learners' own model
+calls go ahead of the warm-up in the quota queue.
+
+Pairs come from WARMUP_LESSONS ("greetings:Hebrew,numbers:French"), then
+the lessons with the most attempts in the progress store over the last
+WARMUP_DAYS days, then the app's defaults, up to WARMUP_LIMIT pairs
+(0 disables the warm-up). teacher_service.py reports `status()` on /healthz.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from language_teacher import CURRICULUM, LANGUAGES
+from progress_store import DEFAULT_DB_PATH, ProgressStore
+
+# The app opens on the first lesson with Hebrew as the target language
+DEFAULT_PAIRS = (('greetings', 'Hebrew'),)
+WARMUP_LESSONS = os.getenv('WARMUP_LESSONS', '')
+WARMUP_LIMIT = int(os.getenv('WARMUP_LIMIT', '6'))
+WARMUP_DAYS = float(os.getenv('WARMUP_DAYS', '7'))
+WARMUP_WORKERS = 2
+
+
+def parse_pairs(spec: str, error_reporter: Callable[[str], None] = print) -> List[Tuple[str, str]]:
+    """'greetings:Hebrew,numbers:French' -> [('greetings', 'Hebrew'), ('numbers', 'French')]; entries
+    that are not <lesson>:<language> are reported and skipped, so a typo never stops the app"""
+    pairs = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        lesson_key, _, language = item.partition(':')
+        if lesson_key not in CURRICULUM or language not in LANGUAGES:
+            error_reporter(f"WARMUP_LESSONS: skipping {item!r}, not <lesson>:<language> "
+                           f"with a lesson from {sorted(CURRICULUM)}")
+            continue
+        pairs.append((lesson_key, language))
+    return pairs
+
+
+def popular_pairs(db_path: str = DEFAULT_DB_PATH, limit: int = WARMUP_LIMIT,
+                  days: float = WARMUP_DAYS) -> List[Tuple[str, str]]:
+    """Busiest (lesson, language) pairs by recent attempts; none before the progress store exists"""
+    if not os.path.exists(db_path):
+        return []
+    store = ProgressStore(db_path)
+    try:
+        rows = store.popular_lessons(limit, since=time.time() - days * 86400)
+    finally:
+        store.close()
+    return [(lesson_key, language) for lesson_key, language, _ in rows
+            if lesson_key in CURRICULUM and language in LANGUAGES]
+
+
+def warmup_pairs(configured: str = WARMUP_LESSONS, db_path: str = DEFAULT_DB_PATH,
+                 limit: int = WARMUP_LIMIT, error_reporter: Callable[[str], None] = print) -> List[Tuple[str, str]]:
+    """Configured pairs, then learned ones, then the defaults; without duplicates"""
+    pairs = [*parse_pairs(configured, error_reporter), *popular_pairs(db_path, limit), *DEFAULT_PAIRS]
+    return list(dict.fromkeys(pairs))[:max(0, limit)]
+
+
+class CacheWarmer:
+    """Runs `warm(phrase, language)` for every phrase of `pairs` on daemon threads, which never hold up
+    a shutdown"""
+
+    def __init__(self, pairs: List[Tuple[str, str]], warm: Callable[[str, str], None],
+                 workers: int = WARMUP_WORKERS, error_reporter: Callable[[str], None] = print):
+        self.pairs = list(pairs)
+        self.warm = warm
+        self.workers = workers
+        self.error_reporter = error_reporter
+        self.jobs = [(phrase, language) for lesson_key, language in self.pairs
+                     for phrase in CURRICULUM[lesson_key]['phrases']]
+        self.done = 0
+        self.errors = 0
+        self.state = 'idle'
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self) -> 'CacheWarmer':
+        with self._lock:
+            if self.state != 'idle':
+                return self
+            self.state = 'running'
+            self.started = time.monotonic()
+        threading.Thread(target=self._run, name='cache-warmer', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Skip the phrases not started yet (server shutdown)"""
+        self._stop.set()
+
+    def _run(self) -> None:
+        jobs = iter(self.jobs)
+        workers = [threading.Thread(target=self._work, args=(jobs,), name=f'cache-warmer-{i}', daemon=True)
+                   for i in range(self.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        with self._lock:
+            self.state = 'stopped' if self._stop.is_set() else 'done'
+            self.finished = time.monotonic()
+
+    def _work(self, jobs) -> None:
+        # Busiest pairs first: jobs are taken in order
+        while not self._stop.is_set():
+            with self._lock:
+                job = next(jobs, None)
+            if job is None:
+                return
+            self._warm_one(*job)
+
+    def _warm_one(self, phrase: str, language: str) -> None:
+        try:
+            self.warm(phrase, language)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                first = self.errors == 1
+            # One line, not one per phrase, when the model or gTTS is unavailable
+            if first:
+                self.error_reporter(f"Cache warm-up: {language} / {phrase}: {e}")
+        finally:
+            with self._lock:
+                self.done += 1
+
+    def status(self) -> Dict[str, object]:
+        """'ready' only once at least one phrase was warmed; 'degraded' when some of them failed"""
+        with self._lock:
+            end = self.finished or time.monotonic()
+            return {
+                'state': self.state,
+                'ready': self.state == 'done' and self.errors < len(self.jobs),
+                'degraded': self.errors > 0,
+                'pairs': [f'{lesson_key}:{language}' for lesson_key, language in self.pairs],
+                'phrases_done': self.done,
+                'phrases_total': len(self.jobs),
+                'errors': self.errors,
+                'seconds': round(end - self.started, 1) if self.started is not None else 0.0,
+            }